@@ -0,0 +1,151 @@
+"""
+Frame-by-frame playback of animated GIFs and multi-page TIFFs.
+
+A decoder thread seeks through the frames in order, scales each one to the
+display size and hands it over through a short bounded queue; the Tk thread
+takes frames from the queue on a root.after schedule that follows each
+frame's duration. During the first pass the frames are kept as PhotoImages,
+so an animation that fits in the cache budget loops without decoding again
+and the decoder exits. One that doesn't fit drops its cache and keeps
+streaming, holding only the frames in the queue, so a 500-frame GIF costs a
+few frames of memory rather than all of them.
+
+stop() ends both sides when the user moves on to another image.
+"""
+
+import queue
+import threading
+from PIL import Image, ImageTk
+from image_decoder import DEFAULT_REDUCING_GAP, display_mode, fit_size
+
+
+# File types that may hold more than one frame
+ANIMATED_EXTENSIONS = {".gif", ".tif", ".tiff"}
+
+# Frames decoded ahead of the one on screen
+FRAMES_AHEAD = 8
+
+# GIF frames with no or a near-zero delay play at this rate, as browsers do
+DEFAULT_FRAME_MS = 100
+MIN_FRAME_MS = 20
+
+# Pages of a multi-page TIFF have no durations of their own
+PAGE_DURATION_MS = 1500
+
+# Retry interval when the decoder hasn't caught up with playback
+FRAME_WAIT_MS = 10
+
+
+def frame_duration(image):
+    """Display time of the current frame in milliseconds"""
+    if image.format != "GIF":
+        return PAGE_DURATION_MS
+    duration = image.info.get("duration") or 0
+    return DEFAULT_FRAME_MS if duration < MIN_FRAME_MS else int(duration)
+
+
+def photo_nbytes(frame):
+    """Memory a frame takes as a PhotoImage; Tk keeps 32-bit pixels"""
+    return frame.size[0] * frame.size[1] * 4
+
+
+class AnimationPlayer:
+    """Plays one file's frames through show(photo) until stopped"""
+
+    def __init__(self, root, file_path, target_size, show, cache_bytes=128 * 1024 * 1024):
+        self.root = root
+        self.file_path = file_path
+        self.target_size = tuple(target_size)
+        self.show = show
+        self.cache_bytes = cache_bytes
+
+        self._frames = queue.Queue(maxsize=FRAMES_AHEAD)
+        self._stop = threading.Event()
+        # Set by the decoder once every frame has been handed over and they all fit in the cache
+        self._decoded_all = threading.Event()
+        self._cache = []
+        self._cached_bytes = 0
+        self._streaming = False
+        self._next = 0
+        self._job = None
+        self._thread = threading.Thread(target=self._decode_frames, name="animation-decode", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        self._job = self.root.after(FRAME_WAIT_MS, self._tick)
+
+    def stop(self, wait=False):
+        """Stop playback; with wait, also wait for the decoder to close the file"""
+        self._stop.set()
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self._cache = []
+        if wait and self._thread.is_alive():
+            self._thread.join()
+
+    def _decode_frames(self):
+        try:
+            with Image.open(self.file_path) as image:
+                if not getattr(image, "is_animated", False):
+                    return
+                frame_count = image.n_frames
+                first_pass_bytes = 0
+                while not self._stop.is_set():
+                    for index in range(frame_count):
+                        if self._stop.is_set():
+                            return
+                        image.seek(index)
+                        frame = image.convert(display_mode(image))
+                        frame = frame.resize(fit_size(frame.size, self.target_size), Image.Resampling.LANCZOS,
+                                             reducing_gap=DEFAULT_REDUCING_GAP)
+                        if first_pass_bytes is not None:
+                            first_pass_bytes += photo_nbytes(frame)
+                        if not self._put((index, frame, frame_duration(image))):
+                            return
+                    if first_pass_bytes is not None and first_pass_bytes <= self.cache_bytes:
+                        # The player has every frame cached and loops on its own
+                        self._decoded_all.set()
+                        return
+                    first_pass_bytes = None
+        except Exception as e:
+            print(f"Error playing {self.file_path}: {e}")
+
+    def _put(self, item):
+        """Queue a frame, giving up when stopped; the queue bounds how far ahead decoding runs"""
+        while not self._stop.is_set():
+            try:
+                self._frames.put(item, timeout=0.05)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _tick(self):
+        self._job = None
+        if self._stop.is_set():
+            return
+
+        try:
+            index, frame, duration = self._frames.get_nowait()
+        except queue.Empty:
+            if self._decoded_all.is_set() and self._cache:
+                photo, duration = self._cache[self._next % len(self._cache)]
+                self._next += 1
+                self.show(photo)
+                self._job = self.root.after(duration, self._tick)
+            elif self._thread.is_alive() or not self._frames.empty():
+                self._job = self.root.after(FRAME_WAIT_MS, self._tick)
+            return
+
+        photo = ImageTk.PhotoImage(frame)
+        if not self._streaming and index == len(self._cache):
+            self._cached_bytes += photo_nbytes(frame)
+            if self._cached_bytes <= self.cache_bytes:
+                self._cache.append((photo, duration))
+            else:
+                self._streaming = True
+                self._cache = []
+        self._next = index + 1
+        self.show(photo)
+        self._job = self.root.after(duration, self._tick)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Replay sorting decisions without the GUI.
+
+A decisions file maps image paths to a direction ("up", "down", "left",
+"right") or a destination folder name, either as CSV with a
+`path,decision` header or as JSON lines with "path" and "decision" keys.
+Relative paths are resolved against the folder given on the command line,
+so a triage exported on one machine can be applied to the originals on
+another. File > Export Decisions in the GUI writes this format.
+
+Usage: python batch_sort.py FOLDER DECISIONS [--workers 4] [--subfolders | --no-subfolders]
+"""
+
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from config_manager import ConfigManager
+from file_handler import FileHandler
+from file_operations import FileOperationQueue
+from hash_index import open_hash_index
+from operation_journal import open_operation_journal
+
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+def read_decisions(decisions_file):
+    """Yield (path, decision) pairs from a CSV or JSON lines file"""
+    decisions_file = Path(decisions_file)
+    with open(decisions_file, newline="", encoding="utf-8") as f:
+        if decisions_file.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                yield row["path"], row["decision"]
+        else:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["path"], record["decision"]
+
+
+def write_decisions(decisions_file, decisions):
+    """Write (path, decision) pairs as CSV or JSON lines, chosen by file extension"""
+    decisions_file = Path(decisions_file)
+    with open(decisions_file, "w", newline="", encoding="utf-8") as f:
+        if decisions_file.suffix.lower() == ".csv":
+            writer = csv.writer(f)
+            writer.writerow(["path", "decision"])
+            writer.writerows((str(path), decision) for path, decision in decisions)
+        else:
+            for path, decision in decisions:
+                f.write(json.dumps({"path": str(path), "decision": decision}) + "\n")
+
+
+def resolve_action(config_manager, decision):
+    """Turn a decision into an action the way the GUI would
+
+    Directions use the configured arrow actions; anything else is a folder
+    name, except "delete", which sends files to the recycle bin.
+    """
+    if decision.lower() in DIRECTIONS:
+        return config_manager.get_action(decision.lower())
+    if decision.lower() == "delete":
+        return {"type": "recycle", "name": decision}
+    return {"type": "folder", "name": decision}
+
+
+def replay_decisions(folder, decisions_file, workers=4, search_subfolders=None, config_manager=None):
+    """Apply every decision through FileHandler.process_action; returns (processed, failures)"""
+    config_manager = config_manager or ConfigManager()
+    if search_subfolders is None:
+        search_subfolders = config_manager.get_search_subfolders()
+    hash_index = open_hash_index(config_manager.get_hash_index_path())
+    journal = open_operation_journal(config_manager.get_journal_path())
+    if journal:
+        for message in journal.recover():
+            print(message)
+    file_handler = FileHandler(
+        folder,
+        search_subfolders,
+        hash_index,
+        config_manager.get_duplicates_config().get("hash_algorithm", "blake2b"),
+        journal
+    )
+
+    file_queue = FileOperationQueue(workers=workers)
+    submitted = 0
+    for path, decision in read_decisions(decisions_file):
+        file_path = Path(path)
+        if not file_path.is_absolute():
+            file_path = Path(folder) / file_path
+        file_queue.submit(file_handler, file_path, resolve_action(config_manager, decision))
+        submitted += 1
+    file_queue.shutdown()
+
+    failures = []
+    while not file_queue.results.empty():
+        file_path, _, success, message = file_queue.results.get()
+        if not success:
+            failures.append((file_path, message))
+    if hash_index:
+        hash_index.close()
+    if journal:
+        journal.close()
+    return submitted, failures
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("folder", help="Folder the decision paths are relative to")
+    parser.add_argument("decisions", help="Decisions file (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of parallel file operations (default: 4)")
+    parser.add_argument("--subfolders", action=argparse.BooleanOptionalAction, default=None,
+                        help="Move into folders at the top level, as with Search Subfolders, or with "
+                             "--no-subfolders next to each image (default: from config.json)")
+    args = parser.parse_args()
+
+    if not Path(args.folder).is_dir():
+        print(f"Error: Folder '{args.folder}' does not exist.")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    processed, failures = replay_decisions(args.folder, args.decisions, args.workers, args.subfolders)
+    elapsed = time.perf_counter() - start
+
+    for file_path, message in failures:
+        print(message)
+    rate = processed / elapsed if elapsed > 0 else 0
+    print(f"Processed {processed} decision(s) in {elapsed:.1f}s ({rate:.0f} files/s), {len(failures)} failed.")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
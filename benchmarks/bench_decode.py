@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark full-resolution decode + LANCZOS against the scaled decode path
+used by load_current_image.
+
+Samples are generated and each mode is run in its own subprocess, so the
+peak RSS of one step does not leak into the next.
+
+Usage: python -m benchmarks.bench_decode [--size 6000x4000] [--target 1180x680]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from image_decoder import decode_scaled, fit_size
+
+
+FORMATS = {"jpeg": ".jpg", "jpeg2000": ".jp2", "tiff": ".tif", "png": ".png"}
+
+
+def make_sample(path, size):
+    """Write a noisy RGB image so encoders can't collapse it to nothing"""
+    channels = [Image.effect_noise(size, 64 + 32 * i) for i in range(3)]
+    Image.merge("RGB", channels).save(path)
+
+
+def decode_full(file_path, target_size):
+    with Image.open(file_path) as image:
+        return image.resize(fit_size(image.size, target_size), Image.Resampling.LANCZOS)
+
+
+def peak_rss_mb():
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(mode, file_path, target_size, repeat):
+    decode = decode_scaled if mode == "scaled" else decode_full
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(file_path, target_size)
+        timings.append(time.perf_counter() - start)
+    print(json.dumps({
+        "mode": mode,
+        "best_ms": round(min(timings) * 1000, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }))
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=parse_size, default=(6000, 4000))
+    parser.add_argument("--target", type=parse_size, default=(1180, 680))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "FILE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child and args.child[0] == "make":
+        make_sample(args.child[1], args.size)
+        return
+    if args.child:
+        run_one(args.child[0], args.child[1], args.target, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.formats.split(","):
+            sample = Path(tmp) / f"sample{FORMATS[name]}"
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_decode",
+                 "--size", f"{args.size[0]}x{args.size[1]}", "--child", "make", str(sample)],
+                check=True
+            )
+            print(f"{name} {args.size[0]}x{args.size[1]} -> fit {args.target[0]}x{args.target[1]}")
+            for mode in ("full", "scaled"):
+                result = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_decode",
+                     "--target", f"{args.target[0]}x{args.target[1]}",
+                     "--repeat", str(args.repeat), "--child", mode, str(sample)],
+                    capture_output=True, text=True, check=True
+                )
+                stats = json.loads(result.stdout)
+                print(f"  {mode:<7} {stats['best_ms']:>8} ms  peak RSS {stats['peak_rss_mb']:>7} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark flattening a collision-heavy tree into its root folder.
+
+Every subfolder holds the same IMG_0001.jpg ... names, so each move collides
+with all earlier ones. The legacy loop probes `_1`, `_2`, ... with exists()
+for every file; the planned engine allocates names in memory.
+
+Usage: python -m benchmarks.bench_flatten [--folders 50] [--files 100]
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from bulk_move import execute_plan, plan_bulk_move
+
+
+EXTENSIONS = {".jpg"}
+
+
+def make_tree(root, folders, files):
+    for folder in range(folders):
+        directory = Path(root) / f"card_{folder:03d}"
+        directory.mkdir(parents=True)
+        for index in range(files):
+            (directory / f"IMG_{index:04d}.jpg").write_bytes(b"")
+
+
+def legacy_flatten(root):
+    """The walk-and-probe loop FileHandler.move_images_to_main_folder used before the planned engine"""
+    root = Path(root)
+    for dirpath, _, filenames in os.walk(root, topdown=False):
+        current_dir = Path(dirpath)
+        if current_dir == root:
+            continue
+        for filename in filenames:
+            if Path(filename).suffix.lower() in EXTENSIONS:
+                destination = root / filename
+                if destination.exists():
+                    base_name = destination.stem
+                    extension = destination.suffix
+                    counter = 1
+                    while destination.exists():
+                        destination = root / f"{base_name}_{counter}{extension}"
+                        counter += 1
+                shutil.move(str(current_dir / filename), str(destination))
+        if not any(current_dir.iterdir()):
+            current_dir.rmdir()
+
+
+def planned_flatten(root, workers):
+    plan = plan_bulk_move(root, EXTENSIONS, lambda directory: Path(root))
+    execute_plan(plan, workers)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folders", type=int, default=50)
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    total = args.folders * args.files
+    print(f"{args.folders} folders x {args.files} colliding names = {total} files")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, function, extra in (("legacy", legacy_flatten, ()), ("planned", planned_flatten, (args.workers,))):
+            root = Path(tmp) / name
+            make_tree(root, args.folders, args.files)
+            elapsed = timed(function, root, *extra)
+            moved = sum(1 for entry in os.scandir(root) if entry.is_file())
+            print(f"  {name:<8} {elapsed:8.3f} s  ({moved} files in root)")
+
+
+if __name__ == "__main__":
+    main()
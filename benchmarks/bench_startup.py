@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark startup: import cost of each entry point and cold start to the
+first image painted.
+
+Every measurement runs in a fresh interpreter. Import times come from
+`python -X importtime`; the report also lists which heavy modules an import
+pulled in, so a GUI or imaging dependency creeping into the core shows up
+even when it is cheap on this machine. The first-paint run starts the GUI on
+a one-image folder from an empty working directory and cache, and is skipped
+when there is no display.
+
+Usage: python -m benchmarks.bench_startup [--repeat 5] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = ["config_manager", "file_handler", "flatten_images", "batch_sort", "main", "image_sorter"]
+
+# Modules the core should only load on first use
+HEAVY_MODULES = ["tkinter", "PIL", "numpy", "send2trash", "sqlite3"]
+
+
+def import_time(module):
+    """Cumulative import time of module in microseconds, and the heavy modules it loaded"""
+    code = (f"import sys, json, {module}; "
+            f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    cumulative = None
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1])
+    return cumulative, json.loads(result.stdout)
+
+
+def has_display():
+    if sys.platform.startswith("linux"):
+        return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+    return True
+
+
+def first_paint(folder, started):
+    """Child side: run the GUI until the first image is painted, then print the elapsed time"""
+    from image_sorter import ImageSorter
+
+    show_image = ImageSorter.show_image
+
+    def timed_show_image(self, image):
+        show_image(self, image)
+        self.root.update_idletasks()
+        print(json.dumps({"first_paint_ms": round((time.monotonic() - started) * 1000, 1)}), flush=True)
+        self.root.after(0, self.root.destroy)
+
+    ImageSorter.show_image = timed_show_image
+    ImageSorter(folder).run()
+
+
+def measure_first_paint(sample):
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp) / "images"
+        folder.mkdir()
+        (folder / sample.name).write_bytes(sample.read_bytes())
+        env = dict(os.environ, XDG_CACHE_HOME=str(Path(tmp) / "cache"), PYTHONPATH=str(REPO_ROOT))
+        # time.monotonic is system-wide, so the child can measure from the parent's start
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child", str(folder), str(started)],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True
+        )
+    for line in result.stdout.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)["first_paint_ms"]
+    return None
+
+
+def make_sample(path):
+    from PIL import Image
+    channels = [Image.effect_noise((4000, 3000), 64 + 32 * i) for i in range(3)]
+    Image.merge("RGB", channels).save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--modules", default=",".join(MODULES))
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    parser.add_argument("--child", nargs=2, metavar=("FOLDER", "STARTED"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        first_paint(args.child[0], float(args.child[1]))
+        return
+
+    results = {"imports": {}, "first_paint_ms": None}
+    print(f"import (best of {args.repeat})")
+    for module in args.modules.split(","):
+        timings = []
+        for _ in range(args.repeat):
+            cumulative, heavy = import_time(module)
+            timings.append(cumulative)
+        best_ms = round(min(timings) / 1000, 1)
+        results["imports"][module] = {"best_ms": best_ms, "heavy_modules": heavy}
+        print(f"  {module:<15} {best_ms:>7} ms  {', '.join(heavy) or '-'}")
+
+    if has_display():
+        with tempfile.TemporaryDirectory() as tmp:
+            sample = Path(tmp) / "sample.jpg"
+            make_sample(sample)
+            paints = [measure_first_paint(sample) for _ in range(args.repeat)]
+        paints = [paint for paint in paints if paint is not None]
+        if paints:
+            results["first_paint_ms"] = min(paints)
+            print(f"cold start to first image painted: {results['first_paint_ms']} ms")
+    else:
+        print("No display; skipping cold start to first image painted")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
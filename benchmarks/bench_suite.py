@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark the file operations, headless decoding and metadata reads on a synthetic tree.
+
+One tree is generated per run (see benchmarks.synthetic_tree) and every
+benchmark that changes the tree gets a fresh hard-linked copy of it. Each
+timed run happens in its own subprocess, so caches and peak RSS don't carry
+over, and trashed files go to a trash folder inside the temporary directory
+rather than the user's. Results are written as JSON, tagged with the commit,
+and --compare prints the change against an earlier results file.
+
+Usage: python -m benchmarks.bench_suite [--json results.json] [--compare old.json] [--files 500]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic_tree import add_tree_arguments, clone_tree, generate_tree, plan_from_args
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DISPLAY_SIZE = (1180, 680)
+
+
+def peak_rss_mb():
+    import resource
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def check(result):
+    success, message = result
+    if not success:
+        raise RuntimeError(message)
+    return message
+
+
+def bench_get_image_files(root, workers):
+    from file_handler import FileHandler
+    handler = FileHandler(root, search_subfolders=True)
+    start = time.perf_counter()
+    files = handler.get_image_files()
+    return time.perf_counter() - start, {"files": len(files)}
+
+
+def bench_find_duplicate_images(root, workers):
+    from file_handler import FileHandler
+    handler = FileHandler(root)
+    start = time.perf_counter()
+    duplicates, total = handler.find_duplicate_images(workers=workers)
+    elapsed = time.perf_counter() - start
+    if duplicates is None:
+        raise RuntimeError(total)
+    return elapsed, {"groups": len(duplicates), "stats": handler.scan_stats}
+
+
+def bench_remove_duplicates(root, workers):
+    from file_handler import FileHandler
+    handler = FileHandler(root)
+    duplicates, total = handler.find_duplicate_images(workers=workers)
+    if duplicates is None:
+        raise RuntimeError(total)
+    start = time.perf_counter()
+    message = check(handler.remove_duplicates(duplicates, ["Main Folder"]))
+    return time.perf_counter() - start, {"message": message}
+
+
+def bench_move_images_to_main_folder(root, workers):
+    from file_handler import FileHandler
+    handler = FileHandler(root)
+    start = time.perf_counter()
+    message = check(handler.move_images_to_main_folder(workers))
+    return time.perf_counter() - start, {"message": message}
+
+
+def bench_remove_empty_subfolders(root, workers):
+    from file_handler import FileHandler
+    handler = FileHandler(root)
+    start = time.perf_counter()
+    message = check(handler.remove_empty_subfolders())
+    return time.perf_counter() - start, {"message": message.split(":")[0]}
+
+
+def bench_flatten(root, workers):
+    from flatten_images import move_images_from_subfolders
+    start = time.perf_counter()
+    # The script reports every move; printing is part of its cost but not of this output
+    with contextlib.redirect_stdout(io.StringIO()):
+        move_images_from_subfolders(root, workers=workers)
+    return time.perf_counter() - start, {}
+
+
+def bench_decode(root, workers):
+    from file_handler import FileHandler
+    from image_decoder import decode_scaled
+    files = FileHandler(root, search_subfolders=True).get_image_files()
+    start = time.perf_counter()
+    for file_path in files:
+        decode_scaled(file_path, DISPLAY_SIZE)
+    elapsed = time.perf_counter() - start
+    return elapsed, {"images": len(files), "ms_per_image": round(elapsed * 1000 / max(1, len(files)), 2)}
+
+
+def bench_metadata(root, workers):
+    from file_handler import FileHandler
+    from image_metadata import extract_metadata
+    files = FileHandler(root, search_subfolders=True).get_image_files()
+    start = time.perf_counter()
+    extract_metadata(files, workers=workers)
+    elapsed = time.perf_counter() - start
+    return elapsed, {"images": len(files), "us_per_image": round(elapsed * 1e6 / max(1, len(files)), 1)}
+
+
+# name -> (function, whether it changes the tree)
+BENCHMARKS = {
+    "get_image_files": (bench_get_image_files, False),
+    "find_duplicate_images": (bench_find_duplicate_images, False),
+    "remove_duplicates": (bench_remove_duplicates, True),
+    "move_images_to_main_folder": (bench_move_images_to_main_folder, True),
+    "remove_empty_subfolders": (bench_remove_empty_subfolders, True),
+    "flatten_images": (bench_flatten, True),
+    "decode_scaled": (bench_decode, False),
+    "extract_metadata": (bench_metadata, False),
+}
+
+
+def run_child(name, root, workers):
+    elapsed, extra = BENCHMARKS[name][0](root, workers)
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": round(peak_rss_mb(), 1), **extra}))
+
+
+def run_benchmark(name, template, scratch, workers, repeat):
+    changes_tree = BENCHMARKS[name][1]
+    runs = []
+    for attempt in range(repeat):
+        root = template
+        if changes_tree:
+            root = scratch / f"{name}_{attempt}"
+            clone_tree(template, root)
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_suite", "--workers", str(workers), "--child", name, str(root)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+            # send2trash puts the home trash under XDG_DATA_HOME; keep it in the scratch folder
+            env=dict(os.environ, XDG_DATA_HOME=str(scratch / "data")),
+        )
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+
+    seconds = [run.pop("seconds") for run in runs]
+    summary = {
+        "runs_s": [round(value, 4) for value in seconds],
+        "best_s": round(min(seconds), 4),
+        "median_s": round(statistics.median(seconds), 4),
+    }
+    summary.update(runs[-1])
+    summary["peak_rss_mb"] = max(run["peak_rss_mb"] for run in runs)
+    return summary
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def print_comparison(previous, results):
+    print(f"compared with {previous.get('commit') or 'unknown commit'}")
+    if previous.get("tree_options") != results["tree_options"]:
+        print("  warning: the trees were generated with different options")
+    for name, summary in results["benchmarks"].items():
+        old = previous.get("benchmarks", {}).get(name)
+        if not old:
+            continue
+        change = (summary["best_s"] - old["best_s"]) / old["best_s"] * 100 if old["best_s"] else 0.0
+        print(f"  {name:<27} {old['best_s']:>9.4f} s -> {summary['best_s']:>9.4f} s  {change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="comma-separated subset to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=4, help="threads for hashing and moves")
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--child", nargs=2, metavar=("NAME", "ROOT"), help=argparse.SUPPRESS)
+    add_tree_arguments(parser)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], Path(args.child[1]), args.workers)
+        return
+
+    names = args.benchmarks.split(",")
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}, expected one of {', '.join(BENCHMARKS)}")
+
+    plan = plan_from_args(args)
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tree_options": plan["options"],
+        "benchmarks": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        template = Path(tmp) / "template"
+        (Path(tmp) / "data").mkdir()
+        print(f"Generating {args.files} images...")
+        results["tree"] = generate_tree(template, plan)
+        print(f"  {results['tree']['files']} files, {results['tree']['bytes'] / (1024 * 1024):.1f} MB, "
+              f"{results['tree']['duplicates']} duplicates, {results['tree']['colliding_files']} colliding names")
+
+        for name in names:
+            summary = run_benchmark(name, template, Path(tmp), args.workers, args.repeat)
+            results["benchmarks"][name] = summary
+            print(f"  {name:<27} best {summary['best_s']:>9.4f} s  median {summary['median_s']:>9.4f} s  "
+                  f"peak RSS {summary['peak_rss_mb']:>7} MB")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        print_comparison(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == "__main__":
+    main()
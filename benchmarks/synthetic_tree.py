@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic image trees for benchmarks.
+
+A tree is planned from a seed, so the same options give the same folders,
+names and bytes every time (for a given Pillow version). Payloads are real
+JPEG, PNG, TIFF and GIF files: smooth noise upscaled from a small random
+image, which compresses roughly like a photo. Options:
+
+- depth and fanout: folders nested `depth` levels deep, `fanout` per folder
+- files and sizes: how many images, and a weighted choice of dimensions
+- duplicate ratio: share of files that are byte-for-byte copies of another
+- collision ratio: share of files named by a per-folder camera counter
+  (IMG_0001, IMG_0002, ...), so the same names recur in every folder
+- empty dirs: empty nested folders scattered through the tree
+
+Usage: python -m benchmarks.synthetic_tree ROOT [--files 500] [--depth 3] [--seed 0]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+
+FORMATS = {"jpeg": ".jpg", "png": ".png", "tiff": ".tif", "gif": ".gif"}
+
+DEFAULT_SIZES = "640x480:6,1920x1080:3,4000x3000:1"
+DEFAULT_FORMATS = "jpeg:6,png:2,tiff:1,gif:1"
+
+# Payloads are upscaled from random images this many times smaller
+NOISE_SCALE = 16
+
+JPEG_QUALITY = 90
+
+
+def parse_weighted(text, parse_value=str):
+    """'a:3,b:1' -> ([a, b], [3, 1]); a missing weight counts as 1"""
+    values = []
+    weights = []
+    for item in text.split(","):
+        value, _, weight = item.partition(":")
+        values.append(parse_value(value.strip()))
+        weights.append(float(weight) if weight else 1.0)
+    return values, weights
+
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def plan_tree(files=500, depth=3, fanout=3, sizes=DEFAULT_SIZES, formats=DEFAULT_FORMATS,
+              duplicate_ratio=0.1, collision_ratio=0.2, empty_dirs=5, seed=0):
+    """Lay out a tree without writing anything; returns a JSON-serializable plan"""
+    rng = random.Random(seed)
+    size_choices, size_weights = parse_weighted(sizes, parse_size)
+    format_choices, format_weights = parse_weighted(formats)
+    for name in format_choices:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown format {name!r}, expected one of {', '.join(FORMATS)}")
+
+    directories = [""]
+    level = [""]
+    for _ in range(depth):
+        level = [os.path.join(parent, f"folder_{index:02d}") for parent in level for index in range(fanout)]
+        directories.extend(level)
+
+    duplicates = round(files * duplicate_ratio)
+    originals = files - duplicates
+    if originals < 1 and files:
+        raise ValueError("A duplicate ratio of 1 leaves nothing to duplicate")
+
+    taken = set()
+    counters = defaultdict(int)
+
+    def allocate_name(directory, index, extension):
+        if rng.random() < collision_ratio:
+            # Camera counters restart on every card, so these names recur across folders
+            while True:
+                counters[directory] += 1
+                name = f"IMG_{counters[directory]:04d}{extension}"
+                if os.path.join(directory, name) not in taken:
+                    break
+        else:
+            name = f"image_{index:06d}{extension}"
+        path = os.path.join(directory, name)
+        taken.add(path)
+        return path
+
+    planned = []
+    for index in range(originals):
+        format_name = rng.choices(format_choices, format_weights)[0]
+        planned.append({
+            "path": allocate_name(rng.choice(directories), index, FORMATS[format_name]),
+            "format": format_name,
+            "size": list(rng.choices(size_choices, size_weights)[0]),
+            "duplicate_of": None,
+        })
+    for index in range(originals, files):
+        source = rng.choice(planned[:originals])
+        planned.append({
+            "path": allocate_name(rng.choice(directories), index, FORMATS[source["format"]]),
+            "format": source["format"],
+            "size": source["size"],
+            "duplicate_of": source["path"],
+        })
+
+    empty = []
+    for index in range(empty_dirs):
+        # Nested a level or two below an existing folder, so removal has to work bottom-up
+        path = os.path.join(rng.choice(directories), f"empty_{index:02d}")
+        if rng.random() < 0.5:
+            path = os.path.join(path, "nested")
+        empty.append(path)
+
+    return {
+        "options": {
+            "files": files, "depth": depth, "fanout": fanout, "sizes": sizes, "formats": formats,
+            "duplicate_ratio": duplicate_ratio, "collision_ratio": collision_ratio,
+            "empty_dirs": empty_dirs, "seed": seed,
+        },
+        "directories": directories,
+        "empty_directories": empty,
+        "files": planned,
+    }
+
+
+def render_image(path, size, format_name, key):
+    """Write one payload; key seeds the pixels, so it decides the exact bytes"""
+    from PIL import Image
+
+    rng = random.Random(key)
+    width, height = size
+    small_size = (max(1, width // NOISE_SCALE), max(1, height // NOISE_SCALE))
+    small = Image.frombytes("RGB", small_size, rng.randbytes(small_size[0] * small_size[1] * 3))
+    image = small.resize((width, height), Image.Resampling.BICUBIC)
+
+    if format_name == "jpeg":
+        image.save(path, "JPEG", quality=JPEG_QUALITY)
+    elif format_name == "gif":
+        image.convert("P", palette=Image.Palette.WEB, dither=Image.Dither.NONE).save(path, "GIF")
+    else:
+        image.save(path, format_name.upper())
+    return os.path.getsize(path)
+
+
+def generate_tree(root, plan, workers=None):
+    """Write a planned tree under root; returns a summary of what was written"""
+    root = Path(root)
+    seed = plan["options"]["seed"]
+    for directory in plan["directories"] + plan["empty_directories"]:
+        (root / directory).mkdir(parents=True, exist_ok=True)
+
+    originals = [entry for entry in plan["files"] if entry["duplicate_of"] is None]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        sizes = list(executor.map(
+            render_image,
+            [str(root / entry["path"]) for entry in originals],
+            [entry["size"] for entry in originals],
+            [entry["format"] for entry in originals],
+            [f"{seed}:{entry['path']}" for entry in originals],
+        ))
+    total_bytes = sum(sizes)
+    size_of = {entry["path"]: size for entry, size in zip(originals, sizes)}
+    for entry in plan["files"]:
+        if entry["duplicate_of"] is not None:
+            shutil.copyfile(root / entry["duplicate_of"], root / entry["path"])
+            total_bytes += size_of[entry["duplicate_of"]]
+
+    names = Counter(os.path.basename(entry["path"]) for entry in plan["files"])
+    return {
+        "files": len(plan["files"]),
+        "bytes": total_bytes,
+        "directories": len(plan["directories"]),
+        "empty_directories": len(plan["empty_directories"]),
+        "duplicates": len(plan["files"]) - len(originals),
+        "colliding_files": sum(count for count in names.values() if count > 1),
+        "formats": dict(Counter(entry["format"] for entry in plan["files"])),
+    }
+
+
+def clone_tree(source, destination):
+    """Copy a generated tree for a destructive benchmark, hard-linking files where possible
+
+    Benchmarks only rename, trash and delete files, never write to them, so
+    links are as good as copies and much faster to make.
+    """
+    def link_or_copy(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    shutil.copytree(source, destination, copy_function=link_or_copy)
+
+
+def add_tree_arguments(parser):
+    group = parser.add_argument_group("synthetic tree")
+    group.add_argument("--files", type=int, default=500)
+    group.add_argument("--depth", type=int, default=3)
+    group.add_argument("--fanout", type=int, default=3)
+    group.add_argument("--sizes", default=DEFAULT_SIZES, help="weighted WIDTHxHEIGHT:WEIGHT list")
+    group.add_argument("--formats", default=DEFAULT_FORMATS, help=f"weighted FORMAT:WEIGHT list of {', '.join(FORMATS)}")
+    group.add_argument("--duplicate-ratio", type=float, default=0.1)
+    group.add_argument("--collision-ratio", type=float, default=0.2)
+    group.add_argument("--empty-dirs", type=int, default=5)
+    group.add_argument("--seed", type=int, default=0)
+
+
+def plan_from_args(args):
+    return plan_tree(args.files, args.depth, args.fanout, args.sizes, args.formats,
+                     args.duplicate_ratio, args.collision_ratio, args.empty_dirs, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("root", type=Path, help="folder to create the tree in (must not exist)")
+    parser.add_argument("--workers", type=int, default=None, help="processes encoding payloads")
+    add_tree_arguments(parser)
+    args = parser.parse_args()
+
+    if args.root.exists():
+        parser.error(f"{args.root} already exists")
+    summary = generate_tree(args.root, plan_from_args(args), args.workers)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Planned bulk moves for flattening folder trees.
+
+A plan is built before anything is touched: every image gets its final
+destination name up front, using an in-memory set of taken names per
+destination folder and a next-free-suffix counter per name, so thousands of
+IMG_0001.jpg collisions don't re-probe the disk for each `_n`. The plan can
+be printed as a dry run or executed on a thread pool. A file that takes a
+planned name before its move runs makes that move fail rather than being
+overwritten.
+"""
+
+import errno
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from image_scanner import walk_tree
+
+
+# Errors meaning the filesystem can't hardlink, rather than that the move can't happen
+LINK_UNSUPPORTED = {errno.EPERM, errno.EACCES, errno.EMLINK, errno.ENOTSUP, errno.EOPNOTSUPP, errno.ENOSYS}
+
+
+def move_file(source, destination):
+    """Move a file without ever replacing one at the destination (FileExistsError instead)
+
+    os.rename silently replaces an existing file on POSIX, and plans name
+    their destinations well before the moves run. A hardlink fails if the
+    name is taken, so the file is linked at its new name and then unlinked
+    from the old one. Filesystems without hardlinks are renamed into a
+    name checked just before; moves across devices copy into a file
+    created exclusively.
+    """
+    try:
+        os.link(source, destination, follow_symlinks=False)
+    except (OSError, NotImplementedError) as e:
+        if isinstance(e, FileExistsError):
+            raise
+        if getattr(e, "errno", None) == errno.EXDEV:
+            _copy_exclusive(source, destination)
+            os.remove(source)
+            return
+        if isinstance(e, OSError) and e.errno not in LINK_UNSUPPORTED:
+            raise
+        if os.path.lexists(destination):
+            raise FileExistsError(errno.EEXIST, "Destination already exists", str(destination))
+        os.rename(source, destination)
+        return
+    try:
+        os.remove(source)
+    except OSError:
+        # Leave the file where it was rather than under two names
+        os.remove(destination)
+        raise
+
+
+def _copy_exclusive(source, destination):
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        try:
+            shutil.copyfileobj(src, dst)
+        except BaseException:
+            dst.close()
+            os.remove(destination)
+            raise
+    shutil.copystat(source, destination)
+
+
+class MovePlan:
+    def __init__(self, root):
+        self.root = Path(root)
+        # (source, destination) pairs, in walk order
+        self.moves = []
+        # Directories that will be empty once every move succeeds, deepest first
+        self.empty_directories = []
+        # Directories that lose images but keep other files
+        self.partial_directories = []
+
+    def _relative(self, path):
+        try:
+            return path.relative_to(self.root)
+        except ValueError:
+            return path
+
+    def describe(self):
+        """Dry-run listing of what execute_plan would do"""
+        lines = [f"Move: {self._relative(source)} -> {self._relative(destination)}" for source, destination in self.moves]
+        lines += [f"Remove empty folder: {self._relative(directory)}" for directory in self.empty_directories]
+        return lines
+
+
+class MoveResult:
+    def __init__(self):
+        self.moved = []
+        self.errors = []
+        self.removed_directories = []
+
+
+class _NameAllocator:
+    """Hands out free file names per destination folder without touching the disk again"""
+
+    def __init__(self):
+        self._taken = {}
+        self._next_suffix = {}
+
+    def _taken_names(self, folder):
+        taken = self._taken.get(folder)
+        if taken is None:
+            try:
+                with os.scandir(folder) as it:
+                    taken = {os.path.normcase(entry.name) for entry in it}
+            except OSError:
+                taken = set()
+            self._taken[folder] = taken
+        return taken
+
+    def allocate(self, folder, name):
+        taken = self._taken_names(folder)
+        candidate = name
+        if os.path.normcase(candidate) in taken:
+            stem, suffix = os.path.splitext(name)
+            key = (folder, os.path.normcase(stem), os.path.normcase(suffix))
+            counter = self._next_suffix.get(key, 1)
+            candidate = f"{stem}_{counter}{suffix}"
+            while os.path.normcase(candidate) in taken:
+                counter += 1
+                candidate = f"{stem}_{counter}{suffix}"
+            self._next_suffix[key] = counter + 1
+        taken.add(os.path.normcase(candidate))
+        return folder / candidate
+
+
+def plan_bulk_move(root, extensions, destination_for):
+    """Plan moving every image below root into destination_for(directory)
+
+    Subdirectories are processed deepest first and images in root itself
+    stay where they are. Names already present in a destination, or handed
+    out earlier in the plan, get `_1`, `_2`, ... suffixes.
+    """
+    root = Path(root)
+    plan = MovePlan(root)
+    names = _NameAllocator()
+    emptied = set()
+    receiving = set()
+
+    for directory, files, subdirectories in walk_tree(root, topdown=False):
+        if directory == root:
+            continue
+        destination = destination_for(directory)
+        remaining = 0
+        for entry in files:
+            if os.path.splitext(entry.name)[1].lower() in extensions:
+                plan.moves.append((Path(entry.path), names.allocate(destination, entry.name)))
+                receiving.add(destination)
+            else:
+                remaining += 1
+
+        moved_any = remaining < len(files)
+        # Images moved in from subdirectories stay here
+        if not remaining and emptied.issuperset(subdirectories) and directory not in receiving:
+            emptied.add(directory)
+            plan.empty_directories.append(directory)
+        elif moved_any:
+            plan.partial_directories.append(directory)
+    return plan
+
+
+def execute_plan(plan, workers=4, on_moved=None):
+    """Run a plan's moves on a bounded thread pool, then remove the emptied directories
+
+    Every destination name in a plan is unique, so moves can run in any
+    order; a name another file took since planning fails its move instead
+    of being replaced. on_moved(source, destination) is called from worker
+    threads.
+    """
+    result = MoveResult()
+
+    def run(move):
+        source, destination = move
+        try:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            move_file(source, destination)
+        except Exception as e:
+            return source, destination, e
+        if on_moved is not None:
+            on_moved(source, destination)
+        return source, destination, None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bulk-move") as executor:
+        for source, destination, error in executor.map(run, plan.moves):
+            if error is None:
+                result.moved.append((source, destination))
+            else:
+                result.errors.append((source, error))
+
+    # Deepest first, so parents are only tried once their children are gone
+    for directory in plan.empty_directories:
+        try:
+            directory.rmdir()
+            result.removed_directories.append(directory)
+        except OSError:
+            # A move failed or something new appeared; leave it
+            continue
+    return result
@@ -0,0 +1,213 @@
+"""
+Batched trashing for mass deletions.
+
+send2trash trashes one file per call, and on freedesktop systems every call
+works out the trash directory, probes for a free name and writes a
+.trashinfo file before renaming. Here a batch is planned first: the trash
+directory is resolved once per filesystem and remembered for the process,
+free names come from one listing of each trash, and every info file is
+written before the renames start, so the renames can run on a thread pool.
+A rename that fails takes its info file with it. Every file's outcome is
+reported on its own.
+
+Windows and macOS, and files on filesystems without a usable trash, go
+through send2trash.
+"""
+
+import errno
+import os
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+
+INFO_SUFFIX = ".trashinfo"
+
+# send2trash's own platform code handles these
+FREEDESKTOP = os.name == "posix" and sys.platform != "darwin"
+
+# st_dev -> (trash directory, top directory for relative info paths or None), or None without a usable trash
+_trash_dirs = {}
+_trash_lock = threading.Lock()
+
+
+def _make_dirs(path):
+    # The spec asks for 0700 trash directories
+    os.makedirs(path, 0o700, exist_ok=True)
+
+
+def _mount_point(path):
+    path = os.path.realpath(path)
+    while not os.path.ismount(path):
+        path = os.path.dirname(path)
+    return path
+
+
+def _volume_trash(topdir):
+    """$topdir/.Trash/$uid when an administrator set one up, else $topdir/.Trash-$uid"""
+    uid = str(os.getuid())
+    shared = os.path.join(topdir, ".Trash")
+    try:
+        mode = os.lstat(shared).st_mode
+        # Must be a real directory with the sticky bit, not a symlink
+        if stat.S_ISDIR(mode) and mode & stat.S_ISVTX:
+            _make_dirs(os.path.join(shared, uid))
+            return os.path.join(shared, uid)
+    except OSError:
+        pass
+    trash_dir = os.path.join(topdir, ".Trash-" + uid)
+    _make_dirs(trash_dir)
+    return trash_dir
+
+
+def resolve_trash(path, device):
+    """Trash directory for a file on `device`, found once per filesystem"""
+    with _trash_lock:
+        if device in _trash_dirs:
+            return _trash_dirs[device]
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+        try:
+            if os.lstat(os.path.expanduser("~")).st_dev == device:
+                trash = (os.path.join(data_home, "Trash"), None)
+            else:
+                topdir = _mount_point(path)
+                trash = (_volume_trash(topdir), topdir) if os.lstat(topdir).st_dev == device else None
+            if trash is not None:
+                _make_dirs(os.path.join(trash[0], "files"))
+                _make_dirs(os.path.join(trash[0], "info"))
+        except OSError:
+            trash = None
+        _trash_dirs[device] = trash
+        return trash
+
+
+class _Names:
+    """Free names in one trash, from a single listing of its files and info directories"""
+
+    def __init__(self, trash_dir):
+        self.taken = set()
+        self._next_suffix = {}
+        for subdirectory, suffix in (("files", ""), ("info", INFO_SUFFIX)):
+            try:
+                with os.scandir(os.path.join(trash_dir, subdirectory)) as it:
+                    self.taken.update(entry.name[:len(entry.name) - len(suffix)] for entry in it
+                                      if entry.name.endswith(suffix))
+            except OSError:
+                continue
+
+    def allocate(self, name):
+        candidate = name
+        if candidate in self.taken:
+            stem, extension = os.path.splitext(name)
+            # Counting on from the last suffix handed out keeps thousands of IMG_0001.jpg linear
+            counter = self._next_suffix.get(name, 1)
+            # The same "name N.ext" scheme as send2trash, so either can follow the other
+            candidate = f"{stem} {counter}{extension}"
+            while candidate in self.taken:
+                counter += 1
+                candidate = f"{stem} {counter}{extension}"
+            self._next_suffix[name] = counter + 1
+        self.taken.add(candidate)
+        return candidate
+
+
+def _write_info(trash_dir, names, name, original, deletion_date):
+    """Reserve a trash name by creating its info file; returns the name used"""
+    content = f"[Trash Info]\nPath={quote(os.fsencode(original))}\nDeletionDate={deletion_date}\n".encode("utf-8")
+    while True:
+        trash_name = names.allocate(name)
+        try:
+            fd = os.open(os.path.join(trash_dir, "info", trash_name + INFO_SUFFIX),
+                         os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            # Another program trashed a file of this name since the listing
+            continue
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        return trash_name
+
+
+def _send2trash(path):
+    # Imported on first use; on macOS and Windows it loads platform bindings
+    from send2trash import send2trash
+    send2trash(str(path))
+
+
+def _trash_freedesktop(paths, workers):
+    errors = [None] * len(paths)
+    deletion_date = time.strftime("%Y-%m-%dT%H:%M:%S")
+    names = {}
+    renames = []
+    fallback = []
+
+    # Info files are written first, in one pass, so the renames can run in any order
+    for index, path in enumerate(paths):
+        try:
+            absolute = os.path.abspath(path)
+            trash = resolve_trash(absolute, os.lstat(absolute).st_dev)
+            if trash is None:
+                fallback.append(index)
+                continue
+            trash_dir, topdir = trash
+            if trash_dir not in names:
+                names[trash_dir] = _Names(trash_dir)
+            original = absolute
+            if topdir is not None and absolute.startswith(os.path.join(topdir, "")):
+                # Volume trashes store paths relative to the volume
+                original = os.path.relpath(absolute, topdir)
+            trash_name = _write_info(trash_dir, names[trash_dir], os.path.basename(absolute), original, deletion_date)
+            renames.append((index, absolute, trash_dir, trash_name))
+        except OSError as e:
+            errors[index] = e
+
+    def rename(item):
+        index, absolute, trash_dir, trash_name = item
+        try:
+            os.rename(absolute, os.path.join(trash_dir, "files", trash_name))
+            return index, None
+        except OSError as e:
+            try:
+                os.remove(os.path.join(trash_dir, "info", trash_name + INFO_SUFFIX))
+            except OSError:
+                pass
+            return index, e
+
+    if len(renames) == 1:
+        outcomes = [rename(renames[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="bulk-trash") as executor:
+            outcomes = list(executor.map(rename, renames))
+    for index, error in outcomes:
+        if error is not None and error.errno == errno.EXDEV:
+            # A bind mount or similar put the file on another device than it reported
+            fallback.append(index)
+        else:
+            errors[index] = error
+
+    for index in fallback:
+        try:
+            _send2trash(paths[index])
+        except Exception as e:
+            errors[index] = e
+    return errors
+
+
+def trash_files(paths, workers=4):
+    """Send paths to the trash; returns one exception, or None on success, per path in order"""
+    paths = list(paths)
+    if not paths:
+        return []
+    if FREEDESKTOP:
+        return _trash_freedesktop(paths, workers)
+
+    errors = []
+    for path in paths:
+        try:
+            _send2trash(path)
+            errors.append(None)
+        except Exception as e:
+            errors.append(e)
+    return errors
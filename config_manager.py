@@ -23,7 +23,61 @@ class ConfigManager:
                 "width": 1200,
                 "height": 800
             },
-            "search_subfolders": False
+            "search_subfolders": False,
+            "prefetch": {
+                "ahead": 3,
+                "behind": 1,
+                "workers": 2,
+                "cache_mb": 256
+            },
+            "file_operations": {
+                "workers": 2
+            },
+            "duplicates": {
+                "hash_algorithm": "blake2b",
+                "workers": 0,
+                "similarity_method": "phash",
+                "similarity_threshold": 6,
+                "link_mode": "auto"
+            },
+            "watch": {
+                "enabled": True,
+                "poll_seconds": 2.0
+            },
+            "preview_cache": {
+                "enabled": True,
+                "disk_mb": 1024,
+                "directory": ""
+            },
+            "grid": {
+                "thumbnail_size": 256,
+                "workers": 4,
+                "cache_mb": 128
+            },
+            "duplicate_review": {
+                "thumbnail_size": 128,
+                "workers": 4,
+                "cache_mb": 64
+            },
+            "session": {
+                "resume": True
+            },
+            "animation": {
+                "enabled": True,
+                "cache_mb": 128
+            },
+            "sort": {
+                "order": "path",
+                "workers": 0
+            },
+            "zoom": {
+                "workers": 2,
+                "cache_mb": 256
+            },
+            "metrics": {
+                "enabled": False,
+                "dump_on_exit": True
+            }
         }
     
     def load(self):
@@ -59,6 +113,58 @@ class ConfigManager:
     def get_window_config(self):
         return self.config["window"]
     
+    def get_prefetch_config(self):
+        return self.config.get("prefetch", self._load_default_config()["prefetch"])
+    
+    def get_file_operations_config(self):
+        return self.config.get("file_operations", self._load_default_config()["file_operations"])
+    
+    def get_duplicates_config(self):
+        return self.config.get("duplicates", self._load_default_config()["duplicates"])
+    
+    def get_watch_config(self):
+        return self.config.get("watch", self._load_default_config()["watch"])
+    
+    def get_preview_cache_config(self):
+        return self.config.get("preview_cache", self._load_default_config()["preview_cache"])
+    
+    def get_grid_config(self):
+        return self.config.get("grid", self._load_default_config()["grid"])
+    
+    def get_duplicate_review_config(self):
+        return self.config.get("duplicate_review", self._load_default_config()["duplicate_review"])
+    
+    def get_hash_index_path(self):
+        return self.config_file.with_name("hash_index.sqlite3")
+    
+    def get_journal_path(self):
+        return self.config_file.with_name("operations.journal")
+    
+    def get_session_config(self):
+        return self.config.get("session", self._load_default_config()["session"])
+    
+    def get_session_directory(self):
+        return self.config_file.with_name("sessions")
+    
+    def get_animation_config(self):
+        return self.config.get("animation", self._load_default_config()["animation"])
+    
+    def get_sort_config(self):
+        return self.config.get("sort", self._load_default_config()["sort"])
+    
+    def set_sort_order(self, order):
+        self.config["sort"] = dict(self.get_sort_config(), order=order)
+        self.save()
+    
+    def get_zoom_config(self):
+        return self.config.get("zoom", self._load_default_config()["zoom"])
+    
+    def get_metrics_config(self):
+        return self.config.get("metrics", self._load_default_config()["metrics"])
+    
+    def get_metrics_path(self):
+        return self.config_file.with_name("metrics.json")
+    
     def get_search_subfolders(self):
         return self.config.get("search_subfolders", False)
     
@@ -0,0 +1,284 @@
+"""
+Review of duplicate groups, one row of side-by-side thumbnails per group.
+
+Like the grid triage window, and through the same ThumbnailCells, only the
+rows on screen exist as canvas items, created once per size and recycled as
+the list scrolls, and thumbnails are decoded lazily on a thread pool into a
+bounded cache, with loads for rows that scrolled away cancelled before they
+start. A scan that found 20k
+groups costs no more widgets or thumbnail memory than one that found 20.
+
+Which copies a group keeps follows the folders chosen in the dialog until
+the group is given its own choice; those overrides are kept by group hash.
+"""
+
+import tkinter as tk
+from grid_view import CELL_PADDING, ThumbnailCells
+
+
+HEADER_HEIGHT = 20
+# Two lines under each thumbnail: file name and folder
+LABEL_HEIGHT = 28
+REVIEW_POLL_MS = 50
+WHEEL_ROWS = 1
+
+KEEP_COLOR = "#33aa33"
+REMOVE_COLOR = "#cc3333"
+FOCUS_COLOR = "#3399ff"
+
+
+class DuplicateReview:
+    """Virtualized list of duplicate groups inside `parent`, with per-group keep overrides
+
+    `keep_folders` returns the folders currently chosen in the dialog.
+    """
+
+    def __init__(self, parent, sorter, duplicates, keep_folders, thumbnail_size=128, workers=4, cache_mb=64):
+        self.file_handler = sorter.file_handler
+        self.groups = list(duplicates.items())
+        self.keep_folders = keep_folders
+        # Group hash -> set of copies to keep, for groups that don't follow the folder choice
+        self.overrides = {}
+        self.cell_width = thumbnail_size + 2 * CELL_PADDING
+        self.row_height = HEADER_HEIGHT + thumbnail_size + 2 * CELL_PADDING + LABEL_HEIGHT
+
+        self.top_group = 0
+        self.focus_group = 0
+        self.focus_file = 0
+        self.columns = 1
+        self.rows = 0
+        # Recycled header per visible row; the cells are recycled by ThumbnailCells
+        self.headers = []
+        self.message = ""
+        self.closed = False
+
+        self.status_label = tk.Label(parent, text="", font=("Arial", 9), fg="gray", anchor='w')
+        self.status_label.pack(side='bottom', fill='x', padx=5)
+        self.scrollbar = tk.Scrollbar(parent, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas = tk.Canvas(parent, bg="black", highlightthickness=1, takefocus=1)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.cells = ThumbnailCells(self.canvas, sorter, thumbnail_size, workers, cache_mb, "review-thumbnail")
+        self.focus_frame = self.canvas.create_rectangle(0, 0, 0, 0, outline=FOCUS_COLOR, width=3, state='hidden')
+
+        self.bind_keys()
+        self.canvas.focus_set()
+        self.canvas.after(REVIEW_POLL_MS, self.poll)
+
+    def bind_keys(self):
+        self.canvas.bind('<Up>', lambda e: self.move_focus(-1, 0))
+        self.canvas.bind('<Down>', lambda e: self.move_focus(1, 0))
+        self.canvas.bind('<Left>', lambda e: self.move_focus(0, -1))
+        self.canvas.bind('<Right>', lambda e: self.move_focus(0, 1))
+        self.canvas.bind('<Prior>', lambda e: self.move_focus(-max(1, self.full_rows() - 1), 0))
+        self.canvas.bind('<Next>', lambda e: self.move_focus(max(1, self.full_rows() - 1), 0))
+        self.canvas.bind('<Home>', lambda e: self.move_focus(-len(self.groups), 0))
+        self.canvas.bind('<End>', lambda e: self.move_focus(len(self.groups), 0))
+        self.canvas.bind('<space>', lambda e: self.toggle_keep())
+        self.canvas.bind('<k>', lambda e: self.keep_only())
+        self.canvas.bind('<r>', lambda e: self.reset_group())
+
+        self.canvas.bind('<Configure>', lambda e: self.layout())
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.bind('<MouseWheel>', lambda e: self.scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.canvas.bind('<Button-4>', lambda e: self.scroll(-WHEEL_ROWS))
+        self.canvas.bind('<Button-5>', lambda e: self.scroll(WHEEL_ROWS))
+        self.canvas.bind('<Destroy>', lambda e: self.shutdown())
+
+    def full_rows(self):
+        return max(1, self.canvas.winfo_height() // self.row_height)
+
+    def kept_files(self, index, folders=None):
+        """Copies group `index` keeps: its override, else those in the chosen folders"""
+        hash_val, files = self.groups[index]
+        if folders is None:
+            folders = self.keep_folders()
+        kept, _ = self.file_handler.split_duplicate_group(files, folders, self.overrides.get(hash_val))
+        return kept
+
+    def first_file(self, index):
+        """First copy shown for a group; the focused group scrolls sideways to its focused copy"""
+        if index != self.focus_group:
+            return 0
+        return max(0, self.focus_file - self.columns + 1)
+
+    def layout(self):
+        """Size the pools of recycled rows and cells to the canvas"""
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        self.columns = max(1, width // self.cell_width)
+        # One partially visible row at the bottom
+        self.rows = height // self.row_height + 1
+
+        while len(self.headers) < self.rows:
+            self.headers.append(self.canvas.create_text(0, 0, anchor='nw', fill="white", font=("Arial", 9, "bold")))
+        while len(self.cells) < self.rows * self.columns:
+            self.cells.add(REMOVE_COLOR)
+
+        # Cells are recycled row-major, so a new column count reassigns them all
+        for index in range(len(self.cells)):
+            self.cells.hide(index)
+        for row, header in enumerate(self.headers):
+            self.canvas.coords(header, CELL_PADDING, row * self.row_height + 3)
+            self.canvas.itemconfigure(header, state='hidden')
+        for index in range(self.rows * self.columns):
+            row, column = divmod(index, self.columns)
+            self.cells.place(index, column * self.cell_width, row * self.row_height + HEADER_HEIGHT,
+                             self.row_height - HEADER_HEIGHT)
+        self.render()
+
+    def render(self):
+        """Point the recycled rows at the groups now in view and request missing thumbnails"""
+        if self.closed:
+            return
+        self.top_group = max(0, min(self.top_group, len(self.groups) - self.full_rows()))
+        folders = self.keep_folders()
+        visible = set()
+        focus_coords = None
+
+        for row in range(self.rows):
+            header = self.headers[row]
+            group_index = self.top_group + row
+            if group_index >= len(self.groups):
+                self.canvas.itemconfigure(header, state='hidden')
+                files = ()
+                first = 0
+            else:
+                hash_val, files = self.groups[group_index]
+                kept = set(self.kept_files(group_index, folders))
+                first = self.first_file(group_index)
+                text = f"Group {group_index + 1} of {len(self.groups)}: keeping {len(kept)} of {len(files)} copies"
+                if hash_val in self.overrides:
+                    text += " (own choice)"
+                if len(files) > self.columns:
+                    text += f"   showing {first + 1}-{min(len(files), first + self.columns)}, ←→ for the rest"
+                self.canvas.itemconfigure(header, text=text, state='normal')
+
+            for column in range(self.columns):
+                index = row * self.columns + column
+                file_index = first + column if files else 0
+                if file_index >= len(files):
+                    self.cells.hide(index)
+                    continue
+
+                file_path = files[file_index]
+                visible.add(file_path)
+                if group_index == self.focus_group and file_index == self.focus_file:
+                    focus_coords = self.canvas.coords(self.cells.items[index][0])
+                text = (f"{self.cells.short_name(file_path.name)}\n"
+                        f"{self.cells.short_name(self.file_handler.folder_label(file_path))}")
+                self.cells.show(index, file_path, KEEP_COLOR if file_path in kept else REMOVE_COLOR, text)
+
+        if focus_coords:
+            self.canvas.coords(self.focus_frame, *focus_coords)
+            self.canvas.itemconfigure(self.focus_frame, state='normal')
+            self.canvas.tag_raise(self.focus_frame)
+        else:
+            self.canvas.itemconfigure(self.focus_frame, state='hidden')
+
+        self.cells.cancel_hidden(visible)
+
+        if self.groups:
+            self.scrollbar.set(self.top_group / len(self.groups),
+                               min(1.0, (self.top_group + self.full_rows()) / len(self.groups)))
+        else:
+            self.scrollbar.set(0, 1)
+        self.update_status()
+
+    def poll(self):
+        if self.closed:
+            return
+        if self.cells.collect():
+            self.render()
+        self.canvas.after(REVIEW_POLL_MS, self.poll)
+
+    def update_status(self):
+        if not self.groups:
+            self.status_label.config(text="No duplicate groups")
+            return
+        text = self.message or (f"{len(self.overrides)} groups with their own choice | ↑↓ groups, ←→ copies, "
+                                f"Space keep/remove, K keep only this, R back to folder choice")
+        self.status_label.config(text=text)
+
+    def scroll(self, rows):
+        self.top_group += rows
+        self.render()
+
+    def on_scrollbar(self, command, value, units=None):
+        if command == "moveto":
+            self.top_group = int(float(value) * len(self.groups))
+        elif command == "scroll":
+            step = self.full_rows() - 1 if units == "pages" else 1
+            self.top_group += int(value) * max(1, step)
+        self.render()
+
+    def move_focus(self, groups, files):
+        """Move the focus by groups and copies, scrolling it into view"""
+        if not self.groups:
+            return
+        if groups:
+            self.focus_group = max(0, min(self.focus_group + groups, len(self.groups) - 1))
+            self.focus_file = 0
+        count = len(self.groups[self.focus_group][1])
+        self.focus_file = max(0, min(self.focus_file + files, count - 1))
+        if self.focus_group < self.top_group:
+            self.top_group = self.focus_group
+        elif self.focus_group >= self.top_group + self.full_rows():
+            self.top_group = self.focus_group - self.full_rows() + 1
+        self.message = ""
+        self.render()
+
+    def set_kept(self, kept):
+        """Give the focused group its own choice, or drop it if it matches the folder choice"""
+        hash_val, files = self.groups[self.focus_group]
+        self.overrides.pop(hash_val, None)
+        if set(kept) != set(self.kept_files(self.focus_group)):
+            self.overrides[hash_val] = set(kept)
+        self.message = ""
+        self.render()
+
+    def toggle_keep(self):
+        if not self.groups:
+            return
+        file_path = self.groups[self.focus_group][1][self.focus_file]
+        kept = set(self.kept_files(self.focus_group))
+        if file_path not in kept:
+            kept.add(file_path)
+        elif len(kept) == 1:
+            self.message = "Every group keeps at least one copy"
+            self.update_status()
+            return
+        else:
+            kept.remove(file_path)
+        self.set_kept(kept)
+
+    def keep_only(self):
+        if self.groups:
+            self.set_kept({self.groups[self.focus_group][1][self.focus_file]})
+
+    def reset_group(self):
+        if self.groups:
+            self.overrides.pop(self.groups[self.focus_group][0], None)
+            self.message = ""
+            self.render()
+
+    def on_click(self, event):
+        """Clicking a copy focuses it and toggles whether it is kept"""
+        self.canvas.focus_set()
+        row = int(event.y // self.row_height)
+        column = int(event.x // self.cell_width)
+        group_index = self.top_group + row
+        if column >= self.columns or group_index >= len(self.groups) or event.y % self.row_height < HEADER_HEIGHT:
+            return
+        file_index = self.first_file(group_index) + column
+        if file_index >= len(self.groups[group_index][1]):
+            return
+        self.focus_group = group_index
+        self.focus_file = file_index
+        self.toggle_keep()
+
+    def shutdown(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.cells.shutdown()
@@ -1,39 +1,112 @@
 import os
 import shutil
 import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from send2trash import send2trash
 from collections import defaultdict
+from bulk_move import execute_plan, plan_bulk_move
+from bulk_trash import trash_files
+from hash_index import HashIndex
+from image_metadata import sort_image_files
+from image_scanner import iter_image_files, walk_tree
+from link_dedup import link_groups
+
+
+# Hash rows are written to the index in batches so an interrupted scan keeps its progress
+HASH_INDEX_BATCH = 1000
+
+# Bytes hashed from each end of a file before deciding whether it needs a full hash
+PARTIAL_HASH_BLOCK = 64 * 1024
+
+HASH_READ_SIZE = 1024 * 1024
+
+
+# Minimum seconds between progress events sent while hashing
+PROGRESS_INTERVAL = 0.1
+
+# Thumbnails decoded and hashed together in one NumPy batch
+PERCEPTUAL_BATCH_SIZE = 256
+
+# Failed files named in a message; the console gets all of them
+FAILURES_SHOWN = 5
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+def is_rotational(path):
+    """True if path lives on a spinning disk, None if that can't be determined (non-Linux)"""
+    try:
+        device = os.stat(path).st_dev
+        sys_dir = Path(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}").resolve()
+        # Partitions have no queue/ directory of their own, their parent disk does
+        for candidate in (sys_dir, sys_dir.parent):
+            flag = candidate / "queue" / "rotational"
+            if flag.exists():
+                return flag.read_text().strip() == "1"
+    except (OSError, AttributeError):
+        pass
+    return None
+
+
+def default_hash_workers(path):
+    """Hashing threads for a folder: one on spinning disks, where parallel reads only add seeks"""
+    if is_rotational(path):
+        return 1
+    return min(8, os.cpu_count() or 1)
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
 
 
 class FileHandler:
-    def __init__(self, source_folder, search_subfolders=False):
+    def __init__(self, source_folder, search_subfolders=False, hash_index=None, hash_algorithm="blake2b", journal=None):
         self.source_folder = Path(source_folder)
         self.search_subfolders = search_subfolders
+        self.hash_index = hash_index
+        self.journal = journal
+        self.hash_algorithm = hash_algorithm
+        self.scan_stats = {}
+        # Where this handler moved files to, so a scan still running can leave them out
+        self.moved_to = set()
         self.image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif'}
         
-    def get_image_files(self):
-        image_files = []
+    def iter_image_files(self, cancel_event=None, directories=None):
+        """Yield image files as the scan finds them, already in sorted order"""
+        return iter_image_files(self.source_folder, self.image_extensions, self.search_subfolders, cancel_event, directories)
+    
+    def get_image_files(self, sort_order="path", workers=None):
+        """Image files in a sort order from image_metadata.SORT_ORDERS (default: by path)"""
+        files = list(self.iter_image_files())
+        if sort_order == "path":
+            return files
+        if workers is None:
+            workers = default_hash_workers(self.source_folder)
+        return sort_image_files(files, sort_order, self.source_folder, workers=workers)
+    
+    def get_destination_folder(self, file_path, folder_name):
+        # Always move to root folder when search_subfolders is enabled
         if self.search_subfolders:
-            for file_path in self.source_folder.rglob('*'):
-                if file_path.is_file() and file_path.suffix.lower() in self.image_extensions:
-                    image_files.append(file_path)
-        else:
-            for file_path in self.source_folder.iterdir():
-                if file_path.is_file() and file_path.suffix.lower() in self.image_extensions:
-                    image_files.append(file_path)
-        return sorted(image_files)
+            return self.source_folder / folder_name
+        return Path(file_path).parent / folder_name
+    
+    def get_action_destination(self, file_path, action):
+        """Folder an action will write into, or the action type for non-folder actions"""
+        if action["type"] == "folder":
+            return self.get_destination_folder(file_path, action["name"])
+        return action["type"]
     
     def move_to_folder(self, file_path, folder_name):
         try:
             source_path = Path(file_path)
-            
-            # Always move to root folder when search_subfolders is enabled
-            if self.search_subfolders:
-                destination_folder = self.source_folder / folder_name
-            else:
-                destination_folder = source_path.parent / folder_name
-                
+            destination_folder = self.get_destination_folder(source_path, folder_name)
             destination_folder.mkdir(exist_ok=True)
             
             destination_path = destination_folder / source_path.name
@@ -46,7 +119,16 @@ class FileHandler:
                     destination_path = destination_folder / f"{stem}_{counter}{suffix}"
                     counter += 1
             
-            shutil.move(str(source_path), str(destination_path))
+            # Recorded before the move, so the scan can't list the file before it is known
+            self.moved_to.add(destination_path)
+            try:
+                self._run_journaled("move", source_path, destination_path,
+                                    lambda: shutil.move(str(source_path), str(destination_path)))
+            except Exception:
+                self.moved_to.discard(destination_path)
+                raise
+            if self.hash_index:
+                self.hash_index.record_move(source_path, destination_path)
             return True, f"Moved to {destination_path}"
             
         except PermissionError as e:
@@ -58,35 +140,73 @@ class FileHandler:
         except Exception as e:
             return False, f"Unexpected error moving file: {source_path.name} - {e}"
     
+    def _run_journaled(self, kind, source, destination, operation):
+        """Run operation() between the journal's begin and done/failed records"""
+        if self.journal is None:
+            return operation()
+        op_id = self.journal.begin(kind, source, destination)
+        try:
+            result = operation()
+        except Exception as e:
+            self.journal.finish(op_id, e)
+            raise
+        self.journal.finish(op_id)
+        return result
+    
     def send_to_recycle(self, file_path):
+        _, success, message = self.recycle_files([file_path])[0]
+        return success, message
+    
+    def recycle_files(self, file_paths, workers=4):
+        """Send files to the recycle bin as one batch; returns (file_path, success, message) per file
+
+        The batch is journaled with a single sync and trashed by bulk_trash,
+        which renames on `workers` threads.
+        """
+        file_paths = list(file_paths)
         try:
-            send2trash(str(file_path))
-            return True, "Sent to recycle bin"
+            op_ids = None
+            if self.journal:
+                op_ids = self.journal.begin_many("trash", [(file_path, None) for file_path in file_paths])
+            errors = trash_files(file_paths, workers)
         except Exception as e:
-            return False, f"Error sending to recycle bin: {e}"
+            return [(file_path, False, f"Error sending to recycle bin: {e}") for file_path in file_paths]
+        
+        results = []
+        for index, (file_path, error) in enumerate(zip(file_paths, errors)):
+            if op_ids:
+                self.journal.finish(op_ids[index], error)
+            if error is None:
+                results.append((file_path, True, "Sent to recycle bin"))
+            else:
+                results.append((file_path, False, f"Error sending {Path(file_path).name} to recycle bin: {error}"))
+        if self.hash_index:
+            self.hash_index.remove_many([file_path for file_path, success, _ in results if success])
+        return results
     
     def remove_empty_subfolders(self):
         """Remove empty subfolders from the source directory"""
         try:
             removed_folders = []
             
+            removed = set()
+            
             # Walk through all subdirectories, bottom-up to handle nested empty folders
-            for root, dirs, files in os.walk(self.source_folder, topdown=False):
-                for directory in dirs:
-                    folder_path = Path(root) / directory
-                    
-                    # Skip if this is the source folder itself
-                    if folder_path == self.source_folder:
-                        continue
-                    
-                    try:
-                        # Check if folder is empty (no files or subdirectories)
-                        if not any(folder_path.iterdir()):
-                            folder_path.rmdir()
-                            removed_folders.append(str(folder_path.relative_to(self.source_folder)))
-                    except OSError:
-                        # Folder not empty or permission issue, skip
-                        continue
+            for folder_path, files, subfolders in walk_tree(self.source_folder, topdown=False):
+                # Skip if this is the source folder itself
+                if folder_path == self.source_folder:
+                    continue
+                
+                # Empty means no files and every subfolder was removed already
+                if files or not removed.issuperset(subfolders):
+                    continue
+                try:
+                    folder_path.rmdir()
+                    removed.add(folder_path)
+                    removed_folders.append(str(folder_path.relative_to(self.source_folder)))
+                except OSError:
+                    # Folder not empty or permission issue, skip
+                    continue
             
             if removed_folders:
                 return True, f"Removed {len(removed_folders)} empty folders: {', '.join(removed_folders)}"
@@ -96,138 +216,461 @@ class FileHandler:
         except Exception as e:
             return False, f"Error removing empty folders: {e}"
     
-    def get_file_hash(self, file_path):
-        """Calculate MD5 hash of a file"""
-        hash_md5 = hashlib.md5()
+    def get_file_hash(self, file_path, algorithm=None, cancel_event=None):
+        """Calculate the content hash of a file (BLAKE2b unless configured otherwise)"""
+        file_hash = hashlib.new(algorithm or self.hash_algorithm)
+        buffer = bytearray(HASH_READ_SIZE)
+        view = memoryview(buffer)
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return None
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    file_hash.update(view[:read])
+            return file_hash.hexdigest()
+        except Exception:
+            return None
+    
+    def get_partial_hash(self, file_path, size):
+        """Hash the first and last blocks of a file
+
+        For files no larger than two blocks this reads the whole file, so the
+        result equals get_file_hash().
+        """
+        file_hash = hashlib.new(self.hash_algorithm)
         try:
             with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+                file_hash.update(f.read(PARTIAL_HASH_BLOCK))
+                if size > PARTIAL_HASH_BLOCK * 2:
+                    f.seek(size - PARTIAL_HASH_BLOCK)
+                file_hash.update(f.read(PARTIAL_HASH_BLOCK))
+            return file_hash.hexdigest()
         except Exception:
             return None
     
-    def find_duplicate_images(self):
-        """Find duplicate images in the source folder and all subfolders (always recursive)"""
+    def _hash_files(self, items, hash_func, stage, bytes_of, workers, progress, cancel_event):
+        """Hash (file_path, stat) items on a thread pool, returning (file_path, stat, hash) tuples"""
+        results = []
+        total_bytes = sum(bytes_of(stat) for _, stat in items)
+        done_bytes = 0
+        last_report = 0.0
+        executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"hash-{stage}")
         try:
-            file_hashes = defaultdict(list)
-            all_image_files = []
+            futures = {executor.submit(hash_func, file_path, stat): (file_path, stat) for file_path, stat in items}
+            for done, future in enumerate(as_completed(futures), 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ScanCancelled()
+                file_path, stat = futures[future]
+                results.append((file_path, stat, future.result()))
+                done_bytes += bytes_of(stat)
+                
+                now = time.monotonic()
+                if progress and (now - last_report >= PROGRESS_INTERVAL or done == len(items)):
+                    last_report = now
+                    progress({"stage": stage, "done": done, "total": len(items),
+                              "bytes": done_bytes, "total_bytes": total_bytes})
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return results
+    
+    def _find_all_image_files(self, progress=None, cancel_event=None):
+        all_image_files = []
+        
+        # Always get all image files including subfolders for duplicate detection
+        for file_path in iter_image_files(self.source_folder, self.image_extensions, True, cancel_event):
+            all_image_files.append(file_path)
+            if progress and len(all_image_files) % 500 == 0:
+                progress({"stage": "enumerating", "files_found": len(all_image_files)})
+        if cancel_event is not None and cancel_event.is_set():
+            raise ScanCancelled()
+        return all_image_files
+    
+    def find_duplicate_images(self, progress=None, cancel_event=None, workers=None):
+        """Find duplicate images in the source folder and all subfolders (always recursive)
+
+        Files are narrowed down in stages: only files sharing a size can be
+        duplicates, then only those sharing a head/tail hash, and only those
+        get a full content hash. Per-stage numbers are left in self.scan_stats.
+
+        Hashing runs on `workers` threads (default depends on the disk type).
+        `progress` is called from the scanning thread with event dicts, and
+        setting `cancel_event` stops the scan.
+        """
+        if workers is None:
+            workers = default_hash_workers(self.source_folder)
+        new_rows = []
+        try:
+            all_image_files = self._find_all_image_files(progress, cancel_event)
             
-            # Always get all image files including subfolders for duplicate detection
-            for file_path in self.source_folder.rglob('*'):
-                if file_path.is_file() and file_path.suffix.lower() in self.image_extensions:
-                    all_image_files.append(file_path)
+            stats = {
+                "files": len(all_image_files),
+                "size_candidates": 0,
+                "partial_hashed": 0,
+                "partial_bytes": 0,
+                "partial_candidates": 0,
+                "full_hashed": 0,
+                "full_bytes": 0,
+                "from_index": 0,
+            }
             
-            # Calculate hashes for all files
+            # Stage 1: group by size and drop files with a unique size
+            by_size = defaultdict(list)
             for file_path in all_image_files:
-                file_hash = self.get_file_hash(file_path)
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    continue
+                by_size[stat.st_size].append((file_path, stat))
+            size_groups = [group for group in by_size.values() if len(group) > 1]
+            stats["size_candidates"] = sum(len(group) for group in size_groups)
+            
+            indexed = self.hash_index.load_folder(self.source_folder) if self.hash_index else {}
+            full_hashes = {}
+            partial_hashes = {}
+            
+            def record_hash(file_path, stat, file_hash):
+                full_hashes[file_path] = file_hash
+                if self.hash_index:
+                    new_rows.append((file_path, stat, self.hash_algorithm, file_hash, partial_hashes.get(file_path)))
+                    if len(new_rows) >= HASH_INDEX_BATCH:
+                        self.hash_index.store_many(new_rows)
+                        new_rows.clear()
+            
+            # Stage 2: group by head/tail hash and drop singletons again. Indexed files bring
+            # their head/tail hash from the index, so a new file in a partly indexed size
+            # group is only hashed in full if its head and tail match another file's.
+            needs_full_hash = []
+            needs_partial_hash = []
+            partial_groups = defaultdict(list)
+            for group in size_groups:
+                unindexed = []
+                known = []
+                for file_path, stat in group:
+                    entry = indexed.get(HashIndex.key(file_path))
+                    if HashIndex.matches(entry, stat, self.hash_algorithm):
+                        full_hashes[file_path] = entry[4]
+                        stats["from_index"] += 1
+                        known.append((file_path, stat, entry))
+                    else:
+                        unindexed.append((file_path, stat))
+                if not unindexed:
+                    continue
+                
+                needs_partial_hash.extend(unindexed)
+                for file_path, stat, entry in known:
+                    # For small files the full hash is the head/tail hash
+                    partial_hash = entry[5] or (entry[4] if stat.st_size <= PARTIAL_HASH_BLOCK * 2 else None)
+                    if partial_hash:
+                        partial_hashes[file_path] = partial_hash
+                        partial_groups[(stat.st_size, partial_hash)].append((file_path, stat))
+                    else:
+                        # Indexed before head/tail hashes were kept
+                        needs_partial_hash.append((file_path, stat))
+            
+            partial_results = self._hash_files(
+                needs_partial_hash,
+                lambda file_path, stat: self.get_partial_hash(file_path, stat.st_size),
+                "partial",
+                lambda stat: min(stat.st_size, PARTIAL_HASH_BLOCK * 2),
+                workers, progress, cancel_event
+            )
+            for file_path, stat, partial_hash in partial_results:
+                stats["partial_hashed"] += 1
+                stats["partial_bytes"] += min(stat.st_size, PARTIAL_HASH_BLOCK * 2)
+                if partial_hash:
+                    partial_hashes[file_path] = partial_hash
+                    partial_groups[(stat.st_size, partial_hash)].append((file_path, stat))
+                    if file_path in full_hashes:
+                        # Store the head/tail hash next to the indexed full hash
+                        record_hash(file_path, stat, full_hashes[file_path])
+            
+            for (size, partial_hash), group in partial_groups.items():
+                if len(group) < 2:
+                    continue
+                stats["partial_candidates"] += len(group)
+                for file_path, stat in group:
+                    if file_path in full_hashes:
+                        continue
+                    if size <= PARTIAL_HASH_BLOCK * 2:
+                        # The partial hash already covered the whole file
+                        record_hash(file_path, stat, partial_hash)
+                    else:
+                        needs_full_hash.append((file_path, stat))
+            
+            # Stage 3: full content hash of the remaining candidates
+            full_results = self._hash_files(
+                needs_full_hash,
+                lambda file_path, stat: self.get_file_hash(file_path, cancel_event=cancel_event),
+                "full",
+                lambda stat: stat.st_size,
+                workers, progress, cancel_event
+            )
+            for file_path, stat, file_hash in full_results:
+                stats["full_hashed"] += 1
+                stats["full_bytes"] += stat.st_size
                 if file_hash:
-                    file_hashes[file_hash].append(file_path)
+                    record_hash(file_path, stat, file_hash)
+            
+            if self.hash_index:
+                self.hash_index.store_many(new_rows)
+                self.hash_index.purge_missing(self.source_folder, all_image_files)
             
-            # Find duplicates (hashes with more than one file)
+            # Find duplicates (hashes with more than one file), in scan order
+            file_hashes = defaultdict(list)
+            for file_path in all_image_files:
+                file_hash = full_hashes.get(file_path)
+                if file_hash:
+                    file_hashes[file_hash].append(file_path)
             duplicates = {hash_val: files for hash_val, files in file_hashes.items() if len(files) > 1}
             
+            self.scan_stats = stats
             return duplicates, len(all_image_files)
             
+        except ScanCancelled:
+            # Keep the hashes computed so far for the next scan
+            if self.hash_index:
+                self.hash_index.store_many(new_rows)
+            return None, "Duplicate scan cancelled"
         except Exception as e:
             return None, f"Error finding duplicates: {e}"
     
+    def find_near_duplicate_images(self, threshold=6, method="phash", progress=None, cancel_event=None, workers=None):
+        """Find visually similar images (resized, re-encoded or lightly edited copies)
+
+        Every image gets a 64-bit perceptual hash; images within `threshold`
+        differing bits of a group's first image form a group. Returns the same
+        ({key: [paths]}, total_files) structure as find_duplicate_images.
+        """
+        # NumPy is only needed for this mode
+        import perceptual_hash
+        
+        if workers is None:
+            workers = default_hash_workers(self.source_folder)
+        thumbnail_size = perceptual_hash.THUMBNAIL_SIZES[method]
+        
+        def load(item):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            try:
+                return perceptual_hash.load_thumbnail(item[0], thumbnail_size)
+            except Exception:
+                return None
+        
+        try:
+            all_image_files = self._find_all_image_files(progress, cancel_event)
+            items = []
+            for file_path in all_image_files:
+                try:
+                    items.append((file_path, file_path.stat()))
+                except OSError:
+                    continue
+            
+            total_bytes = sum(stat.st_size for _, stat in items)
+            done_bytes = 0
+            hashes = {}
+            executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="perceptual")
+            try:
+                for start in range(0, len(items), PERCEPTUAL_BATCH_SIZE):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ScanCancelled()
+                    batch = items[start:start + PERCEPTUAL_BATCH_SIZE]
+                    decoded = [(file_path, thumbnail) for (file_path, _), thumbnail
+                               in zip(batch, executor.map(load, batch)) if thumbnail is not None]
+                    values = perceptual_hash.hash_thumbnails(method, [thumbnail for _, thumbnail in decoded])
+                    hashes.update(zip((file_path for file_path, _ in decoded), values))
+                    
+                    done_bytes += sum(stat.st_size for _, stat in batch)
+                    if progress:
+                        progress({"stage": "perceptual", "done": start + len(batch), "total": len(items),
+                                  "bytes": done_bytes, "total_bytes": total_bytes})
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+            
+            if cancel_event is not None and cancel_event.is_set():
+                raise ScanCancelled()
+            
+            duplicates = {
+                f"{method}:{value:016x}": files
+                for value, files in perceptual_hash.group_similar(hashes, threshold)
+            }
+            
+            self.scan_stats = {
+                "method": method,
+                "threshold": threshold,
+                "files": len(all_image_files),
+                "hashed": len(hashes),
+            }
+            return duplicates, len(all_image_files)
+            
+        except ScanCancelled:
+            return None, "Similar image scan cancelled"
+        except Exception as e:
+            return None, f"Error finding similar images: {e}"
+    
+    def describe_scan_stats(self):
+        """One line per stage of the last duplicate scan"""
+        stats = self.scan_stats
+        if not stats:
+            return ""
+        if "method" in stats:
+            return (
+                f"Perceptual hash ({stats['method']}): {stats['hashed']} of {stats['files']} files hashed\n"
+                f"Grouped at up to {stats['threshold']} differing bits"
+            )
+        return (
+            f"Same size: {stats['size_candidates']} of {stats['files']} files\n"
+            f"Same head/tail: {stats['partial_candidates']} of {stats['partial_hashed']} "
+            f"({format_bytes(stats['partial_bytes'])} read)\n"
+            f"Full hash: {stats['full_hashed']} files ({format_bytes(stats['full_bytes'])} read), "
+            f"{stats['from_index']} from index"
+        )
+    
+    def folder_label(self, file_path):
+        """Name of a file's folder as the duplicate dialog shows it"""
+        if file_path.parent == self.source_folder:
+            return "Main Folder"
+        return str(file_path.parent.relative_to(self.source_folder))
+    
     def get_unique_folders(self, duplicate_files):
         """Get list of unique folders containing duplicate files"""
         folders = set()
         for files in duplicate_files.values():
             for file_path in files:
-                if file_path.parent == self.source_folder:
-                    folders.add("Main Folder")
-                else:
-                    folders.add(str(file_path.parent.relative_to(self.source_folder)))
+                folders.add(self.folder_label(file_path))
         return sorted(list(folders))
     
-    def remove_duplicates(self, duplicates, folders_to_keep):
-        """Remove duplicate files, keeping only those in specified folders"""
+    def split_duplicate_group(self, files, folders_to_keep, keep=None):
+        """(kept, others) for one duplicate group
+
+        `keep` is the group's own choice of copies, overriding the folders.
+        """
+        files_to_keep = []
+        files_to_remove = []
+        
+        # Categorize files based on folder preference
+        for file_path in files:
+            if (file_path in keep) if keep is not None else (self.folder_label(file_path) in folders_to_keep):
+                files_to_keep.append(file_path)
+            else:
+                files_to_remove.append(file_path)
+        
+        # If no files are in keep folders, keep the first one
+        if not files_to_keep and files_to_remove:
+            files_to_keep.append(files_to_remove.pop(0))
+        return files_to_keep, files_to_remove
+    
+    def remove_duplicates(self, duplicates, folders_to_keep, workers=4, keep_overrides=None):
+        """Remove duplicate files, keeping only those in specified folders
+
+        `keep_overrides` maps group hashes to the copies those groups keep instead.
+        """
         try:
-            removed_files = []
+            files_to_recycle = []
             kept_files = []
+            keep_overrides = keep_overrides or {}
             
             for hash_val, files in duplicates.items():
-                files_to_keep = []
-                files_to_remove = []
-                
-                # Categorize files based on folder preference
-                for file_path in files:
-                    if file_path.parent == self.source_folder:
-                        folder_name = "Main Folder"
-                    else:
-                        folder_name = str(file_path.parent.relative_to(self.source_folder))
-                    
-                    if folder_name in folders_to_keep:
-                        files_to_keep.append(file_path)
-                    else:
-                        files_to_remove.append(file_path)
-                
-                # If no files are in keep folders, keep the first one
-                if not files_to_keep and files_to_remove:
-                    files_to_keep.append(files_to_remove.pop(0))
-                
-                # Remove duplicate files
-                for file_path in files_to_remove:
-                    try:
-                        send2trash(str(file_path))
-                        removed_files.append(file_path.name)
-                    except Exception as e:
-                        continue
-                
+                files_to_keep, files_to_remove = self.split_duplicate_group(files, folders_to_keep, keep_overrides.get(hash_val))
+                files_to_recycle.extend(files_to_remove)
                 kept_files.extend([f.name for f in files_to_keep])
             
-            return True, f"Removed {len(removed_files)} duplicate files. Kept {len(kept_files)} files."
+            # Every group's duplicates go to the recycle bin in one batch
+            results = self.recycle_files(files_to_recycle, workers)
+            failures = [message for _, success, message in results if not success]
+            for message in failures:
+                print(message)
+            
+            message = f"Removed {len(results) - len(failures)} duplicate files. Kept {len(kept_files)} files."
+            if failures:
+                message += f"\n\n{len(failures)} could not be removed:\n" + "\n".join(failures[:FAILURES_SHOWN])
+                if len(failures) > FAILURES_SHOWN:
+                    message += f"\n... and {len(failures) - FAILURES_SHOWN} more (see console)"
+            # Partial failures still changed the folder, so only a batch where nothing was removed counts as failed
+            return len(failures) < len(results) or not results, message
             
         except Exception as e:
             return False, f"Error removing duplicates: {e}"
     
-    def move_images_to_main_folder(self):
+    def link_duplicates(self, duplicates, folders_to_keep, mode="auto", workers=4, progress=None, keep_overrides=None):
+        """Reclaim the space of duplicates by linking them to the copy that would be kept
+
+        Nothing is removed: every copy outside the kept folders (or a group's
+        `keep_overrides` choice) becomes a reflink clone of, or hardlink to, a
+        kept copy on the same filesystem, after a byte-for-byte check.
+        Returns (success, message).
+        """
+        try:
+            groups = []
+            keep_overrides = keep_overrides or {}
+            for hash_val, files in duplicates.items():
+                kept, others = self.split_duplicate_group(files, folders_to_keep, keep_overrides.get(hash_val))
+                by_device = defaultdict(list)
+                for file_path in kept + others:
+                    try:
+                        by_device[os.stat(file_path).st_dev].append(file_path)
+                    except OSError as e:
+                        print(f"Error linking {file_path.name}: {e}")
+                # Links can't cross filesystems, so each one gets its own kept copy
+                for device_files in by_device.values():
+                    if len(device_files) > 1:
+                        groups.append((device_files[0], device_files[1:]))
+            
+            result = link_groups(groups, mode, workers, progress)
+            if self.hash_index:
+                self.hash_index.refresh_stats([target for target, _, _ in result.linked])
+            
+            failures = [f"Error linking {Path(target).name}: {error}" for target, error in result.errors]
+            for message in failures:
+                print(message)
+            for target, reason in result.skipped:
+                print(f"Skipped {target}: {reason}")
+            
+            reflinked = sum(1 for _, _, method in result.linked if method == "reflink")
+            message = (f"Linked {len(result.linked)} duplicate files ({reflinked} reflinked, "
+                       f"{len(result.linked) - reflinked} hardlinked), reclaiming up to "
+                       f"{format_bytes(result.bytes_reclaimed)}.")
+            if result.skipped:
+                reasons = defaultdict(int)
+                for _, reason in result.skipped:
+                    reasons[reason] += 1
+                message += "\n\nSkipped: " + ", ".join(f"{count} {reason}" for reason, count in sorted(reasons.items()))
+            if failures:
+                message += f"\n\n{len(failures)} could not be linked:\n" + "\n".join(failures[:FAILURES_SHOWN])
+                if len(failures) > FAILURES_SHOWN:
+                    message += f"\n... and {len(failures) - FAILURES_SHOWN} more (see console)"
+            return bool(result.linked) or not failures, message
+        
+        except Exception as e:
+            return False, f"Error linking duplicates: {e}"
+    
+    def move_images_to_main_folder(self, workers=4):
         """Move all images from subfolders to the main source folder"""
         try:
-            moved_count = 0
-            removed_folders = []
-
-            # Walk through all subdirectories
-            for dirpath, dirnames, filenames in os.walk(self.source_folder, topdown=False):
-                current_dir = Path(dirpath)
-
-                # Skip if this is the source folder itself
-                if current_dir == self.source_folder:
-                    continue
-
-                # Process all image files in this directory
-                for filename in filenames:
-                    if Path(filename).suffix.lower() in self.image_extensions:
-                        source = current_dir / filename
-                        destination = self.source_folder / filename
-
-                        # Handle filename conflicts
-                        if destination.exists():
-                            base_name = destination.stem
-                            extension = destination.suffix
-                            counter = 1
-                            while destination.exists():
-                                destination = self.source_folder / f"{base_name}_{counter}{extension}"
-                                counter += 1
-
-                        try:
-                            shutil.move(str(source), str(destination))
-                            moved_count += 1
-                        except Exception as e:
-                            print(f"Error moving {source}: {e}")
-                            continue
-
-                # After moving images, check if directory is empty and remove it
-                try:
-                    if not any(current_dir.iterdir()):
-                        current_dir.rmdir()
-                        removed_folders.append(str(current_dir.relative_to(self.source_folder)))
-                except OSError:
-                    # Directory not empty or permission issue, skip
-                    continue
+            plan = plan_bulk_move(self.source_folder, self.image_extensions, lambda directory: self.source_folder)
+            
+            # The whole plan is journaled with a single sync before the first file moves
+            op_ids = {}
+            if self.journal:
+                op_ids = dict(zip((source for source, _ in plan.moves), self.journal.begin_many("move", plan.moves)))
+            
+            def on_moved(source, destination):
+                if self.hash_index:
+                    self.hash_index.record_move(source, destination)
+                if source in op_ids:
+                    self.journal.finish(op_ids[source])
+            
+            result = execute_plan(plan, workers, on_moved)
+            
+            for source, error in result.errors:
+                if source in op_ids:
+                    self.journal.finish(op_ids[source], error)
+                print(f"Error moving {source}: {error}")
+            
+            moved_count = len(result.moved)
+            removed_folders = result.removed_directories
 
             result_message = f"Moved {moved_count} image(s) to main folder."
             if removed_folders:
@@ -240,6 +683,31 @@ class FileHandler:
         except Exception as e:
             return False, f"Error moving images to main folder: {e}"
 
+    def undo_moves(self, count=1, since_id=None):
+        """Move the last `count` journaled moves out of this folder back; returns (success, message, restored files)
+
+        Moves of files from other folders are never undone here, and with
+        `since_id` neither are moves journaled before that operation id.
+        """
+        if self.journal is None:
+            return False, "Undo is unavailable: the operation journal could not be opened", []
+        
+        def on_restored(source, destination):
+            self.moved_to.discard(destination)
+            if self.hash_index:
+                self.hash_index.record_move(destination, source)
+        
+        restored, errors = self.journal.undo(count, on_restored, self.source_folder, since_id)
+        for _, message in errors:
+            print(message)
+        if not restored and not errors:
+            return False, "Nothing to undo", []
+        if errors:
+            return False, f"Restored {len(restored)} file(s); {errors[-1][1]}", restored
+        if len(restored) == 1:
+            return True, f"Restored {restored[0].name}", restored
+        return True, f"Restored {len(restored)} files", restored
+    
     def process_action(self, file_path, action):
         if action["type"] == "folder":
             return self.move_to_folder(file_path, action["name"])
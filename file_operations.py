@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from collections import deque
+from latency_metrics import metrics
+
+
+# Most recycles queued in one lane that are trashed together
+TRASH_BATCH_SIZE = 512
+
+
+class FileOperationQueue:
+    """Apply file actions on background worker lanes, in order per destination
+
+    Every destination is pinned to one lane, so moves into the same folder run
+    one after another and filename conflict suffixes stay deterministic.
+    Recycles that pile up in a lane are trashed in batches. Results are put
+    on `results`, one per file, for the UI thread to poll.
+    """
+
+    def __init__(self, workers=2):
+        self.results = queue.Queue()
+        self._pending = 0
+        self._completed = deque(maxlen=100)
+        self._idle = threading.Condition()
+        self._lanes = []
+        for i in range(max(1, workers)):
+            lane = queue.Queue()
+            thread = threading.Thread(target=self._run, args=(lane,), name=f"file-ops-{i}", daemon=True)
+            thread.start()
+            self._lanes.append((lane, thread))
+
+    def submit(self, file_handler, file_path, action):
+        destination = file_handler.get_action_destination(file_path, action)
+        lane = self._lanes[hash(str(destination)) % len(self._lanes)][0]
+        with self._idle:
+            self._pending += 1
+        lane.put((file_handler, file_path, action))
+
+    def _run(self, lane):
+        carried = deque()
+        while True:
+            item = carried.popleft() if carried else lane.get()
+            if item is None:
+                return
+            file_handler, file_path, action = item
+            if action["type"] != "recycle":
+                self._apply(file_handler, file_path, action)
+                continue
+
+            # Recycles waiting behind this one go to the trash as one batch
+            batch = [file_path]
+            while len(batch) < TRASH_BATCH_SIZE:
+                try:
+                    following = lane.get_nowait()
+                except queue.Empty:
+                    break
+                if following is None or following[0] is not file_handler or following[2]["type"] != "recycle":
+                    carried.append(following)
+                    break
+                batch.append(following[1])
+            self._recycle(file_handler, batch, action)
+
+    def _apply(self, file_handler, file_path, action):
+        try:
+            with metrics.time("file.move"):
+                success, message = file_handler.process_action(file_path, action)
+        except Exception as e:
+            success, message = False, f"Unexpected error processing {file_path}: {e}"
+        self._finish(file_path, action, success, message)
+
+    def _recycle(self, file_handler, file_paths, action):
+        start = time.perf_counter()
+        try:
+            results = file_handler.recycle_files(file_paths)
+        except Exception as e:
+            results = [(file_path, False, f"Unexpected error processing {file_path}: {e}") for file_path in file_paths]
+        # Each file is recorded with its share of the batch, so file.trash stays a per-file latency
+        share = (time.perf_counter() - start) / len(file_paths)
+        for file_path, success, message in results:
+            metrics.record("file.trash", share)
+            self._finish(file_path, action, success, message)
+
+    def _finish(self, file_path, action, success, message):
+        self.results.put((file_path, action, success, message))
+        with self._idle:
+            self._pending -= 1
+            self._completed.append(time.monotonic())
+            if self._pending == 0:
+                self._idle.notify_all()
+
+    @property
+    def pending(self):
+        with self._idle:
+            return self._pending
+
+    def throughput(self, window=10.0):
+        """Completed operations per second over the last `window` seconds"""
+        now = time.monotonic()
+        with self._idle:
+            recent = [t for t in self._completed if now - t <= window]
+        if not recent:
+            return 0.0
+        return len(recent) / max(now - recent[0], 1.0)
+
+    def wait_idle(self, timeout=None):
+        """Block until every submitted operation has finished"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def shutdown(self):
+        """Finish all queued operations and stop the workers"""
+        for lane, _ in self._lanes:
+            lane.put(None)
+        for _, thread in self._lanes:
+            thread.join()
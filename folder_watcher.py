@@ -0,0 +1,250 @@
+"""
+Watch an open folder for images added or removed by other programs.
+
+On Linux the kernel's inotify interface is used through ctypes. Elsewhere,
+or when inotify runs out of watches, the watcher falls back to polling
+directory mtimes and re-listing only directories that changed.
+
+Events are put on FolderWatcher.events as (kind, path) tuples:
+  ("added", file)        an image appeared
+  ("removed", file)      an image was deleted or moved away
+  ("removed_tree", dir)  a watched subdirectory disappeared
+  ("rescan", None)       events were lost; the folder should be scanned again
+"""
+
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import struct
+import threading
+import time
+from pathlib import Path
+
+from image_scanner import walk_tree
+
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+EVENT_HEADER = struct.Struct("iIII")
+
+# Seconds a created file may go without a close-write before it is reported anyway.
+# A hardlink (how bulk_move.move_file moves files) raises only IN_CREATE.
+CREATE_SETTLE_SECONDS = 1.0
+
+
+def _load_inotify():
+    libc_name = ctypes.util.find_library("c")
+    if not libc_name:
+        raise OSError("libc not found")
+    libc = ctypes.CDLL(libc_name, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("inotify is not available")
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class FolderWatcher:
+    """Report image files added to or removed from a folder on a background thread"""
+
+    def __init__(self, root, extensions, recursive=False, poll_interval=2.0):
+        self.root = Path(root)
+        self.extensions = extensions
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.events = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="folder-watch", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _is_image(self, name):
+        return os.path.splitext(name)[1].lower() in self.extensions
+
+    def _report_tree(self, directory, add_watch=None):
+        """Report every image under a directory that just appeared"""
+        for sub_directory, files, _ in walk_tree(directory):
+            if add_watch is not None:
+                add_watch(sub_directory)
+            for entry in files:
+                if self._is_image(entry.name):
+                    self.events.put(("added", Path(entry.path)))
+            if not self.recursive:
+                break
+
+    def _run(self):
+        try:
+            self._run_inotify()
+        except OSError:
+            self._run_polling()
+
+    def _run_inotify(self):
+        libc = _load_inotify()
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        watches = {}
+        # Files seen created but not yet closed after writing -> when to report them regardless
+        created = {}
+
+        def add_watch(directory):
+            wd = libc.inotify_add_watch(fd, os.fsencode(str(directory)), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            watches[wd] = Path(directory)
+
+        try:
+            add_watch(self.root)
+            if self.recursive:
+                for _, _, subdirectories in walk_tree(self.root):
+                    for subdirectory in subdirectories:
+                        add_watch(subdirectory)
+
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                self._report_settled(created)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+
+                offset = 0
+                while offset < len(data):
+                    wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                    name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+                    offset += EVENT_HEADER.size + length
+
+                    if mask & IN_Q_OVERFLOW:
+                        self.events.put(("rescan", None))
+                        continue
+                    if mask & IN_IGNORED:
+                        watches.pop(wd, None)
+                        continue
+                    directory = watches.get(wd)
+                    if directory is None or not name:
+                        continue
+                    path = directory / os.fsdecode(name)
+
+                    if mask & IN_ISDIR:
+                        if not self.recursive:
+                            continue
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            # Files may have landed before the watch existed
+                            self._report_tree(path, add_watch)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            self.events.put(("removed_tree", path))
+                    elif self._is_image(path.name):
+                        if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                            created.pop(path, None)
+                            self.events.put(("added", path))
+                        elif mask & IN_CREATE:
+                            try:
+                                linked = os.lstat(path).st_nlink > 1
+                            except OSError:
+                                continue
+                            if linked:
+                                # A new name for existing, complete data; no close-write will follow
+                                self.events.put(("added", path))
+                            else:
+                                created[path] = time.monotonic() + CREATE_SETTLE_SECONDS
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            created.pop(path, None)
+                            self.events.put(("removed", path))
+        finally:
+            os.close(fd)
+
+    def _report_settled(self, created):
+        """Report created files whose close-write never came, such as links whose old name is already gone"""
+        now = time.monotonic()
+        for path in [path for path, deadline in created.items() if deadline <= now]:
+            del created[path]
+            if os.path.lexists(path):
+                self.events.put(("added", path))
+
+    def _list_directory(self, directory):
+        """(mtime_ns, image names, subdirectory names) of one directory"""
+        images = set()
+        subdirectories = set()
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.add(entry.name)
+                    elif self._is_image(entry.name) and entry.is_file():
+                        images.add(entry.name)
+                except OSError:
+                    continue
+        return mtime_ns, images, subdirectories
+
+    def _snapshot_tree(self, directory, snapshot, report):
+        for sub_directory, _, _ in walk_tree(directory):
+            try:
+                listing = self._list_directory(sub_directory)
+            except OSError:
+                continue
+            snapshot[sub_directory] = listing
+            if report:
+                for name in listing[1]:
+                    self.events.put(("added", sub_directory / name))
+            if not self.recursive:
+                break
+
+    def _forget_tree(self, directory, snapshot):
+        for known in [d for d in snapshot if d == directory or directory in d.parents]:
+            del snapshot[known]
+
+    def _run_polling(self):
+        """Compare directory mtimes each interval and re-list only directories that changed"""
+        snapshot = {}
+        self._snapshot_tree(self.root, snapshot, report=False)
+
+        while not self._stop.wait(self.poll_interval):
+            for directory in list(snapshot):
+                if directory not in snapshot:
+                    continue
+                old_mtime, old_images, old_subdirectories = snapshot[directory]
+                try:
+                    if os.stat(directory).st_mtime_ns == old_mtime:
+                        continue
+                    listing = self._list_directory(directory)
+                except OSError:
+                    if directory != self.root:
+                        self._forget_tree(directory, snapshot)
+                        self.events.put(("removed_tree", directory))
+                    continue
+
+                snapshot[directory] = listing
+                _, images, subdirectories = listing
+                for name in sorted(images - old_images):
+                    self.events.put(("added", directory / name))
+                for name in sorted(old_images - images):
+                    self.events.put(("removed", directory / name))
+
+                if self.recursive:
+                    for name in sorted(subdirectories - old_subdirectories):
+                        self._snapshot_tree(directory / name, snapshot, report=True)
+                    for name in sorted(old_subdirectories - subdirectories):
+                        self._forget_tree(directory / name, snapshot)
+                        self.events.put(("removed_tree", directory / name))
@@ -0,0 +1,356 @@
+"""
+Grid triage: sort many images per key press.
+
+Only the rows on screen exist as canvas items. The items are created once
+per window size and recycled as the grid scrolls, so a folder of 100k images
+costs no more to show than a folder of 50. Thumbnails are decoded lazily on
+a thread pool (through the preview cache when it is enabled), and loads for
+cells that scroll out of view are cancelled before they start.
+"""
+
+import math
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from PIL import ImageTk
+from image_cache import ImageCache
+from image_decoder import decode_scaled
+
+
+CELL_PADDING = 6
+LABEL_HEIGHT = 16
+GRID_POLL_MS = 50
+WHEEL_ROWS = 3
+
+SELECTED_COLOR = "#3399ff"
+UNSELECTED_COLOR = "#333333"
+
+
+class ThumbnailCells:
+    """Recycled (frame, image, label) canvas cells showing lazily loaded thumbnails
+
+    Shared by the grid triage and duplicate review windows. Thumbnails are
+    decoded on a thread pool (through the sorter's preview cache when it is
+    enabled) into a bounded cache; the owner drains finished loads with
+    collect() from its poll loop and cancels loads for files out of view.
+    """
+
+    def __init__(self, canvas, sorter, thumbnail_size, workers, cache_mb, thread_name_prefix):
+        self.canvas = canvas
+        self.thumbnail_size = thumbnail_size
+        self.cell_width = thumbnail_size + 2 * CELL_PADDING
+
+        loader = sorter.preview_cache.load if sorter.preview_cache else decode_scaled
+        self._load = lambda file_path: loader(file_path, (thumbnail_size, thumbnail_size))
+        self.thumbnails = ImageCache(cache_mb * 1024 * 1024)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._pending = {}
+        self._loaded = queue.Queue()
+
+        # One (frame, image, label) triple per cell
+        self.items = []
+        # What each cell currently shows: (file_path, outline, has_thumbnail)
+        self.state = []
+        self.photos = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, outline):
+        frame = self.canvas.create_rectangle(0, 0, 0, 0, outline=outline, width=2)
+        image = self.canvas.create_image(0, 0, anchor='center')
+        label = self.canvas.create_text(0, 0, anchor='n', fill="white", font=("Arial", 8), justify='center')
+        self.items.append((frame, image, label))
+        self.state.append(None)
+        self.photos.append(None)
+
+    def place(self, index, x, y, height):
+        """Move cell `index` to a cell_width x height slot with its top left corner at (x, y)"""
+        frame, image, label = self.items[index]
+        self.canvas.coords(frame, x + 2, y + 2, x + self.cell_width - 2, y + height - 2)
+        self.canvas.coords(image, x + self.cell_width / 2, y + CELL_PADDING + self.thumbnail_size / 2)
+        self.canvas.coords(label, x + self.cell_width / 2, y + CELL_PADDING + self.thumbnail_size + 2)
+
+    def hide(self, index):
+        for item in self.items[index]:
+            self.canvas.itemconfigure(item, state='hidden')
+        self.state[index] = None
+        self.photos[index] = None
+
+    def show(self, index, file_path, outline, text):
+        """Point cell `index` at a file, requesting its thumbnail if it isn't cached"""
+        thumbnail = self.thumbnails.get(self.thumbnail_key(file_path))
+        state = (file_path, outline, thumbnail is not None)
+        previous = self.state[index]
+        if state == previous:
+            return
+
+        frame, image, label = self.items[index]
+        if thumbnail is None:
+            self.request_thumbnail(file_path)
+            self.photos[index] = None
+            self.canvas.itemconfigure(image, image="", state='normal')
+        elif previous is None or previous[0] != file_path or not previous[2]:
+            self.photos[index] = ImageTk.PhotoImage(thumbnail)
+            self.canvas.itemconfigure(image, image=self.photos[index], state='normal')
+        self.canvas.itemconfigure(frame, outline=outline, state='normal')
+        self.canvas.itemconfigure(label, text=text, state='normal')
+        self.state[index] = state
+
+    def thumbnail_key(self, file_path):
+        return (str(file_path), self.thumbnail_size)
+
+    def short_name(self, name):
+        limit = max(8, self.cell_width // 7)
+        return name if len(name) <= limit else name[:limit - 1] + "…"
+
+    def request_thumbnail(self, file_path):
+        if file_path in self._pending:
+            return
+
+        def load():
+            try:
+                image = self._load(file_path)
+            except Exception:
+                image = None
+            self._loaded.put((file_path, image))
+
+        self._pending[file_path] = self._executor.submit(load)
+
+    def cancel_hidden(self, visible):
+        """Drop loads for files no longer in view; they have not started yet"""
+        for file_path in [path for path in self._pending if path not in visible]:
+            self._pending.pop(file_path).cancel()
+
+    def collect(self):
+        """Cache thumbnails that finished loading; returns whether there were any"""
+        changed = False
+        while True:
+            try:
+                file_path, image = self._loaded.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.pop(file_path, None)
+            if image is not None:
+                self.thumbnails.put(self.thumbnail_key(file_path), image)
+                changed = True
+        return changed
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class GridView:
+    """Toplevel window showing the sorter's image_files as a virtualized thumbnail grid"""
+
+    def __init__(self, sorter, thumbnail_size=256, workers=4, cache_mb=128):
+        self.sorter = sorter
+        self.cell_width = thumbnail_size + 2 * CELL_PADDING
+        self.cell_height = thumbnail_size + 2 * CELL_PADDING + LABEL_HEIGHT
+
+        self.top_row = 0
+        self.columns = 1
+        self.rows = 0
+        self.selection = set()
+        self.anchor = None
+        self.closed = False
+        # The sorter's file list as last rendered, to notice changes made from the main window
+        self._files_seen = None
+        self._count_seen = 0
+
+        self.window = tk.Toplevel(sorter.root)
+        self.window.title("Grid Triage")
+        self.window.geometry("1200x800")
+        self.window.configure(bg="black")
+
+        self.header_label = tk.Label(self.window, text="", fg="white", bg="black", font=("Arial", 11))
+        self.header_label.pack(fill='x', pady=4)
+        self.status_label = tk.Label(self.window, text="", fg="yellow", bg="black", font=("Arial", 10))
+        self.status_label.pack(side='bottom', fill='x', pady=4)
+
+        self.scrollbar = tk.Scrollbar(self.window, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side='right', fill='y')
+        self.canvas = tk.Canvas(self.window, bg="black", highlightthickness=0)
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.cells = ThumbnailCells(self.canvas, sorter, thumbnail_size, workers, cache_mb, "grid-thumbnail")
+
+        self.bind_keys()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.focus_set()
+        self.update_header()
+        self.window.after(GRID_POLL_MS, self.poll)
+
+    def bind_keys(self):
+        for direction in ("up", "down", "left", "right"):
+            self.window.bind(f'<KeyPress-{direction.capitalize()}>', lambda e, d=direction: self.apply_to_selection(d))
+        self.window.bind('<Prior>', lambda e: self.scroll(-max(1, self.rows - 1)))
+        self.window.bind('<Next>', lambda e: self.scroll(max(1, self.rows - 1)))
+        self.window.bind('<Home>', lambda e: self.scroll_to(0))
+        self.window.bind('<End>', lambda e: self.scroll_to(self.total_rows()))
+        self.window.bind('<Control-a>', self.select_all)
+        self.window.bind('<Escape>', self.clear_selection)
+
+        self.canvas.bind('<Configure>', lambda e: self.layout())
+        self.canvas.bind('<Button-1>', self.on_click)
+        self.canvas.bind('<Control-Button-1>', lambda e: self.on_click(e, toggle=True))
+        self.canvas.bind('<Shift-Button-1>', lambda e: self.on_click(e, extend=True))
+        self.canvas.bind('<Double-Button-1>', self.on_double_click)
+        self.canvas.bind('<MouseWheel>', lambda e: self.scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.canvas.bind('<Button-4>', lambda e: self.scroll(-WHEEL_ROWS))
+        self.canvas.bind('<Button-5>', lambda e: self.scroll(WHEEL_ROWS))
+
+    def update_header(self):
+        arrows = {"left": "←", "up": "↑", "right": "→", "down": "↓"}
+        actions = "   ".join(f"{arrow} {self.sorter.config_manager.get_action(direction)['name']}"
+                               for direction, arrow in arrows.items())
+        self.header_label.config(text=actions)
+
+    def total_rows(self):
+        return math.ceil(len(self.sorter.image_files) / self.columns)
+
+    def layout(self):
+        """Size the pool of recycled cells to the canvas"""
+        width = max(1, self.canvas.winfo_width())
+        height = max(1, self.canvas.winfo_height())
+        self.columns = max(1, width // self.cell_width)
+        # One partially visible row at the bottom
+        self.rows = height // self.cell_height + 1
+        wanted = self.columns * self.rows
+
+        while len(self.cells) < wanted:
+            self.cells.add(UNSELECTED_COLOR)
+
+        for index in range(len(self.cells)):
+            if index >= wanted:
+                self.cells.hide(index)
+                continue
+            row, column = divmod(index, self.columns)
+            self.cells.place(index, column * self.cell_width, row * self.cell_height, self.cell_height)
+        self.render()
+
+    def render(self):
+        """Point the recycled cells at the files now in view and request missing thumbnails"""
+        files = self.sorter.image_files
+        self.top_row = max(0, min(self.top_row, self.total_rows() - self.rows + 1))
+        first = self.top_row * self.columns
+        visible = set()
+
+        for index in range(min(len(self.cells), self.columns * self.rows)):
+            file_index = first + index
+            if file_index >= len(files):
+                self.cells.hide(index)
+                continue
+            file_path = files[file_index]
+            visible.add(file_path)
+            outline = SELECTED_COLOR if file_path in self.selection else UNSELECTED_COLOR
+            self.cells.show(index, file_path, outline, self.cells.short_name(file_path.name))
+
+        self.cells.cancel_hidden(visible)
+
+        total_rows = self.total_rows()
+        if total_rows:
+            self.scrollbar.set(self.top_row / total_rows, min(1.0, (self.top_row + self.rows) / total_rows))
+        else:
+            self.scrollbar.set(0, 1)
+        self.update_status()
+
+    def poll(self):
+        if self.closed:
+            return
+        changed = self.cells.collect()
+        # Files may also have been added, removed or sorted from the main window
+        if changed or self.sorter.image_files is not self._files_seen or len(self.sorter.image_files) != self._count_seen:
+            self._files_seen = self.sorter.image_files
+            self._count_seen = len(self.sorter.image_files)
+            self.render()
+        self.window.after(GRID_POLL_MS, self.poll)
+
+    def update_status(self):
+        total = len(self.sorter.image_files)
+        if not total:
+            self.status_label.config(text="No images remaining")
+            return
+        self.status_label.config(
+            text=f"{len(self.selection)} selected of {total} | Arrow keys sort the selection, "
+                 f"Ctrl/Shift+click to select more, double-click to open"
+        )
+
+    def scroll(self, rows):
+        self.scroll_to(self.top_row + rows)
+
+    def scroll_to(self, row):
+        self.top_row = row
+        self.render()
+
+    def on_scrollbar(self, command, value, units=None):
+        if command == "moveto":
+            self.scroll_to(int(float(value) * self.total_rows()))
+        elif command == "scroll":
+            step = self.rows - 1 if units == "pages" else 1
+            self.scroll(int(value) * max(1, step))
+
+    def file_index_at(self, x, y):
+        column = int(x // self.cell_width)
+        if column >= self.columns:
+            return None
+        index = (self.top_row + int(y // self.cell_height)) * self.columns + column
+        return index if index < len(self.sorter.image_files) else None
+
+    def on_click(self, event, toggle=False, extend=False):
+        index = self.file_index_at(event.x, event.y)
+        if index is None:
+            return
+        files = self.sorter.image_files
+        file_path = files[index]
+
+        if extend and self.anchor is not None:
+            anchor_index = self.sorter.bisect_image_files(self.anchor)
+            start, end = sorted((min(anchor_index, len(files) - 1), index))
+            self.selection.update(files[start:end + 1])
+        elif toggle:
+            self.selection.symmetric_difference_update({file_path})
+            self.anchor = file_path
+        else:
+            self.selection = {file_path}
+            self.anchor = file_path
+        self.render()
+
+    def on_double_click(self, event):
+        index = self.file_index_at(event.x, event.y)
+        if index is None:
+            return
+        self.sorter.current_index = index
+        self.sorter.load_current_image()
+        self.close()
+
+    def select_all(self, _event=None):
+        self.selection = set(self.sorter.image_files)
+        self.render()
+
+    def clear_selection(self, _event=None):
+        self.selection.clear()
+        self.render()
+
+    def apply_to_selection(self, direction):
+        """Sort every selected image with one batched action"""
+        selected = []
+        for file_path in sorted(self.selection):
+            # Files removed by the folder watcher may still be selected
+            if self.sorter.image_index(file_path) is not None:
+                selected.append(file_path)
+        self.selection.clear()
+        self.anchor = None
+        if not selected:
+            return
+        self.cells.thumbnails.discard_paths(selected)
+        self.sorter.apply_action(selected, direction)
+        self.render()
+
+    def shutdown(self):
+        self.closed = True
+        self.cells.shutdown()
+
+    def close(self):
+        self.shutdown()
+        self.window.destroy()
+        self.sorter.grid_view = None
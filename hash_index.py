@@ -0,0 +1,151 @@
+import os
+import threading
+from pathlib import Path
+
+
+class HashIndex:
+    """On-disk cache of file content hashes keyed by path, size, mtime_ns and inode
+
+    Besides the full hash, each row keeps the head/tail hash the duplicate
+    scan filters with, so new files can be compared against indexed ones
+    without reading the indexed files again.
+
+    A cached hash is only trusted while the file's size, mtime and inode are
+    unchanged. Moves made by FileHandler update rows in place instead of
+    throwing the hash away.
+    """
+
+    def __init__(self, db_path):
+        # Imported here so FileHandler can use key() and matches() without loading SQLite
+        import sqlite3
+
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " inode INTEGER NOT NULL,"
+                " algorithm TEXT NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " partial TEXT)"
+            )
+            # Indexes written before head/tail hashes were kept lack the column
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+            if "partial" not in columns:
+                self._conn.execute("ALTER TABLE files ADD COLUMN partial TEXT")
+
+    @staticmethod
+    def key(path):
+        return os.path.abspath(path)
+
+    @classmethod
+    def _folder_range(cls, folder):
+        # Every path under folder sorts between "folder/" and "folder0" ("0" follows "/")
+        prefix = os.path.join(cls.key(folder), "")
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def load_folder(self, folder):
+        """Return {path: (size, mtime_ns, inode, algorithm, hash, partial)} for every row under folder
+
+        `partial` is None for rows stored without a head/tail hash.
+        """
+        low, high = self._folder_range(folder)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns, inode, algorithm, hash, partial FROM files WHERE path >= ? AND path < ?",
+                (low, high)
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    @staticmethod
+    def matches(entry, stat, algorithm):
+        """True if a row from load_folder is still valid for this stat result"""
+        if entry is None:
+            return False
+        size, mtime_ns, inode, entry_algorithm = entry[:4]
+        return (size == stat.st_size and mtime_ns == stat.st_mtime_ns
+                and inode == stat.st_ino and entry_algorithm == algorithm)
+
+    def store_many(self, rows):
+        """Insert or replace (path, stat, algorithm, hash, partial hash or None) tuples in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, algorithm, hash, partial)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(self.key(path), stat.st_size, stat.st_mtime_ns, stat.st_ino, algorithm, file_hash, partial_hash)
+                 for path, stat, algorithm, file_hash, partial_hash in rows]
+            )
+
+    def purge_missing(self, folder, seen_paths):
+        """Delete rows under folder whose files were not seen by the last scan"""
+        seen = {self.key(path) for path in seen_paths}
+        vanished = [path for path in self.load_folder(folder) if path not in seen]
+        if vanished:
+            with self._lock, self._conn:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in vanished])
+        return len(vanished)
+
+    def record_move(self, source, destination):
+        """Carry a row over to the file's new location
+
+        A rename keeps size, mtime and inode; a cross-device move keeps size and
+        mtime but gets a new inode, which is refreshed here. Anything else means
+        the content may differ, so the row is dropped.
+        """
+        source, destination = self.key(source), self.key(destination)
+        try:
+            stat = os.stat(destination)
+        except OSError:
+            stat = None
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns FROM files WHERE path = ?", (source,)
+            ).fetchone()
+            if row is None:
+                return
+            if stat is not None and row == (stat.st_size, stat.st_mtime_ns):
+                self._conn.execute(
+                    "UPDATE OR REPLACE files SET path = ?, inode = ? WHERE path = ?",
+                    (destination, stat.st_ino, source)
+                )
+            else:
+                self._conn.execute("DELETE FROM files WHERE path = ?", (source,))
+
+    def refresh_stats(self, paths):
+        """Keep the hashes of files relinked to identical content, taking their new inode and mtime"""
+        rows = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rows.append((stat.st_size, stat.st_mtime_ns, stat.st_ino, self.key(path)))
+        with self._lock, self._conn:
+            self._conn.executemany("UPDATE files SET size = ?, mtime_ns = ?, inode = ? WHERE path = ?", rows)
+
+    def remove(self, path):
+        self.remove_many([path])
+
+    def remove_many(self, paths):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM files WHERE path = ?", [(self.key(path),) for path in paths])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_hash_index(db_path):
+    """Open the index, or return None if it can't be created so scans fall back to hashing everything"""
+    import sqlite3
+
+    try:
+        return HashIndex(db_path)
+    except sqlite3.Error as e:
+        print(f"Error opening hash index {db_path}: {e}. Continuing without it.")
+        return None
@@ -0,0 +1,257 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from image_decoder import DEFAULT_REDUCING_GAP, decode_scaled, fit_size
+from latency_metrics import metrics
+
+
+def image_nbytes(image):
+    """Approximate in-memory size of a decoded image"""
+    width, height = image.size
+    return width * height * max(1, len(image.getbands()))
+
+
+class ImageCache:
+    """Byte-bounded LRU of decoded images keyed by (path, mtime_ns, target size)"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(file_path, target_size):
+        stat = os.stat(file_path)
+        return (str(file_path), stat.st_mtime_ns, tuple(target_size))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, image):
+        size = image_nbytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (image, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+
+    def discard_path(self, file_path):
+        """Drop every cached variant of a file"""
+        self.discard_paths([file_path])
+
+    def discard_paths(self, file_paths):
+        """Drop every cached variant of many files in one pass over the cache"""
+        paths = {str(file_path) for file_path in file_paths}
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in paths]:
+                _, size = self._entries.pop(key)
+                self.current_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class ImagePrefetcher:
+    """Decode and scale the images around the current index in a background thread pool"""
+
+    def __init__(self, cache=None, ahead=3, behind=1, max_workers=2, loader=decode_scaled):
+        self.cache = cache if cache is not None else ImageCache()
+        # loader(file_path, target_size) returns the scaled image, e.g. PreviewCache.load
+        self.loader = loader
+        self.ahead = ahead
+        self.behind = behind
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._pending = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path, target_size):
+        """Return the scaled image, waiting on a pending prefetch or decoding inline on a miss"""
+        key = ImageCache.make_key(file_path, target_size)
+        image = self.cache.get(key)
+        if image is not None:
+            return image
+
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None and not future.cancelled():
+            try:
+                image = future.result()
+            except Exception:
+                image = None
+            if image is not None:
+                return image
+
+        image = self.loader(file_path, target_size)
+        self.cache.put(key, image)
+        return image
+
+    def prefetch(self, image_files, index, target_size):
+        """Schedule the next `ahead` and previous `behind` entries of image_files"""
+        wanted = []
+        for offset in range(1, self.ahead + 1):
+            if index + offset < len(image_files):
+                wanted.append(image_files[index + offset])
+        for offset in range(1, self.behind + 1):
+            if index - offset >= 0:
+                wanted.append(image_files[index - offset])
+
+        keys = []
+        for file_path in wanted:
+            try:
+                keys.append((ImageCache.make_key(file_path, target_size), file_path))
+            except OSError:
+                continue
+
+        with self._lock:
+            wanted_keys = {key for key, _ in keys}
+            for key in [k for k in self._pending if k not in wanted_keys]:
+                self._pending.pop(key).cancel()
+
+            for key, file_path in keys:
+                if key in self._pending or key in self.cache:
+                    continue
+                self._pending[key] = self._executor.submit(
+                    self._decode, key, file_path, target_size, self._generation
+                )
+
+    def _decode(self, key, file_path, target_size, generation):
+        try:
+            image = self.loader(file_path, target_size)
+        except Exception:
+            image = None
+        with self._lock:
+            self._pending.pop(key, None)
+            if image is not None and generation == self._generation:
+                self.cache.put(key, image)
+        return image
+
+    def invalidate(self, file_path=None):
+        """Forget one file, or everything when image_files has been rebuilt"""
+        with self._lock:
+            if file_path is None:
+                self._generation += 1
+                for future in self._pending.values():
+                    future.cancel()
+                self._pending.clear()
+                self.cache.clear()
+                return
+            path = str(file_path)
+            for key in [k for k in self._pending if k[0] == path]:
+                self._pending.pop(key).cancel()
+        self.cache.discard_path(file_path)
+
+    def stats(self):
+        stats = self.cache.stats()
+        with self._lock:
+            stats["pending"] = len(self._pending)
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class ImageVariants:
+    """Decoded source and recently used scaled variants of the image on screen"""
+
+    def __init__(self, max_variants=4):
+        self.max_variants = max_variants
+        self.file_path = None
+        self.source = None
+        self._variants = OrderedDict()
+
+    def _select(self, file_path):
+        if file_path != self.file_path:
+            self.file_path = file_path
+            self.source = None
+            self._variants.clear()
+
+    def get(self, file_path, target_size):
+        if file_path != self.file_path:
+            return None
+        image = self._variants.get(tuple(target_size))
+        if image is not None:
+            self._variants.move_to_end(tuple(target_size))
+        return image
+
+    def put(self, file_path, target_size, image):
+        self._select(file_path)
+        self._variants[tuple(target_size)] = image
+        self._variants.move_to_end(tuple(target_size))
+        while len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)
+
+    def interim(self, file_path, target_size):
+        """Cheap bilinear scale of the largest image already in memory, or None"""
+        if file_path != self.file_path:
+            return None
+        base = self.source if self.source is not None else self._largest_variant()
+        if base is None:
+            return None
+        return base.resize(fit_size(base.size, target_size), Image.Resampling.BILINEAR)
+
+    def _largest_variant(self):
+        if not self._variants:
+            return None
+        return max(self._variants.values(), key=lambda image: image.size[0] * image.size[1])
+
+    def render(self, file_path, target_size, source_size):
+        """High-quality scale of the image for target_size, reading the file only when it must
+
+        A window that shrinks is served from the largest variant already in
+        memory (usually the one load_current_image decoded). Only growing past
+        it decodes the source at `source_size`, once per image.
+        """
+        image = self.get(file_path, target_size)
+        if image is not None:
+            return image
+        self._select(file_path)
+        base = self.source
+        if base is None:
+            largest = self._largest_variant()
+            if largest is not None and fit_size(largest.size, target_size)[0] <= largest.size[0]:
+                base = largest
+            else:
+                self.source = base = decode_scaled(file_path, source_size)
+        with metrics.time("display.resize"):
+            image = base.resize(
+                fit_size(base.size, target_size),
+                Image.Resampling.LANCZOS,
+                reducing_gap=DEFAULT_REDUCING_GAP
+            )
+        self.put(file_path, target_size, image)
+        return image
@@ -0,0 +1,64 @@
+import io
+import math
+from PIL import Image
+from latency_metrics import metrics
+
+
+# Let resize() shrink by an integer factor with a cheap box filter until the
+# image is within this multiple of the target, then finish with LANCZOS
+DEFAULT_REDUCING_GAP = 2.0
+
+
+def fit_size(image_size, target_size):
+    """Scale image_size to fit inside target_size, keeping the aspect ratio"""
+    image_width, image_height = image_size
+    target_width, target_height = target_size
+    scale_factor = min(target_width / image_width, target_height / image_height)
+    return max(1, int(image_width * scale_factor)), max(1, int(image_height * scale_factor))
+
+
+def display_mode(image):
+    """RGBA for images with any kind of transparency, RGB otherwise"""
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        return "RGBA"
+    return "RGB"
+
+
+def reduce_levels(image_size, new_size):
+    """Number of power-of-two resolution levels that can be dropped while staying above new_size"""
+    ratio = min(image_size[0] / new_size[0], image_size[1] / new_size[1])
+    if ratio < 2:
+        return 0
+    return int(math.log2(ratio))
+
+
+def prepare_scaled_decode(image, new_size):
+    """Ask the decoder for the smallest resolution that still covers new_size
+
+    Must be called before the pixel data is loaded. JPEG uses DCT scaling via
+    draft(), JPEG 2000 drops wavelet resolution levels. Other formats are left
+    alone and rely on the reducing_gap resample.
+    """
+    if image.format == "JPEG":
+        image.draft(image.mode, new_size)
+    elif image.format == "JPEG2000":
+        levels = reduce_levels(image.size, new_size)
+        if levels:
+            image.reduce = levels
+    return image
+
+
+def decode_scaled(file_path, target_size, reducing_gap=DEFAULT_REDUCING_GAP):
+    """Decode an image at the smallest sufficient resolution and scale it to fit within target_size"""
+    source = file_path
+    if metrics.enabled:
+        # Read the file up front so disk time is counted apart from decoding
+        with metrics.time("decode.read"), open(file_path, "rb") as f:
+            source = io.BytesIO(f.read())
+    with Image.open(source) as image:
+        new_size = fit_size(image.size, target_size)
+        prepare_scaled_decode(image, new_size)
+        with metrics.time("decode.decode"):
+            image.load()
+        with metrics.time("decode.resize"):
+            return image.resize(new_size, Image.Resampling.LANCZOS, reducing_gap=reducing_gap)
@@ -0,0 +1,419 @@
+"""
+Header-only image metadata for sort orders: capture time, camera, dimensions, format.
+
+JPEG and PNG headers are parsed directly: the markers or chunks are walked
+up to the image data, reading only the EXIF block and the few bytes holding
+the pixel size, so a file costs a couple of small reads and no pixel
+decoding (Pillow's PNG getexif() decodes the whole image). Other formats go
+through Image.open, which also stops at the header. Results are
+cached per folder next to the session snapshots and trusted while a file's
+size and mtime are unchanged, so reopening a folder reads only new files.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+METADATA_VERSION = 2
+
+# Order name -> File > Sort By label; "path" is the order the scan produces
+SORT_ORDERS = {
+    "path": "Path",
+    "name": "Name (Natural)",
+    "capture_time": "Capture Time",
+    "camera": "Camera",
+    "size": "File Size",
+    "dimensions": "Dimensions",
+}
+
+# Files handed to a worker at a time; one future per file costs more than a JPEG header
+METADATA_BATCH_SIZE = 256
+
+# Minimum seconds between progress events
+PROGRESS_INTERVAL = 0.1
+
+# EXIF tags
+MAKE = 0x010F
+MODEL = 0x0110
+ORIENTATION = 0x0112
+DATE_TIME = 0x0132
+EXIF_IFD = 0x8769
+DATE_TIME_ORIGINAL = 0x9003
+SUBSEC_TIME_ORIGINAL = 0x9291
+
+# Start-of-frame markers carry the pixel size; C4, C8 and CC are other tables
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# (size in bytes, struct code) of the TIFF field types read here
+TIFF_TYPES = {2: (1, None), 3: (2, "H"), 4: (4, "L")}
+
+_DIGITS = re.compile(r"(\d+)")
+
+# captured is "YYYY:MM:DD HH:MM:SS[.fraction]" from EXIF, or None; camera is EXIF Make and Model, or None
+ImageMetadata = namedtuple("ImageMetadata", "size mtime_ns width height format orientation captured camera")
+
+
+def natural_key(text):
+    """Sort key that orders embedded numbers by value: IMG_2 before IMG_10"""
+    parts = _DIGITS.split(text.casefold())
+    # Text parts sit at even positions and numbers at odd ones, so tuples always compare like with like
+    return tuple(int(part) if index % 2 else part for index, part in enumerate(parts))
+
+
+def _read_ifd(data, offset, endian, wanted):
+    """Values of the wanted tags in the IFD at offset, as ints or strings"""
+    values = {}
+    try:
+        (count,) = struct.unpack_from(endian + "H", data, offset)
+    except struct.error:
+        return values
+    for index in range(count):
+        try:
+            tag, field_type, length, value = struct.unpack_from(endian + "HHL4s", data, offset + 2 + index * 12)
+        except struct.error:
+            break
+        if tag not in wanted or field_type not in TIFF_TYPES:
+            continue
+        _, code = TIFF_TYPES[field_type]
+        if code is not None:
+            values[tag] = struct.unpack_from(endian + code, value)[0]
+            continue
+        if length <= 4:
+            raw = value[:length]
+        else:
+            (pointer,) = struct.unpack(endian + "L", value)
+            raw = data[pointer:pointer + length]
+        values[tag] = raw.split(b"\0", 1)[0].decode("ascii", "replace").strip()
+    return values
+
+
+def parse_exif(data):
+    """(orientation, captured, camera) from a TIFF-structured EXIF block"""
+    if data[:2] == b"II":
+        endian = "<"
+    elif data[:2] == b"MM":
+        endian = ">"
+    else:
+        return 1, None, None
+    try:
+        (ifd0,) = struct.unpack_from(endian + "L", data, 4)
+    except struct.error:
+        return 1, None, None
+    tags = _read_ifd(data, ifd0, endian, {ORIENTATION, DATE_TIME, EXIF_IFD, MAKE, MODEL})
+    exif = {}
+    if isinstance(tags.get(EXIF_IFD), int):
+        exif = _read_ifd(data, tags[EXIF_IFD], endian, {DATE_TIME_ORIGINAL, SUBSEC_TIME_ORIGINAL})
+    return (tags.get(ORIENTATION, 1),
+            _capture_time(exif.get(DATE_TIME_ORIGINAL) or tags.get(DATE_TIME), exif.get(SUBSEC_TIME_ORIGINAL)),
+            _camera(tags.get(MAKE), tags.get(MODEL)))
+
+
+def _camera(make, model):
+    make = make.strip() if isinstance(make, str) else ""
+    model = model.strip() if isinstance(model, str) else ""
+    # Many models already start with the make ("Canon" / "Canon EOS R5")
+    if make and model.casefold().startswith(make.casefold()):
+        make = ""
+    return " ".join(part for part in (make, model) if part) or None
+
+
+def _capture_time(date_time, subseconds=None):
+    # Unknown dates are written as blanks or zeros
+    if not isinstance(date_time, str) or not date_time[:4].isdigit() or date_time.startswith("0000"):
+        return None
+    if isinstance(subseconds, str) and subseconds.isdigit():
+        # Compared as strings, fractional digits order correctly whatever their length
+        return f"{date_time}.{subseconds}"
+    return date_time
+
+
+def _read_jpeg_header(f):
+    """(width, height, orientation, captured, camera) from a JPEG's markers, or None if it can't be parsed"""
+    if f.read(2) != b"\xff\xd8":
+        return None
+    orientation, captured, camera = 1, None, None
+    while True:
+        marker = f.read(2)
+        # Markers may be preceded by any number of 0xFF fill bytes
+        while marker[:1] == b"\xff" and marker[1:] == b"\xff":
+            marker = b"\xff" + f.read(1)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+        if code in (0xD9, 0xDA):
+            return None
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if code in SOF_MARKERS:
+            header = f.read(5)
+            if len(header) < 5:
+                return None
+            _, height, width = struct.unpack(">BHH", header)
+            return width, height, orientation, captured, camera
+        if code == 0xE1 and captured is None and camera is None:
+            segment = f.read(length - 2)
+            if segment.startswith(b"Exif\0\0"):
+                orientation, captured, camera = parse_exif(segment[6:])
+        else:
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _read_png_header(f):
+    """(width, height, orientation, captured, camera) from a PNG's chunks before the image data, or None"""
+    if f.read(8) != b"\x89PNG\r\n\x1a\n":
+        return None
+    width = height = None
+    orientation, captured, camera = 1, None, None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return None
+        length, chunk_type = struct.unpack(">L4s", chunk_header)
+        if chunk_type == b"IHDR":
+            width, height = struct.unpack(">LL", f.read(8))
+            f.seek(length - 8 + 4, os.SEEK_CUR)
+        elif chunk_type == b"eXIf":
+            orientation, captured, camera = parse_exif(f.read(length))
+            f.seek(4, os.SEEK_CUR)
+        elif chunk_type in (b"IDAT", b"IEND"):
+            # eXIf has to come before the image data
+            return (width, height, orientation, captured, camera) if width is not None else None
+        else:
+            f.seek(length + 4, os.SEEK_CUR)
+
+
+# Extension -> (header reader, format name) for the formats parsed without Pillow
+HEADER_READERS = {
+    ".jpg": (_read_jpeg_header, "JPEG"),
+    ".jpeg": (_read_jpeg_header, "JPEG"),
+    ".png": (_read_png_header, "PNG"),
+}
+
+
+def _read_with_pillow(file_path):
+    from PIL import Image
+
+    with Image.open(file_path) as image:
+        width, height = image.size
+        exif = image.getexif()
+        details = exif.get_ifd(EXIF_IFD)
+        captured = _capture_time(details.get(DATE_TIME_ORIGINAL) or exif.get(DATE_TIME),
+                                 details.get(SUBSEC_TIME_ORIGINAL))
+        return width, height, image.format, exif.get(ORIENTATION, 1), captured, _camera(exif.get(MAKE), exif.get(MODEL))
+
+
+def read_metadata(file_path, stat=None):
+    """Metadata of one file from its header; files that can't be read get zero dimensions and no format"""
+    if stat is None:
+        stat = os.stat(file_path)
+    try:
+        reader = HEADER_READERS.get(os.path.splitext(file_path)[1].lower())
+        if reader is not None:
+            with open(file_path, "rb") as f:
+                header = reader[0](f)
+            if header is not None:
+                return ImageMetadata(stat.st_size, stat.st_mtime_ns, header[0], header[1], reader[1], *header[2:])
+        # Other formats, and files whose extension doesn't match their content
+        return ImageMetadata(stat.st_size, stat.st_mtime_ns, *_read_with_pillow(file_path))
+    except Exception:
+        return ImageMetadata(stat.st_size, stat.st_mtime_ns, 0, 0, None, 1, None, None)
+
+
+def metadata_path(directory, folder):
+    """Metadata cache file for a folder, next to its session snapshots"""
+    key = os.path.abspath(folder)
+    return Path(directory) / (hashlib.md5(key.encode("utf-8")).hexdigest() + ".metadata.json")
+
+
+class MetadataCache:
+    """Metadata of a folder's images keyed by path relative to it, persisted as JSON"""
+
+    def __init__(self, path, folder):
+        self.path = Path(path)
+        self.folder = Path(folder)
+        self._prefix = os.path.join(str(folder), "")
+        self.entries = {}
+        self.changed = False
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == METADATA_VERSION and data.get("folder") == os.path.abspath(self.folder):
+            self.entries = {relative: ImageMetadata(*values) for relative, values in data["files"].items()}
+        return self
+
+    def _relative(self, file_path):
+        name = str(file_path)
+        return name[len(self._prefix):] if name.startswith(self._prefix) else None
+
+    def get(self, file_path, stat):
+        """Cached metadata for a file, if it's still valid for this stat result"""
+        entry = self.entries.get(self._relative(file_path))
+        if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return entry
+        return None
+
+    def put(self, file_path, metadata):
+        relative = self._relative(file_path)
+        if relative is not None:
+            self.entries[relative] = metadata
+            self.changed = True
+
+    def save(self, keep=None):
+        """Write the cache atomically; with keep, entries for other files are dropped first"""
+        if keep is not None:
+            keep = {self._relative(file_path) for file_path in keep}
+            stale = [relative for relative in self.entries if relative not in keep]
+            for relative in stale:
+                del self.entries[relative]
+            self.changed = self.changed or bool(stale)
+        if not self.changed:
+            return
+        data = {
+            "version": METADATA_VERSION,
+            "folder": os.path.abspath(self.folder),
+            "files": {relative: list(entry) for relative, entry in self.entries.items()},
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        self.changed = False
+
+
+def _read_batch(files, cache):
+    results = []
+    for file_path in files:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        metadata = cache.get(file_path, stat) if cache is not None else None
+        results.append((file_path, metadata or read_metadata(file_path, stat), metadata is None))
+    return results
+
+
+def extract_metadata(files, cache=None, workers=4, progress=None, cancel_event=None):
+    """{path: ImageMetadata} for files, read on a thread pool and reusing valid cache entries
+
+    Files that vanish are left out. New entries are added to the cache;
+    saving it is up to the caller. `progress` is called with (done, total)
+    and setting `cancel_event` returns None.
+    """
+    files = list(files)
+    metadata = {}
+    done = 0
+    last_report = 0.0
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="metadata")
+    try:
+        futures = [executor.submit(_read_batch, files[start:start + METADATA_BATCH_SIZE], cache)
+                   for start in range(0, len(files), METADATA_BATCH_SIZE)]
+        for future in futures:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            for file_path, entry, is_new in future.result():
+                metadata[file_path] = entry
+                if is_new and cache is not None:
+                    cache.put(file_path, entry)
+            done += METADATA_BATCH_SIZE
+            now = time.monotonic()
+            if progress and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                progress(min(done, len(files)), len(files))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return metadata
+
+
+def sort_key(order, folder, metadata, read=read_metadata):
+    """Key function putting image paths in `order`, or None for path order
+
+    Every key ends with the path's natural key and then the path itself, as
+    natural keys tie for names like IMG_01 and IMG_1, so the order is total
+    and bisect can search it. Files missing from `metadata` are
+    read on the spot with `read` and added to it.
+    """
+    if order == "path":
+        return None
+    prefix = os.path.join(str(folder), "")
+
+    def name_key(file_path):
+        name = str(file_path)
+        return natural_key(name[len(prefix):] if name.startswith(prefix) else name), name
+
+    if order == "name":
+        return name_key
+
+    def entry(file_path):
+        value = metadata.get(file_path)
+        if value is None:
+            try:
+                value = metadata[file_path] = read(file_path)
+            except OSError:
+                value = ImageMetadata(0, 0, 0, 0, None, 1, None, None)
+        return value
+
+    def capture_time(value):
+        # Files without an EXIF date fall back to their modification time
+        return value.captured or time.strftime("%Y:%m:%d %H:%M:%S", time.localtime(value.mtime_ns / 1e9))
+
+    if order == "capture_time":
+        def key(file_path):
+            return capture_time(entry(file_path)), name_key(file_path)
+    elif order == "camera":
+        def key(file_path):
+            value = entry(file_path)
+            # Files without a camera sort after every camera, each camera's shots in capture order
+            return value.camera is None, (value.camera or "").casefold(), capture_time(value), name_key(file_path)
+    elif order == "size":
+        def key(file_path):
+            return entry(file_path).size, name_key(file_path)
+    elif order == "dimensions":
+        def key(file_path):
+            value = entry(file_path)
+            return value.width * value.height, value.width, name_key(file_path)
+    else:
+        raise ValueError(f"Unknown sort order: {order}")
+    return key
+
+
+def bisect_left_key(items, value, key):
+    """bisect_left over key(item), for lists kept in a sort_key order (bisect's own key= needs 3.10)"""
+    low, high = 0, len(items)
+    while low < high:
+        middle = (low + high) // 2
+        if key(items[middle]) < value:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def sort_image_files(files, order, folder, cache=None, workers=4):
+    """files in `order`, reading the metadata it needs first"""
+    if order == "path":
+        return sorted(files)
+    metadata = {}
+    if order != "name":
+        metadata = extract_metadata(files, cache, workers)
+    return sorted(files, key=sort_key(order, folder, metadata))
@@ -0,0 +1,270 @@
+"""
+Lazily decoded image pyramid for deep zoom.
+
+Level 0 is the image at full resolution and every level above halves it,
+down to the level that fits in one tile. Only tiles that are asked for get
+decoded, and how depends on what the file allows:
+
+- Uncompressed files (TIFF, BMP, PPM) store pixels row by row at known
+  offsets, so a tile is decoded straight from the rows it covers, in bands
+  of at most BAND_PIXELS, and reduced band by band for coarser levels.
+  Memory stays at a band plus a tile however large the image is. This
+  narrows Pillow's decode by rewriting the image's size and tile list;
+  if a Pillow version doesn't keep those where expected, the file is
+  treated like the formats below instead.
+- JPEG and JPEG 2000 decode at 1/2, 1/4, 1/8 (JPEG) or any power of two
+  (JPEG 2000) directly, so a level is decoded whole at its own size and
+  tiles are cut from it.
+- Anything else is decoded once at full size and reduced from there.
+
+No single decode may allocate more than the level budget or more pixels
+than Image.MAX_IMAGE_PIXELS; levels that would are reported unavailable
+instead of being decoded, and min_level says how far in a file can zoom.
+Files Pillow itself refuses to open as decompression bombs are rejected.
+"""
+
+import math
+import threading
+import warnings
+from PIL import ExifTags, Image
+from image_cache import ImageCache
+from image_decoder import display_mode
+
+
+TILE_SIZE = 256
+
+# Largest band of full-resolution pixels decoded at once from an uncompressed file
+BAND_PIXELS = 4 * 1024 * 1024
+
+# Bits per pixel of the raw modes whose rows can be addressed by offset
+RAW_BITS = {
+    "1": 1, "L": 8, "P": 8, "LA": 16, "I;16": 16, "I;16B": 16, "I;16L": 16,
+    "RGB": 24, "BGR": 24, "RGBA": 32, "BGRA": 32, "RGBX": 32, "BGRX": 32, "CMYK": 32,
+}
+
+_warnings_lock = threading.Lock()
+
+
+class ZoomUnavailable(Exception):
+    pass
+
+
+class _RegionUnsupported(Exception):
+    """This Pillow's image internals aren't laid out the way region decoding expects"""
+
+
+def open_image(file_path):
+    """Image.open, with images over MAX_IMAGE_PIXELS left to the caller to handle
+
+    Pillow warns about them on open; the pyramid never decodes them whole,
+    so the warning is dropped here rather than printed or, under -W error,
+    raised. Images over twice the limit still raise DecompressionBombError.
+    """
+    with _warnings_lock, warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        return Image.open(file_path)
+
+
+def pixel_limit():
+    return Image.MAX_IMAGE_PIXELS or math.inf
+
+
+def raw_rows(image):
+    """The image's tiles as (extents, offset, rawmode, stride, ystep), or None if they aren't plain rows"""
+    tiles = []
+    for tile in image.tile:
+        codec, extents, offset, args = tile
+        if codec != "raw":
+            return None
+        if isinstance(args, str):
+            args = (args,)
+        rawmode, stride, ystep = (tuple(args) + (0, 1))[:3]
+        if not stride:
+            if rawmode not in RAW_BITS:
+                return None
+            stride = ((extents[2] - extents[0]) * RAW_BITS[rawmode] + 7) // 8
+        tiles.append((extents, offset, rawmode, stride, ystep))
+    return tiles or None
+
+
+class ImagePyramid:
+    def __init__(self, file_path, cache_bytes=256 * 1024 * 1024):
+        self.file_path = file_path
+        # Half the budget holds decoded levels, the other half tiles
+        self.level_bytes = cache_bytes // 2
+        self.tiles = ImageCache(cache_bytes // 2)
+        self._levels = ImageCache(self.level_bytes)
+        self._level_lock = threading.RLock()
+
+        with open_image(file_path) as image:
+            self.size = image.size
+            self.format = image.format
+            self.bands = len(image.getbands())
+            # Rotated files are transposed after decoding, so their rows aren't display rows
+            self.row_addressable = (raw_rows(image) is not None
+                                    and image.getexif().get(ExifTags.Base.Orientation, 1) == 1)
+
+        self.max_level = 0
+        while max(self.level_size(self.max_level)) > TILE_SIZE:
+            self.max_level += 1
+        self.min_level = self._find_min_level()
+
+    def level_size(self, level):
+        factor = 2 ** level
+        return math.ceil(self.size[0] / factor), math.ceil(self.size[1] / factor)
+
+    def tile_grid(self, level):
+        """Columns and rows of tiles at a level"""
+        width, height = self.level_size(level)
+        return math.ceil(width / TILE_SIZE), math.ceil(height / TILE_SIZE)
+
+    def _decode_pixels(self, level):
+        """Pixels allocated by the decode that produces a whole level"""
+        if self.format == "JPEG":
+            # DCT scaling stops at 1/8; coarser levels are reduced from that
+            width, height = self.level_size(min(level, 3))
+            return width * height
+        if self.format == "JPEG2000":
+            width, height = self.level_size(level)
+            return width * height
+        return self.size[0] * self.size[1]
+
+    def _find_min_level(self):
+        if self.row_addressable:
+            return 0
+        for level in range(self.max_level + 1):
+            pixels = self._decode_pixels(level)
+            if pixels <= pixel_limit() and pixels * self.bands <= self.level_bytes:
+                return level
+        return None
+
+    def tile(self, level, column, row):
+        """One tile of a level, decoded on first use; safe to call from several threads"""
+        if self.min_level is None or level < self.min_level:
+            raise ZoomUnavailable(self.unavailable_message())
+        key = (str(self.file_path), level, column, row)
+        tile = self.tiles.get(key)
+        if tile is not None:
+            return tile
+
+        width, height = self.level_size(level)
+        box = (column * TILE_SIZE, row * TILE_SIZE,
+               min(width, (column + 1) * TILE_SIZE), min(height, (row + 1) * TILE_SIZE))
+        tile = None
+        if self.row_addressable:
+            try:
+                tile = self._read_region(box, 2 ** level)
+            except _RegionUnsupported:
+                self._disable_region_decoding()
+                if self.min_level is None or level < self.min_level:
+                    raise ZoomUnavailable(self.unavailable_message())
+        if tile is None:
+            tile = self._level_image(level).crop(box)
+        if tile.mode not in ("RGB", "RGBA", "L"):
+            tile = tile.convert(display_mode(tile))
+        self.tiles.put(key, tile)
+        return tile
+
+    def _disable_region_decoding(self):
+        """Decode whole levels from now on, within the same budget as other formats"""
+        with self._level_lock:
+            if self.row_addressable:
+                print(f"Region decoding is unavailable with Pillow {Image.__version__}; "
+                      f"decoding {self.file_path} whole for zoom")
+                self.row_addressable = False
+                self.min_level = self._find_min_level()
+
+    def unavailable_message(self):
+        if self.min_level is None:
+            return "This image is too large to decode within the zoom memory budget or Image.MAX_IMAGE_PIXELS"
+        return f"Zoom is limited to 1:{2 ** self.min_level} for this image (memory budget)"
+
+    def _level_image(self, level):
+        """A whole level, for formats that can't decode regions"""
+        key = (str(self.file_path), level)
+        image = self._levels.get(key)
+        if image is not None:
+            return image
+        # One decode at a time, so tiles requested together don't each decode the level
+        with self._level_lock:
+            image = self._levels.get(key)
+            if image is None:
+                image = self._decode_level(level)
+                self._levels.put(key, image)
+        return image
+
+    def _decode_level(self, level):
+        level_size = self.level_size(level)
+        if self.format not in ("JPEG", "JPEG2000") and level > 0:
+            # Reduce from full size, which is kept for the other levels
+            return self._level_image(0).reduce(2 ** level)
+
+        with open_image(self.file_path) as image:
+            if self.format == "JPEG" and level > 0:
+                image.draft(image.mode, self.level_size(min(level, 3)))
+            elif self.format == "JPEG2000":
+                image.reduce = level
+            image.load()
+            if image.size != level_size:
+                image = image.resize(level_size, Image.Resampling.BOX)
+            return image
+
+    def _read_region(self, box, factor):
+        """Decode a level box from an uncompressed file band by band, reducing each band by factor"""
+        x0, y0, x1, y1 = (value * factor for value in box)
+        x1 = min(x1, self.size[0])
+        y1 = min(y1, self.size[1])
+        # Bands are whole multiples of factor, so each reduces without seams
+        band_rows = max(factor, BAND_PIXELS // max(1, x1 - x0) // factor * factor)
+
+        bands = []
+        for top in range(y0, y1, band_rows):
+            band = self._read_rows(x0, x1, top, min(y1, top + band_rows))
+            bands.append(band.reduce(factor) if factor > 1 else band)
+        if len(bands) == 1:
+            return bands[0]
+        region = Image.new(bands[0].mode, (box[2] - box[0], box[3] - box[1]))
+        offset = 0
+        for band in bands:
+            region.paste(band, (0, offset))
+            offset += band.size[1]
+        return region
+
+    def _read_rows(self, x0, x1, top, bottom):
+        """Full-resolution pixels in x0..x1, top..bottom, decoding only the rows they lie on"""
+        with open_image(self.file_path) as image:
+            selected = []
+            for (tx0, ty0, tx1, ty1), offset, rawmode, stride, ystep in raw_rows(image):
+                first, last = max(ty0, top), min(ty1, bottom)
+                if first >= last or tx1 <= x0 or tx0 >= x1:
+                    continue
+                # Bottom-up files (BMP) store the last row first
+                skipped = ty1 - last if ystep < 0 else first - ty0
+                selected.append(((tx0, first, tx1, last), offset + skipped * stride, (rawmode, stride, ystep)))
+
+            left = min(extents[0] for extents, _, _ in selected)
+            right = max(extents[2] for extents, _, _ in selected)
+            size = (right - left, bottom - top)
+            # Pillow keeps no public way to decode part of a raw file; check the internals used are there
+            if "_size" not in vars(image) or image.format == "TIFF" and "_tile_size" not in vars(image):
+                raise _RegionUnsupported()
+            image.tile = [
+                ("raw", (ex0 - left, ey0 - top, ex1 - left, ey1 - top), offset, args)
+                for (ex0, ey0, ex1, ey1), offset, args in selected
+            ]
+            # Decode into a buffer the size of these rows rather than the whole image
+            image._size = size
+            if "_tile_size" in vars(image):
+                # TIFF allocates, and checks against MAX_IMAGE_PIXELS, by its own layout size
+                image._tile_size = size
+            if image.size != size:
+                raise _RegionUnsupported()
+            image.load()
+            if image.size != size:
+                raise _RegionUnsupported()
+            return image.crop((x0 - left, 0, x1 - left, bottom - top))
+
+    def cache_stats(self):
+        tiles = self.tiles.stats()
+        levels = self._levels.stats()
+        return {"bytes": tiles["bytes"] + levels["bytes"], "tiles": tiles["entries"]}
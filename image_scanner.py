@@ -0,0 +1,98 @@
+"""
+Directory scanning on os.scandir.
+
+Entries are classified with the d_type cached by scandir, so plain files and
+directories never need a stat call of their own. Symlinked directories are
+not followed.
+"""
+
+import os
+from pathlib import Path
+
+
+def _sort_key(entry):
+    return os.path.normcase(entry.name)
+
+
+def _sorted_entries(directory):
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=_sort_key)
+    except OSError:
+        return []
+
+
+def iter_image_files(root, extensions, recursive=True, cancel_event=None, directories=None):
+    """Yield image paths under root as they are found
+
+    Each directory's entries are visited in sorted order, depth first, so the
+    paths come out in the same order as sorted() would put them and callers
+    can show results before the scan finishes. Every directory visited is
+    appended to `directories` when a list is given.
+    """
+    if directories is not None:
+        directories.append(Path(root))
+    stack = [iter(_sorted_entries(root))]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        entry = next(stack[-1], None)
+        if entry is None:
+            stack.pop()
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    if directories is not None:
+                        directories.append(Path(entry.path))
+                    stack.append(iter(_sorted_entries(entry.path)))
+            elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                yield Path(entry.path)
+        except OSError:
+            continue
+
+
+def _split_entries(directory):
+    """(file entries, subdirectory paths) of a directory, in sorted order"""
+    files = []
+    subdirectories = []
+    for entry in _sorted_entries(directory):
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append(Path(entry.path))
+            else:
+                files.append(entry)
+        except OSError:
+            continue
+    return files, subdirectories
+
+
+def walk_tree(root, topdown=True):
+    """os.walk replacement yielding (directory, file_entries, subdirectories) from scandir entries
+
+    The tree is walked with an explicit stack, so its depth isn't limited by
+    the recursion limit. As with os.walk, a top-down caller may prune the
+    subdirectories list before the walk descends.
+    """
+    root = Path(root)
+    if topdown:
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            files, subdirectories = _split_entries(directory)
+            yield directory, files, subdirectories
+            stack.extend(reversed(subdirectories))
+        return
+
+    # Bottom-up: a directory is yielded once all of its subdirectories have been
+    files, subdirectories = _split_entries(root)
+    stack = [(root, files, subdirectories, iter(subdirectories))]
+    while stack:
+        directory, files, subdirectories, remaining = stack[-1]
+        subdirectory = next(remaining, None)
+        if subdirectory is None:
+            stack.pop()
+            yield directory, files, subdirectories
+            continue
+        child_files, child_subdirectories = _split_entries(subdirectory)
+        stack.append((subdirectory, child_files, child_subdirectories, iter(child_subdirectories)))
@@ -1,11 +1,52 @@
 import tkinter as tk
 from tkinter import messagebox, filedialog, Menu, simpledialog, ttk
-from PIL import Image, ImageTk
+from PIL import ImageTk
+import bisect
+import os
+import queue
 import sys
+import threading
 import time
 from pathlib import Path
+from animation_player import ANIMATED_EXTENSIONS, AnimationPlayer
 from config_manager import ConfigManager
-from file_handler import FileHandler
+from file_handler import FileHandler, default_hash_workers, format_bytes
+from file_operations import FileOperationQueue
+from folder_watcher import FolderWatcher
+from hash_index import open_hash_index
+from operation_journal import open_operation_journal
+from image_cache import ImageCache, ImagePrefetcher, ImageVariants
+from image_decoder import decode_scaled
+from image_metadata import (SORT_ORDERS, MetadataCache, bisect_left_key, extract_metadata, metadata_path,
+                            sort_key)
+from latency_metrics import metrics
+from preview_cache import PreviewCache, bucket_for
+from session_snapshot import (iter_snapshot_changes, load_snapshot, remove_snapshot, save_snapshot,
+                              snapshot_files, snapshot_path)
+
+
+# Quiet period after the last <Configure> event before the final render
+RESIZE_SETTLE_MS = 150
+
+# How often finished background file operations are collected on the Tk thread
+FILE_QUEUE_POLL_MS = 100
+
+# Folder scans hand paths to the UI in batches of this size, or sooner after SCAN_FLUSH_SECONDS
+SCAN_BATCH_SIZE = 1000
+SCAN_FLUSH_SECONDS = 0.05
+SCAN_POLL_MS = 30
+
+# How often changes reported by the folder watcher are applied
+WATCH_POLL_MS = 250
+
+# Batches larger than this remove their files from image_files with one list rebuild
+BATCH_REBUILD_THRESHOLD = 64
+
+# How often progress of the metadata read behind File > Sort By is collected
+METADATA_POLL_MS = 100
+
+# How often the performance overlay is refreshed while it is shown
+METRICS_OVERLAY_MS = 500
 
 
 class ImageSorter:
@@ -31,11 +72,84 @@ class ImageSorter:
         self.image_files = []
         self.current_index = 0
         
+        # Folder scans run in the background and fill image_files as they go
+        self.scanning = False
+        self.scan_cancel = None
+        # Directories the image list was built from, fingerprinted in the session snapshot
+        self.known_directories = []
+        self.folder_watcher = None
+        
         # Flag to prevent processing during an action
         self.processing_action = False
         
+        # Previews kept on disk between sessions
+        preview_config = self.config_manager.get_preview_cache_config()
+        self.preview_cache = None
+        if preview_config.get("enabled", True):
+            self.preview_cache = PreviewCache(
+                preview_config.get("directory") or None,
+                preview_config.get("disk_mb", 1024) * 1024 * 1024
+            )
+        self.warmed_bucket = None
+        
+        # Background decode of the images around current_index
+        prefetch_config = self.config_manager.get_prefetch_config()
+        self.prefetcher = ImagePrefetcher(
+            ImageCache(prefetch_config.get("cache_mb", 256) * 1024 * 1024),
+            ahead=prefetch_config.get("ahead", 3),
+            behind=prefetch_config.get("behind", 1),
+            max_workers=prefetch_config.get("workers", 2),
+            loader=self.preview_cache.load if self.preview_cache else decode_scaled
+        )
+        
+        # Frame playback of the animated GIF or multi-page TIFF on screen
+        self.animation_config = self.config_manager.get_animation_config()
+        self.animation = None
+        
+        # Scaled variants of the image on screen, reused while resizing
+        self.variants = ImageVariants()
+        self.displayed = None
+        self._resize_job = None
+        self._interim_pending = False
+        
+        # Moves and recycles run in the background so sorting never waits on disk
+        file_operations_config = self.config_manager.get_file_operations_config()
+        self.file_queue = FileOperationQueue(workers=file_operations_config.get("workers", 2))
+        
+        # Stage latencies, shown by the performance overlay and written to metrics.json on exit
+        self.metrics_config = self.config_manager.get_metrics_config()
+        metrics.enabled = self.metrics_config.get("enabled", False)
+        self.metrics_overlay = None
+        self._overlay_job = None
+        self.key_pressed_at = None
+        
+        # Sorting decisions made in this folder, for File > Export Decisions
+        self.session_decisions = {}
+        
+        # The order image_files is in (see image_metadata.SORT_ORDERS) and the header metadata it is sorted by
+        self.image_order = "path"
+        self.image_sort_key = None
+        self.image_metadata = {}
+        self.metadata_cancel = None
+        
+        # Thumbnail grid window, while it is open
+        self.grid_view = None
+        
+        # Deep zoom window for the current image, while it is open
+        self.zoom_view = None
+        
+        # Content hashes persisted between duplicate scans
+        self.hash_index = open_hash_index(self.config_manager.get_hash_index_path())
+        
+        # Write-ahead record of moves and recycles, for crash recovery and undo
+        self.journal = open_operation_journal(self.config_manager.get_journal_path())
+        # First journal operation of the open folder's session; undo stops there
+        self.undo_since_id = None
+        
         self.setup_ui()
         self.bind_keys()
+        self.recover_interrupted_operations()
+        self.root.after(FILE_QUEUE_POLL_MS, self.poll_file_operations)
         
         # Bind window resize event
         self.root.bind('<Configure>', self.on_window_resize)
@@ -101,6 +215,15 @@ class ImageSorter:
         )
         self.status_label.pack()
         
+        self.queue_label = tk.Label(
+            self.bottom_frame, 
+            text="", 
+            fg="gray", 
+            bg=self.root.cget('bg'),
+            font=("Arial", 9)
+        )
+        self.queue_label.pack()
+        
         self.action_labels = {}
     
     def create_menu(self):
@@ -110,6 +233,7 @@ class ImageSorter:
         file_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Open Folder...", command=self.open_folder_dialog)
+        file_menu.add_command(label="Export Decisions...", command=self.export_decisions_dialog)
         file_menu.add_separator()
         
         self.search_subfolders_var = tk.BooleanVar(value=self.config_manager.get_search_subfolders())
@@ -119,40 +243,373 @@ class ImageSorter:
             command=self.toggle_search_subfolders
         )
         
+        sort_menu = Menu(file_menu, tearoff=0)
+        file_menu.add_cascade(label="Sort By", menu=sort_menu)
+        self.sort_order_var = tk.StringVar(value=self.config_manager.get_sort_config().get("order", "path"))
+        for order, label in SORT_ORDERS.items():
+            sort_menu.add_radiobutton(label=label, value=order, variable=self.sort_order_var,
+                                      command=self.change_sort_order)
+        
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
         # Edit menu
         edit_menu = Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Edit", menu=edit_menu)
+        edit_menu.add_command(label="Undo Last Move", accelerator="Ctrl+Z", command=self.undo_moves)
+        edit_menu.add_command(label="Undo Last Moves...", command=self.undo_moves_dialog)
+        edit_menu.add_separator()
         edit_menu.add_command(label="Move Images to Main Folder", command=self.move_images_to_main_folder_dialog)
         edit_menu.add_separator()
         edit_menu.add_command(label="Find Duplicates...", command=self.find_duplicates_dialog)
+        edit_menu.add_command(label="Find Similar Images...", command=lambda: self.find_duplicates_dialog(similar=True))
+        
+        # View menu
+        view_menu = Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="View", menu=view_menu)
+        view_menu.add_command(label="Grid Triage", accelerator="Ctrl+G", command=self.open_grid_view)
+        view_menu.add_command(label="Zoom", accelerator="Z", command=self.open_zoom_view)
+        self.metrics_overlay_var = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(
+            label="Performance Overlay",
+            accelerator="F3",
+            variable=self.metrics_overlay_var,
+            command=self.toggle_metrics_overlay
+        )
     
     def open_folder_dialog(self):
         folder = filedialog.askdirectory(title="Select folder containing images")
         if folder:
             self.load_folder(Path(folder))
     
+    def export_decisions_dialog(self):
+        if not self.session_decisions:
+            messagebox.showinfo("Export Decisions", "No images have been sorted in this folder yet.")
+            return
+        
+        export_path = filedialog.asksaveasfilename(
+            title="Export decisions",
+            defaultextension=".jsonl",
+            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")]
+        )
+        if not export_path:
+            return
+        
+        # Paths relative to the open folder, so batch_sort.py can replay them against another copy
+        decisions = []
+        for file_path, decision in self.session_decisions.items():
+            try:
+                file_path = file_path.relative_to(self.folder_path)
+            except ValueError:
+                pass
+            decisions.append((file_path.as_posix(), decision))
+        from batch_sort import write_decisions
+        try:
+            write_decisions(export_path, decisions)
+        except OSError as e:
+            messagebox.showerror("Export Decisions", f"Error writing {export_path}: {e}")
+            return
+        self.status_label.config(text=f"Exported {len(decisions)} decision(s) to {Path(export_path).name}", fg="green")
+    
     def toggle_search_subfolders(self):
         self.config_manager.set_search_subfolders(self.search_subfolders_var.get())
         if self.folder_path:
             self.load_folder(self.folder_path)
     
-    def load_folder(self, folder_path):
+    def load_folder(self, folder_path, resume=True):
+        """Open a folder, resuming its saved session when there is one
+
+        resume=False forces a full scan, for when the folder is known to have
+        changed in ways a snapshot can't follow.
+        """
+        # Let queued moves land before the folder is scanned again
+        self.file_queue.wait_idle()
+        self.save_session()
+        if folder_path != self.folder_path:
+            self.session_decisions = {}
+            # Undo only reaches back to moves made since this folder was opened
+            self.undo_since_id = self.journal.next_id if self.journal else None
         self.folder_path = folder_path
         search_subfolders = self.config_manager.get_search_subfolders()
-        self.file_handler = FileHandler(self.folder_path, search_subfolders)
-        self.image_files = self.file_handler.get_image_files()
+        hash_algorithm = self.config_manager.get_duplicates_config().get("hash_algorithm", "blake2b")
+        self.file_handler = FileHandler(self.folder_path, search_subfolders, self.hash_index, hash_algorithm, self.journal)
+        self.image_files = []
+        self.current_index = 0
+        self.warmed_bucket = None
+        if self.metadata_cancel is not None:
+            self.metadata_cancel.set()
+            self.metadata_cancel = None
+        self.image_metadata = {}
+        self.set_list_order("path")
+        self.stop_animation()
+        self.prefetcher.invalidate()
+        self.start_folder_watch()
+        self.start_folder_scan(resume)
+    
+    def session_path(self):
+        return snapshot_path(self.config_manager.get_session_directory(), self.folder_path,
+                             self.file_handler.search_subfolders)
+    
+    def save_session(self):
+        """Snapshot the remaining images and position so the folder reopens instantly"""
+        if not self.file_handler or self.scanning or not self.config_manager.get_session_config().get("resume", True):
+            return
+        session_path = self.session_path()
+        if not self.image_files:
+            remove_snapshot(session_path)
+            return
+        try:
+            save_snapshot(session_path, self.folder_path, self.image_files, self.current_index, self.known_directories,
+                          self.image_order)
+        except (OSError, ValueError) as e:
+            print(f"Error saving session for {self.folder_path}: {e}")
+    
+    def start_folder_scan(self, resume=True):
+        """Scan the folder on a worker thread; the first image shows as soon as it is found
+
+        With a saved session the snapshot's list is used instead: it is sent
+        from the saved position onwards, so the image that was on screen comes
+        first, then the images before it are put in front. Only directories
+        that changed since are listed again.
+        """
+        if self.scan_cancel is not None:
+            self.scan_cancel.set()
+        cancel_event = threading.Event()
+        self.scan_cancel = cancel_event
+        self.scanning = True
+        self.scan_found = 0
+        results = queue.Queue()
+        directories = []
+        file_handler = self.file_handler
+        folder_path = self.folder_path
+        session_path = None
+        if resume and self.config_manager.get_session_config().get("resume", True):
+            session_path = self.session_path()
         
+        def scan():
+            snapshot = load_snapshot(session_path, folder_path) if session_path else None
+            if snapshot is not None:
+                results.put(("order", snapshot.get("order", "path")))
+                position = snapshot["position"]
+                for start in range(position, len(snapshot["files"]), SCAN_BATCH_SIZE):
+                    if cancel_event.is_set():
+                        return
+                    results.put(snapshot_files(snapshot, folder_path, start, start + SCAN_BATCH_SIZE))
+                if position:
+                    results.put(("prepend", snapshot_files(snapshot, folder_path, 0, position)))
+                for event in iter_snapshot_changes(snapshot, folder_path, file_handler.image_extensions,
+                                                   file_handler.search_subfolders, cancel_event, directories):
+                    results.put(event)
+                results.put(None)
+                return
+            
+            batch = []
+            last_flush = None
+            for file_path in file_handler.iter_image_files(cancel_event, directories):
+                batch.append(file_path)
+                now = time.monotonic()
+                if last_flush is None or len(batch) >= SCAN_BATCH_SIZE or now - last_flush >= SCAN_FLUSH_SECONDS:
+                    results.put(batch)
+                    batch = []
+                    last_flush = now
+            results.put(batch)
+            results.put(None)
+        
+        threading.Thread(target=scan, name="folder-scan", daemon=True).start()
+        self.image_label.configure(image="", text="Scanning folder...", fg="white", font=("Arial", 16), compound="center")
+        self.root.after(SCAN_POLL_MS, lambda: self.poll_folder_scan(results, cancel_event, directories))
+    
+    def poll_folder_scan(self, results, cancel_event, directories):
+        """Append newly found images and apply changes found while validating a resumed session"""
+        if cancel_event is not self.scan_cancel:
+            return
+        
+        finished = False
+        new_files = []
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                finished = True
+                break
+            if isinstance(item, list):
+                new_files.extend(item)
+                continue
+            # Events come after the batches they refer to
+            self.append_scanned_files(new_files)
+            new_files = []
+            kind, value = item
+            if kind == "prepend":
+                self.prepend_scanned_files(value)
+            elif kind == "order":
+                self.set_list_order(value)
+            else:
+                self.apply_folder_event(kind, value)
+        self.append_scanned_files(new_files)
+        
+        if finished:
+            self.scanning = False
+            self.scan_cancel = None
+            self.known_directories = directories
+            self.apply_sort_order()
+            if not self.scan_found:
+                self.show_no_images_message()
+            elif not self.image_files:
+                self.show_completion_message()
+            else:
+                self.warm_previews()
+        
+        if self.image_files:
+            self.update_progress()
+        if not finished:
+            self.root.after(SCAN_POLL_MS, lambda: self.poll_folder_scan(results, cancel_event, directories))
+    
+    def prepend_scanned_files(self, new_files):
+        """Put the part of a resumed session before the saved position in front, keeping the image on screen"""
+        was_empty = not self.image_files
+        self.image_files[:0] = new_files
+        self.scan_found += len(new_files)
+        if was_empty:
+            # Everything from the saved position on was sorted before this arrived
+            self.current_index = len(self.image_files) - 1
+            self.create_action_labels()
+            self.load_current_image()
+        else:
+            self.current_index += len(new_files)
+            self.update_progress()
+    
+    def append_scanned_files(self, new_files):
+        """Add files from the scan; paths arrive in sorted order so they always go at the end"""
+        # A recursive scan reaches the destination folders late, after images sorted meanwhile have landed there
+        moved_to = self.file_handler.moved_to
+        if moved_to:
+            new_files = [file_path for file_path in new_files if file_path not in moved_to]
+        if not new_files:
+            return
+        was_empty = not self.image_files
+        self.image_files.extend(new_files)
+        self.scan_found += len(new_files)
+        if was_empty:
+            self.current_index = 0
+            if hasattr(self, 'cleanup_button'):
+                self.cleanup_button.pack_forget()
+            self.create_action_labels()
+            self.load_current_image()
+            self.status_label.config(text="Use arrow keys to sort images", fg="yellow")
+    
+    def change_sort_order(self):
+        self.config_manager.set_sort_order(self.sort_order_var.get())
+        # A scan in progress applies the order when it finishes
+        if self.file_handler and not self.scanning:
+            self.apply_sort_order()
+    
+    def set_list_order(self, order):
+        """Record the order image_files is in, so insertions and lookups can bisect it"""
+        self.image_order = order
+        self.image_sort_key = sort_key(order, self.folder_path, self.image_metadata)
+    
+    def apply_sort_order(self):
+        """Put image_files in the File > Sort By order, reading image headers in the background if it needs them"""
+        if self.metadata_cancel is not None:
+            self.metadata_cancel.set()
+            self.metadata_cancel = None
+        order = self.sort_order_var.get()
+        if order == self.image_order and (order in ("path", "name") or not self.image_files
+                                          or all(file_path in self.image_metadata for file_path in self.image_files)):
+            return
+        # A resumed session is already in its order, but its headers still have to be read
         if not self.image_files:
-            self.show_no_images_message()
+            self.set_list_order(order)
+            return
+        if order in ("path", "name"):
+            self.reorder_image_files(order)
             return
         
-        self.current_index = 0
-        self.create_action_labels()
+        cancel_event = threading.Event()
+        self.metadata_cancel = cancel_event
+        results = queue.Queue()
+        files = list(self.image_files)
+        cache = MetadataCache(metadata_path(self.config_manager.get_session_directory(), self.folder_path),
+                              self.folder_path)
+        workers = self.config_manager.get_sort_config().get("workers", 0) or default_hash_workers(self.folder_path)
+        
+        def extract():
+            cache.load()
+            metadata = extract_metadata(files, cache, workers, lambda done, total: results.put((done, total)),
+                                        cancel_event)
+            if metadata is None:
+                return
+            try:
+                cache.save(keep=files)
+            except (OSError, ValueError) as e:
+                print(f"Error saving image metadata for {self.folder_path}: {e}")
+            results.put(metadata)
+        
+        threading.Thread(target=extract, name="metadata", daemon=True).start()
+        self.status_label.config(text="Reading image metadata...", fg="yellow")
+        self.root.after(METADATA_POLL_MS, lambda: self.poll_sort_order(results, cancel_event, order))
+    
+    def poll_sort_order(self, results, cancel_event, order):
+        if cancel_event is not self.metadata_cancel:
+            return
+        metadata = None
+        progress = None
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, dict):
+                metadata = item
+            else:
+                progress = item
+        
+        if metadata is None:
+            if progress is not None:
+                self.status_label.config(text=f"Reading image metadata: {progress[0]}/{progress[1]}", fg="yellow")
+            self.root.after(METADATA_POLL_MS, lambda: self.poll_sort_order(results, cancel_event, order))
+            return
+        
+        self.metadata_cancel = None
+        self.image_metadata.update(metadata)
+        if self.image_files:
+            self.reorder_image_files(order)
+        else:
+            # Everything was sorted while the headers were read; there is nothing left to reorder
+            self.set_list_order(order)
+        self.status_label.config(text=f"Sorted by {SORT_ORDERS[order].lower()}", fg="green")
+    
+    def reorder_image_files(self, order):
+        """Sort image_files into order, keeping the image on screen"""
+        current_file = self.image_files[min(self.current_index, len(self.image_files) - 1)]
+        self.set_list_order(order)
+        # A new list rather than an in-place sort, so the grid view notices the change
+        self.image_files = sorted(self.image_files, key=self.image_sort_key)
+        self.current_index = self.image_index(current_file)
+        self.warmed_bucket = None
         self.load_current_image()
-        self.status_label.config(text="Use arrow keys to sort images", fg="yellow")
+        self.warm_previews()
+    
+    def bisect_image_files(self, file_path):
+        """Where file_path is, or would be inserted, in image_files"""
+        if self.image_sort_key is None:
+            return bisect.bisect_left(self.image_files, file_path)
+        return bisect_left_key(self.image_files, self.image_sort_key(file_path), self.image_sort_key)
+    
+    def image_index(self, file_path):
+        """Position of file_path in image_files, or None if it isn't listed"""
+        index = self.bisect_image_files(file_path)
+        if index < len(self.image_files) and self.image_files[index] == file_path:
+            return index
+        if self.image_sort_key is not None:
+            # A file that changed, or can no longer be read, may no longer sort where it was put
+            try:
+                return self.image_files.index(file_path)
+            except ValueError:
+                return None
+        return None
     
     def show_no_folder_message(self):
         self.image_label.configure(text="No folder selected\n\nUse File > Open Folder to select a folder containing images", 
@@ -240,17 +697,77 @@ class ImageSorter:
         self.root.bind('<space>', self.handle_space_key)
         self.root.bind('<BackSpace>', self.handle_backspace_key)
         self.root.bind('<Escape>', lambda e: self.root.quit())
+        self.root.bind('<Control-g>', lambda e: self.open_grid_view())
+        self.root.bind('<z>', lambda e: self.open_zoom_view())
+        self.image_label.bind('<Double-Button-1>', lambda e: self.open_zoom_view())
+        self.root.bind('<Control-z>', lambda e: self.undo_moves())
+        self.root.bind('<F3>', lambda e: self.toggle_metrics_overlay(flip=True))
         self.root.focus_set()
     
     def on_window_resize(self, event):
         # Only respond to root window resize events, not child widgets
         if event.widget == self.root and hasattr(self, 'image_files') and self.image_files and hasattr(self, 'current_index'):
-            # Delay to let the layout settle
-            self.root.after(50, self.reload_current_image)
+            # Show a cheap interim scale now, render properly once the layout settles
+            if not self._interim_pending:
+                self._interim_pending = True
+                self.root.after_idle(self.show_interim_image)
+            if self._resize_job is not None:
+                self.root.after_cancel(self._resize_job)
+            self._resize_job = self.root.after(RESIZE_SETTLE_MS, self.reload_current_image)
+    
+    def show_interim_image(self):
+        """Rescale whatever is already decoded for the current image, without touching the disk"""
+        self._interim_pending = False
+        if not self.image_files or self.current_index >= len(self.image_files):
+            return
+        
+        target_size = self.get_display_size(update=False)
+        current_file = self.image_files[self.current_index]
+        if target_size is None or self.displayed == (current_file, target_size):
+            return
+        
+        image = self.variants.get(current_file, target_size)
+        if image is not None:
+            self.stop_animation()
+            self.show_image(image)
+            self.displayed = (current_file, target_size)
+            return
+        
+        image = self.variants.interim(current_file, target_size)
+        if image is not None:
+            self.stop_animation()
+            self.show_image(image)
+            self.displayed = None
     
     def reload_current_image(self):
+        self._resize_job = None
         if hasattr(self, 'image_files') and self.image_files and self.current_index < len(self.image_files):
-            self.load_current_image()
+            target_size = self.get_display_size()
+            current_file = self.image_files[self.current_index]
+            if target_size is None or self.displayed == (current_file, target_size):
+                return
+            
+            try:
+                screen_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+                image = self.variants.render(current_file, target_size, screen_size)
+                self.show_image(image)
+                self.displayed = (current_file, target_size)
+                self.start_animation(current_file, target_size)
+                self.prefetcher.prefetch(self.image_files, self.current_index, target_size)
+                if not self.scanning:
+                    self.warm_previews()
+            except Exception as e:
+                self.status_label.config(text=f"Error loading image: {e}", fg="red")
+    
+    def warm_previews(self):
+        """Write disk previews for the rest of the folder while the user sorts"""
+        if self.preview_cache is None or not self.image_files:
+            return
+        target_size = self.get_display_size(update=False)
+        if target_size is None or bucket_for(target_size) == self.warmed_bucket:
+            return
+        self.warmed_bucket = bucket_for(target_size)
+        self.preview_cache.warm(self.image_files, self.current_index, target_size)
     
     def handle_arrow_key(self, direction):
         """Handle arrow key press for moving files"""
@@ -263,6 +780,7 @@ class ImageSorter:
 
         # Set processing flag to prevent repeats
         self.processing_action = True
+        self.mark_key_pressed()
 
         # Process the action
         self.process_image_action(direction)
@@ -270,11 +788,13 @@ class ImageSorter:
     def handle_space_key(self, _event):
         """Handle space key for next image"""
         if self.image_files and self.current_index < len(self.image_files) - 1:
+            self.mark_key_pressed()
             self.next_image()
 
     def handle_backspace_key(self, _event):
         """Handle backspace key for previous image"""
         if self.current_index > 0:
+            self.mark_key_pressed()
             self.previous_image()
 
     def _reset_processing_flag(self, _event=None):
@@ -285,25 +805,195 @@ class ImageSorter:
         if not self.image_files or self.current_index >= len(self.image_files):
             return
 
-        current_file = self.image_files[self.current_index]
+        self.apply_action([self.image_files[self.current_index]], direction)
+    
+    def apply_action(self, files, direction):
+        """Queue a direction's action for several files and drop them from image_files in one pass"""
         action = self.config_manager.get_action(direction)
+        decision = "delete" if action["type"] == "recycle" else action["name"]
+        # The frame decoder keeps the file open, which would make the move fail on Windows
+        self.stop_animation(wait=True)
 
-        success, message = self.file_handler.process_action(current_file, action)
+        with metrics.time("action.dispatch"):
+            # The moves happen in the background; failures are reported by poll_file_operations
+            for file_path in files:
+                self.file_queue.submit(self.file_handler, file_path, action)
+                self.session_decisions[file_path] = decision
+                self.prefetcher.invalidate(file_path)
 
-        if success:
-            self.image_files.pop(self.current_index)
-            self.status_label.config(text=message, fg="green")
+            if len(files) <= BATCH_REBUILD_THRESHOLD:
+                # image_files is kept sorted, so each file can be found by bisection
+                for file_path in files:
+                    index = self.image_index(file_path)
+                    if index is not None:
+                        del self.image_files[index]
+                        if index < self.current_index:
+                            self.current_index -= 1
+            else:
+                removed = set(files)
+                removed_before = sum(1 for file_path in self.image_files[:self.current_index] if file_path in removed)
+                self.image_files[:] = [file_path for file_path in self.image_files if file_path not in removed]
+                self.current_index -= removed_before
 
-            if self.current_index >= len(self.image_files):
-                if self.image_files:
-                    self.current_index = len(self.image_files) - 1
-                else:
-                    self.show_completion_message()
-                    return
+        if len(files) == 1:
+            self.status_label.config(text=f"{files[0].name} → {action['name']}", fg="green")
+        else:
+            self.status_label.config(text=f"{len(files)} images → {action['name']}", fg="green")
+        self.update_queue_status()
+
+        if self.current_index >= len(self.image_files):
+            if self.image_files:
+                self.current_index = len(self.image_files) - 1
+            else:
+                self.show_completion_message()
+                return
 
+        self.load_current_image()
+    
+    def poll_file_operations(self):
+        """Report finished background file operations on the Tk thread"""
+        while True:
+            try:
+                file_path, action, success, message = self.file_queue.results.get_nowait()
+            except queue.Empty:
+                break
+            if not success:
+                self.status_label.config(text=message, fg="red")
+                self.session_decisions.pop(file_path, None)
+                self.restore_failed_file(file_path)
+        
+        self.update_queue_status()
+        self.root.after(FILE_QUEUE_POLL_MS, self.poll_file_operations)
+    
+    def restore_failed_file(self, file_path):
+        """Put a file whose queued action failed back into the list so it can be sorted again"""
+        if file_path.exists():
+            self.insert_image_file(file_path)
+    
+    def insert_image_file(self, file_path):
+        """Insert a file in sort order, keeping the image on screen where it is"""
+        if self.image_index(file_path) is not None:
+            return
+        index = self.bisect_image_files(file_path)
+        
+        was_empty = not self.image_files
+        self.image_files.insert(index, file_path)
+        
+        if was_empty:
+            self.current_index = 0
+            if hasattr(self, 'cleanup_button'):
+                self.cleanup_button.pack_forget()
+            self.create_action_labels()
             self.load_current_image()
+            return
+        
+        if index <= self.current_index:
+            self.current_index += 1
+        self.update_progress()
+    
+    def remove_image_files(self, path, tree=False):
+        """Drop a file, or every file under a directory, that disappeared from disk"""
+        if not tree:
+            index = self.image_index(path)
+            indices = range(0) if index is None else range(index, index + 1)
+        elif self.image_sort_key is None:
+            # Everything under a directory sorts directly after it
+            start = end = bisect.bisect_left(self.image_files, path)
+            while end < len(self.image_files) and path in self.image_files[end].parents:
+                end += 1
+            indices = range(start, end)
         else:
-            self.status_label.config(text=message, fg="red")
+            # In other orders the directory's files are spread through the list
+            prefix = os.path.join(str(path), "")
+            indices = [index for index, file_path in enumerate(self.image_files) if str(file_path).startswith(prefix)]
+        if not indices:
+            return
+        
+        for index in indices:
+            self.prefetcher.invalidate(self.image_files[index])
+        showing_removed = self.current_index in indices
+        removed_before = sum(1 for index in indices if index < self.current_index)
+        if isinstance(indices, range):
+            del self.image_files[indices.start:indices.stop]
+        else:
+            removed = set(indices)
+            self.image_files[:] = [file_path for index, file_path in enumerate(self.image_files) if index not in removed]
+        
+        if not self.image_files:
+            self.show_completion_message()
+            return
+        self.current_index -= removed_before
+        if showing_removed:
+            self.current_index = min(self.current_index, len(self.image_files) - 1)
+            self.load_current_image()
+        else:
+            self.update_progress()
+    
+    def start_folder_watch(self):
+        """Follow images added or removed by other programs while the folder is open"""
+        if self.folder_watcher is not None:
+            self.folder_watcher.stop()
+            self.folder_watcher = None
+        
+        watch_config = self.config_manager.get_watch_config()
+        if not watch_config.get("enabled", True):
+            return
+        
+        watcher = FolderWatcher(
+            self.folder_path,
+            self.file_handler.image_extensions,
+            self.file_handler.search_subfolders,
+            watch_config.get("poll_seconds", 2.0)
+        )
+        self.folder_watcher = watcher
+        watcher.start()
+        self.root.after(WATCH_POLL_MS, lambda: self.poll_folder_watch(watcher))
+    
+    def is_sort_destination(self, file_path):
+        """True for files inside the folders sorted images are moved into"""
+        folder_names = {action["name"] for action in self.config_manager.config["actions"].values()
+                        if action["type"] == "folder"}
+        try:
+            parts = file_path.relative_to(self.folder_path).parts
+        except ValueError:
+            return False
+        return len(parts) > 1 and parts[0] in folder_names
+    
+    def poll_folder_watch(self, watcher):
+        if watcher is not self.folder_watcher:
+            return
+        
+        # Events wait until the initial scan is done; it may still find the same files
+        if not self.scanning:
+            while True:
+                try:
+                    kind, path = watcher.events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "rescan":
+                    self.load_folder(self.folder_path, resume=False)
+                    return
+                self.apply_folder_event(kind, path)
+        
+        self.root.after(WATCH_POLL_MS, lambda: self.poll_folder_watch(watcher))
+    
+    def apply_folder_event(self, kind, path):
+        """Apply an image added or removed outside the app, from the watcher or a resumed session"""
+        if kind == "added":
+            if not self.is_sort_destination(path):
+                self.insert_image_file(path)
+        elif kind == "removed":
+            self.remove_image_files(path)
+        elif kind == "removed_tree":
+            self.remove_image_files(path, tree=True)
+    
+    def update_queue_status(self):
+        pending = self.file_queue.pending
+        throughput = self.file_queue.throughput()
+        if pending or throughput:
+            self.queue_label.config(text=f"Pending file operations: {pending} | {throughput:.1f} files/s")
+        else:
+            self.queue_label.config(text="")
     
     def next_image(self):
         if self.image_files and self.current_index < len(self.image_files) - 1:
@@ -316,6 +1006,7 @@ class ImageSorter:
             self.load_current_image()
     
     def load_current_image(self):
+        self.stop_animation()
         if not self.image_files:
             self.show_completion_message()
             return
@@ -324,53 +1015,153 @@ class ImageSorter:
         self.update_progress()
         
         try:
-            image = Image.open(current_file)
-            
-            window_width = self.root.winfo_width()
-            window_height = self.root.winfo_height()
-            
-            if window_width <= 1 or window_height <= 1:
+            with metrics.time("load.layout"):
+                target_size = self.get_display_size()
+            if target_size is None:
                 self.root.after(100, self.load_current_image)
                 return
             
-            # Get actual available space from center frame
-            self.root.update_idletasks()
-            self.center_frame.update_idletasks()
-            available_width = self.center_frame.winfo_width()
-            available_height = self.center_frame.winfo_height()
+            image = self.variants.get(current_file, target_size)
+            if image is None:
+                # Instant when prefetched; otherwise waits on, or does, the decode
+                with metrics.time("load.wait"):
+                    image = self.prefetcher.get(current_file, target_size)
+                self.variants.put(current_file, target_size, image)
             
-            # Add some padding to prevent edge touching
-            available_width = max(1, available_width - 20)
-            available_height = max(1, available_height - 20)
+            self.show_image(image)
+            self.displayed = (current_file, target_size)
+            self.start_animation(current_file, target_size)
             
-            if available_width <= 1 or available_height <= 1:
-                self.root.after(100, self.load_current_image)
-                return
-            
-            image_width, image_height = image.size
-            scale_factor = min(available_width / image_width, available_height / image_height)
-            
-            new_width = int(image_width * scale_factor)
-            new_height = int(image_height * scale_factor)
-            
-            image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-            
-            self.photo = ImageTk.PhotoImage(image)
-            self.image_label.configure(image=self.photo, text="", compound="center")
+            self.prefetcher.prefetch(self.image_files, self.current_index, target_size)
             
         except Exception as e:
             self.status_label.config(text=f"Error loading image: {e}", fg="red")
     
+    def get_display_size(self, update=True):
+        """Space available for the image in the center frame, or None while the window is not mapped"""
+        window_width = self.root.winfo_width()
+        window_height = self.root.winfo_height()
+        
+        if window_width <= 1 or window_height <= 1:
+            return None
+        
+        # Get actual available space from center frame
+        if update:
+            self.root.update_idletasks()
+            self.center_frame.update_idletasks()
+        available_width = self.center_frame.winfo_width()
+        available_height = self.center_frame.winfo_height()
+        
+        # Add some padding to prevent edge touching
+        available_width = max(1, available_width - 20)
+        available_height = max(1, available_height - 20)
+        
+        if available_width <= 1 or available_height <= 1:
+            return None
+        return (available_width, available_height)
+    
+    def show_image(self, image):
+        with metrics.time("display.photoimage"):
+            self.photo = ImageTk.PhotoImage(image)
+        self.image_label.configure(image=self.photo, text="", compound="center")
+        if self.key_pressed_at is not None:
+            pressed_at = self.key_pressed_at
+            self.key_pressed_at = None
+            # Idle callbacks run in order, so this one runs after the label has been redrawn
+            self.root.after_idle(lambda: metrics.record("key_to_paint", time.perf_counter() - pressed_at))
+    
+    def show_frame(self, photo):
+        self.photo = photo
+        self.image_label.configure(image=self.photo, text="", compound="center")
+    
+    def start_animation(self, file_path, target_size):
+        """Play the frames of an animated GIF or multi-page TIFF over the first one, already on screen"""
+        self.stop_animation()
+        if not self.animation_config.get("enabled", True) or file_path.suffix.lower() not in ANIMATED_EXTENSIONS:
+            return
+        self.animation = AnimationPlayer(
+            self.root, file_path, target_size, self.show_frame,
+            self.animation_config.get("cache_mb", 128) * 1024 * 1024
+        )
+        self.animation.start()
+    
+    def stop_animation(self, wait=False):
+        if self.animation is not None:
+            self.animation.stop(wait)
+            self.animation = None
+    
+    def mark_key_pressed(self):
+        """Start timing keypress-to-paint for the image the key brings up"""
+        if metrics.enabled:
+            self.key_pressed_at = time.perf_counter()
+    
+    def toggle_metrics_overlay(self, flip=False):
+        if flip:
+            self.metrics_overlay_var.set(not self.metrics_overlay_var.get())
+        
+        if self.metrics_overlay_var.get():
+            if self.metrics_overlay is not None:
+                return
+            metrics.enabled = True
+            self.metrics_overlay = tk.Label(
+                self.center_frame,
+                text="",
+                justify='left',
+                fg="#00ff00",
+                bg="black",
+                font=("Courier", 9)
+            )
+            self.metrics_overlay.place(x=8, y=8)
+            self.update_metrics_overlay()
+        else:
+            if self.metrics_overlay is None:
+                return
+            if self._overlay_job is not None:
+                self.root.after_cancel(self._overlay_job)
+                self._overlay_job = None
+            self.metrics_overlay.destroy()
+            self.metrics_overlay = None
+            metrics.enabled = self.metrics_config.get("enabled", False)
+    
+    def update_metrics_overlay(self):
+        lines = [f"{'stage':<19}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8} ms"]
+        for name, summary in metrics.summaries().items():
+            lines.append(
+                f"{name:<19}{summary['count']:>6}{summary['p50_ms']:>8.1f}"
+                f"{summary['p95_ms']:>8.1f}{summary['p99_ms']:>8.1f}"
+            )
+        if len(lines) == 1:
+            lines.append("Sort or browse to collect samples")
+        self.metrics_overlay.config(text="\n".join(lines))
+        self._overlay_job = self.root.after(METRICS_OVERLAY_MS, self.update_metrics_overlay)
+    
+    def dump_metrics(self):
+        path = self.config_manager.get_metrics_path()
+        try:
+            if metrics.dump(path):
+                print(f"Latency metrics written to {path}")
+        except OSError as e:
+            print(f"Error writing latency metrics: {e}")
+    
     def update_progress(self):
         if self.image_files:
             current = self.current_index + 1
             total = len(self.image_files)
             filename = self.image_files[self.current_index].name
-            self.progress_label.config(text=f"{current}/{total} - {filename}")
+            scanning = " (scanning...)" if self.scanning else ""
+            self.progress_label.config(text=f"{current}/{total}{scanning} - {filename}")
         else:
             self.progress_label.config(text="No images remaining")
     
     def show_completion_message(self):
+        self.stop_animation()
+        if self.scanning:
+            # Everything found so far is sorted, but the scan may still find more
+            self.image_label.configure(image="", text="Scanning folder for more images...", 
+                                     fg="white", font=("Arial", 16), compound="center")
+            self.progress_label.config(text="")
+            return
+        
         self.image_label.configure(image="")
         self.image_label.configure(text="🎉 Congratulations! 🎉\n\nYou have successfully processed all images!\n\nThere are no more images to sort at this time.\n\nUse File > Open Folder to select a new folder\nor press Escape to exit.", 
                                  fg="green", font=("Arial", 18, "bold"), compound="center")
@@ -410,6 +1201,51 @@ class ImageSorter:
         else:
             self.status_label.config(text=message, fg="red")
     
+    def recover_interrupted_operations(self):
+        """Settle moves a crash left half-done, before any folder is scanned"""
+        if self.journal is None:
+            return
+        messages = self.journal.recover()
+        for message in messages:
+            print(message)
+        if messages:
+            self.status_label.config(text=f"Recovered {len(messages)} interrupted file operation(s); see console", fg="yellow")
+    
+    def undo_moves(self, count=1):
+        """Move the last `count` sorted files back and show the most recent one again"""
+        if not self.file_handler:
+            return
+        # Queued moves are only journaled as done once they have run
+        self.file_queue.wait_idle()
+        success, message, restored = self.file_handler.undo_moves(count, self.undo_since_id)
+        
+        # The journal records absolute paths; image_files uses paths as the folder was opened
+        root = Path(os.path.abspath(self.folder_path))
+        shown = None
+        for file_path in restored:
+            try:
+                relative = file_path.relative_to(root)
+            except ValueError:
+                continue
+            file_path = self.folder_path / relative
+            self.session_decisions.pop(file_path, None)
+            self.prefetcher.invalidate(file_path)
+            if len(relative.parts) == 1 or self.file_handler.search_subfolders:
+                self.insert_image_file(file_path)
+                shown = shown or file_path
+        
+        if shown is not None:
+            index = self.image_index(shown)
+            if index is not None:
+                self.current_index = index
+                self.load_current_image()
+        self.status_label.config(text=message, fg="green" if success else "red")
+    
+    def undo_moves_dialog(self):
+        count = simpledialog.askinteger("Undo Last Moves", "Number of moves to undo:", initialvalue=10, minvalue=1)
+        if count:
+            self.undo_moves(count)
+    
     def move_images_to_main_folder_dialog(self):
         """Move all images from subfolders to the main folder"""
         if not self.file_handler:
@@ -428,6 +1264,7 @@ class ImageSorter:
             return
 
         # Perform the operation
+        self.file_queue.wait_idle()
         success, message = self.file_handler.move_images_to_main_folder()
 
         if success:
@@ -435,53 +1272,197 @@ class ImageSorter:
             self.status_label.config(text=message, fg="green")
             # Reload the folder to show updated file list
             if self.folder_path:
-                self.load_folder(self.folder_path)
+                self.load_folder(self.folder_path, resume=False)
         else:
             messagebox.showerror("Error", message)
             self.status_label.config(text=message, fg="red")
 
-    def find_duplicates_dialog(self):
-        """Open dialog to find and manage duplicate files"""
+    def open_grid_view(self):
+        """Show the remaining images as a thumbnail grid, for sorting many at once"""
         if not self.file_handler:
             messagebox.showwarning("No Folder", "Please select a folder first using File > Open Folder")
             return
+        if self.grid_view is not None:
+            self.grid_view.window.lift()
+            self.grid_view.window.focus_set()
+            return
+        
+        from grid_view import GridView
+        grid_config = self.config_manager.get_grid_config()
+        self.grid_view = GridView(
+            self,
+            thumbnail_size=grid_config.get("thumbnail_size", 256),
+            workers=grid_config.get("workers", 4),
+            cache_mb=grid_config.get("cache_mb", 128)
+        )
+    
+    def open_zoom_view(self):
+        """Inspect the current image up to full resolution, decoding only the tiles in view"""
+        if not (hasattr(self, 'image_files') and self.image_files and self.current_index < len(self.image_files)):
+            return
+        current_file = self.image_files[self.current_index]
+        if self.zoom_view is not None:
+            if self.zoom_view.file_path == current_file:
+                self.zoom_view.window.lift()
+                self.zoom_view.window.focus_set()
+                return
+            self.zoom_view.close()
+        
+        from PIL import Image
+        from zoom_view import ZoomView
+        zoom_config = self.config_manager.get_zoom_config()
+        try:
+            self.zoom_view = ZoomView(
+                self,
+                current_file,
+                workers=zoom_config.get("workers", 2),
+                cache_mb=zoom_config.get("cache_mb", 256)
+            )
+        except (OSError, Image.DecompressionBombError) as e:
+            print(f"Error opening {current_file} for zoom: {e}")
+            self.status_label.config(text=f"Can't zoom {current_file.name}: {e}", fg="red")
+    
+    def find_duplicates_dialog(self, similar=False):
+        """Open dialog to find and manage duplicate files
+
+        With similar=True, images are grouped by perceptual hash instead of
+        exact content, which also catches resized and re-encoded copies.
+        """
+        if not self.file_handler:
+            messagebox.showwarning("No Folder", "Please select a folder first using File > Open Folder")
+            return
+        
+        duplicates_config = self.config_manager.get_duplicates_config()
+        if similar:
+            threshold = simpledialog.askinteger(
+                "Find Similar Images",
+                "Maximum difference between similar images (0-64 bits):\n\n"
+                "Lower values only match near-identical copies.",
+                initialvalue=duplicates_config.get("similarity_threshold", 6),
+                minvalue=0,
+                maxvalue=64
+            )
+            if threshold is None:
+                return
+            method = duplicates_config.get("similarity_method", "phash")
         
         # Create progress dialog
         progress_window = tk.Toplevel(self.root)
-        progress_window.title("Finding Duplicates...")
-        progress_window.geometry("400x100")
+        progress_window.title("Finding Similar Images..." if similar else "Finding Duplicates...")
+        progress_window.geometry("420x170")
         progress_window.transient(self.root)
         progress_window.grab_set()
         
-        tk.Label(progress_window, text="Scanning files for duplicates...", font=("Arial", 12)).pack(pady=20)
-        progress_bar = ttk.Progressbar(progress_window, mode='indeterminate')
-        progress_bar.pack(pady=10, padx=20, fill='x')
+        stage_label = tk.Label(progress_window, text="Scanning files for duplicates...", font=("Arial", 12))
+        stage_label.pack(pady=(15, 5))
+        progress_bar = ttk.Progressbar(progress_window, mode='indeterminate', maximum=100)
+        progress_bar.pack(pady=5, padx=20, fill='x')
         progress_bar.start()
+        detail_label = tk.Label(progress_window, text="", font=("Arial", 9), fg="gray")
+        detail_label.pack()
         
-        # Update the UI
-        progress_window.update()
+        # The scan runs on a worker thread and reports back through this queue
+        events = queue.Queue()
+        cancel_event = threading.Event()
+        file_handler = self.file_handler
+        workers = duplicates_config.get("workers", 0) or None
         
-        try:
-            # Find duplicates
-            duplicates, total_files = self.file_handler.find_duplicate_images()
+        def cancel():
+            cancel_event.set()
+            stage_label.config(text="Cancelling...")
+            cancel_button.config(state='disabled')
+        
+        cancel_button = tk.Button(progress_window, text="Cancel", command=cancel, font=("Arial", 10))
+        cancel_button.pack(pady=10)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel)
+        
+        def scan():
+            # Let queued moves land before the folder is hashed
+            self.file_queue.wait_idle()
+            try:
+                if similar:
+                    result = file_handler.find_near_duplicate_images(threshold, method, events.put, cancel_event, workers)
+                else:
+                    result = file_handler.find_duplicate_images(events.put, cancel_event, workers)
+            except Exception as e:
+                result = (None, f"Error finding duplicates: {e}")
+            events.put({"stage": "done", "result": result})
+        
+        threading.Thread(target=scan, name="duplicate-scan", daemon=True).start()
+        
+        stage_names = {
+            "enumerating": "Finding image files",
+            "partial": "Comparing file heads and tails",
+            "full": "Hashing candidate files",
+            "perceptual": "Computing perceptual hashes",
+        }
+        stage_started = {}
+        
+        def show_progress(event):
+            stage = event["stage"]
+            if cancel_event.is_set():
+                return
+            now = time.monotonic()
+            stage_started.setdefault(stage, now)
+            stage_label.config(text=f"{stage_names[stage]}...")
+            
+            if stage == "enumerating":
+                detail_label.config(text=f"{event['files_found']} files found")
+                return
+            
+            if str(progress_bar.cget('mode')) != 'determinate':
+                progress_bar.stop()
+                progress_bar.config(mode='determinate')
+            fraction = event["bytes"] / event["total_bytes"] if event["total_bytes"] else 1.0
+            progress_bar['value'] = fraction * 100
+            
+            elapsed = now - stage_started[stage]
+            rate = event["bytes"] / elapsed if elapsed > 0 else 0
+            detail = f"{event['done']}/{event['total']} files, {format_bytes(rate)}/s"
+            if rate and event["bytes"] < event["total_bytes"]:
+                detail += f", about {int((event['total_bytes'] - event['bytes']) / rate) + 1}s left"
+            detail_label.config(text=detail)
+        
+        def poll():
+            finished = None
+            latest = None
+            while True:
+                try:
+                    event = events.get_nowait()
+                except queue.Empty:
+                    break
+                if event["stage"] == "done":
+                    finished = event
+                else:
+                    latest = event
+            
+            if latest is not None:
+                show_progress(latest)
+            if finished is None:
+                progress_window.after(100, poll)
+                return
+            
             progress_bar.stop()
             progress_window.destroy()
             
+            duplicates, total_files = finished["result"]
+            if cancel_event.is_set():
+                self.status_label.config(text="Scan cancelled", fg="yellow")
+                return
+            
             if duplicates is None:
-                messagebox.showerror("Error", f"Error finding duplicates: {total_files}")
+                messagebox.showerror("Error", total_files)
                 return
             
             if not duplicates:
-                messagebox.showinfo("No Duplicates", f"No duplicate images found in {total_files} files.")
+                kind = "similar" if similar else "duplicate"
+                messagebox.showinfo("No Duplicates", f"No {kind} images found in {total_files} files.")
                 return
             
             # Show duplicate management dialog
             self.show_duplicate_management_dialog(duplicates, total_files)
-            
-        except Exception as e:
-            progress_bar.stop()
-            progress_window.destroy()
-            messagebox.showerror("Error", f"Error finding duplicates: {e}")
+        
+        poll()
     
     def show_duplicate_management_dialog(self, duplicates, total_files):
         """Show dialog to manage found duplicates"""
@@ -491,88 +1472,191 @@ class ImageSorter:
         # Create dialog
         dialog = tk.Toplevel(self.root)
         dialog.title("Manage Duplicate Files")
-        dialog.geometry("500x600")
+        dialog.geometry("900x800")
         dialog.transient(self.root)
         dialog.grab_set()
         
         # Info label
         info_text = f"Found {duplicate_count} duplicate files in {len(duplicates)} groups.\nTotal files scanned: {total_files}"
         tk.Label(dialog, text=info_text, font=("Arial", 12), fg="blue").pack(pady=10)
+        tk.Label(dialog, text=self.file_handler.describe_scan_stats(), font=("Arial", 9), fg="gray").pack()
         
         # Instructions
         tk.Label(dialog, text="Select folders to KEEP files from:", font=("Arial", 11, "bold")).pack(pady=(20, 5))
-        tk.Label(dialog, text="(Duplicates from unselected folders will be deleted)", font=("Arial", 9), fg="red").pack()
+        tk.Label(dialog, text="(Duplicates from unselected folders will be deleted, or linked to a kept copy)", font=("Arial", 9), fg="red").pack()
         
         # Checkboxes for folders
         checkbox_frame = tk.Frame(dialog)
-        checkbox_frame.pack(pady=20, padx=20, fill='both', expand=True)
+        checkbox_frame.pack(pady=10, padx=20, fill='x')
         
         folder_vars = {}
         for folder in unique_folders:
             var = tk.BooleanVar(value=True)  # Default to keep all
             folder_vars[folder] = var
-            cb = tk.Checkbutton(checkbox_frame, text=folder, variable=var, font=("Arial", 10))
+            # Groups without their own choice follow the folders, so the review redraws
+            cb = tk.Checkbutton(checkbox_frame, text=folder, variable=var, font=("Arial", 10),
+                                command=lambda: review.render())
             cb.pack(anchor='w', pady=2)
         
-        # Details section
-        details_frame = tk.LabelFrame(dialog, text="Duplicate Groups Preview", font=("Arial", 10))
-        details_frame.pack(pady=20, padx=20, fill='both', expand=True)
-        
-        # Scrollable text widget
-        text_frame = tk.Frame(details_frame)
-        text_frame.pack(fill='both', expand=True, padx=5, pady=5)
+        def selected_folders():
+            return [folder for folder, var in folder_vars.items() if var.get()]
         
-        text_widget = tk.Text(text_frame, height=8, font=("Arial", 9))
-        scrollbar = tk.Scrollbar(text_frame, orient="vertical", command=text_widget.yview)
-        text_widget.configure(yscrollcommand=scrollbar.set)
+        # Every group, reviewed in a virtualized list with lazily loaded thumbnails
+        details_frame = tk.LabelFrame(dialog, text="Duplicate Groups (click or press Space to keep or remove a copy)",
+                                      font=("Arial", 10))
+        details_frame.pack(pady=10, padx=20, fill='both', expand=True)
         
-        # Show duplicate details (limited to first few groups)
-        preview_count = 0
-        for hash_val, files in list(duplicates.items())[:5]:  # Show first 5 groups
-            preview_count += 1
-            text_widget.insert(tk.END, f"Group {preview_count}:\n")
-            for file_path in files:
-                folder_name = "Main Folder" if file_path.parent == self.file_handler.source_folder else str(file_path.parent.relative_to(self.file_handler.source_folder))
-                text_widget.insert(tk.END, f"  • {file_path.name} (in {folder_name})\n")
-            text_widget.insert(tk.END, "\n")
-        
-        if len(duplicates) > 5:
-            text_widget.insert(tk.END, f"... and {len(duplicates) - 5} more duplicate groups")
-        
-        text_widget.config(state='disabled')
-        text_widget.pack(side='left', fill='both', expand=True)
-        scrollbar.pack(side='right', fill='y')
+        from duplicate_review import DuplicateReview
+        review_config = self.config_manager.get_duplicate_review_config()
+        review = DuplicateReview(
+            details_frame, self, duplicates, selected_folders,
+            thumbnail_size=review_config.get("thumbnail_size", 128),
+            workers=review_config.get("workers", 4),
+            cache_mb=review_config.get("cache_mb", 64)
+        )
         
         # Buttons
         button_frame = tk.Frame(dialog)
         button_frame.pack(pady=20)
         
+        def describe_choice():
+            choice = f"Files will be kept from: {', '.join(selected_folders()) or 'no folder'}"
+            if review.overrides:
+                choice += f"\n{len(review.overrides)} groups keep the copies chosen for them instead"
+            return choice
+        
         def remove_duplicates():
-            selected_folders = [folder for folder, var in folder_vars.items() if var.get()]
-            if not selected_folders:
+            if not selected_folders() and not review.overrides:
                 messagebox.showwarning("No Selection", "Please select at least one folder to keep files from.")
                 return
             
             result = messagebox.askyesno("Confirm Deletion", 
                 f"This will permanently delete duplicate files from folders NOT selected.\n\n"
-                f"Files will be kept from: {', '.join(selected_folders)}\n\n"
+                f"{describe_choice()}\n\n"
                 f"Are you sure you want to continue?")
             
             if result:
-                success, message = self.file_handler.remove_duplicates(duplicates, selected_folders)
+                success, message = self.file_handler.remove_duplicates(duplicates, selected_folders(),
+                                                                       keep_overrides=review.overrides)
                 if success:
                     messagebox.showinfo("Success", message)
                     dialog.destroy()
                 else:
                     messagebox.showerror("Error", message)
         
-        tk.Button(button_frame, text="Remove Duplicates", command=remove_duplicates, 
-                 bg="#ff4444", fg="white", font=("Arial", 11, "bold")).pack(side='left', padx=10)
-        tk.Button(button_frame, text="Cancel", command=dialog.destroy, 
-                 font=("Arial", 11)).pack(side='left', padx=10)
+        link_status = tk.Label(dialog, text="", font=("Arial", 9), fg="gray")
+        link_status.pack()
+        
+        def link_duplicates():
+            if not selected_folders() and not review.overrides:
+                messagebox.showwarning("No Selection", "Please select at least one folder to keep files from.")
+                return
+            
+            if not messagebox.askyesno("Confirm Linking",
+                f"Duplicates in folders NOT selected will be replaced by links to the kept copies.\n\n"
+                f"{describe_choice()}\n\n"
+                f"Every file stays where it is, but linked copies share their data. Reflinked copies "
+                f"can still be edited separately; hardlinked copies change together.\n\n"
+                f"Continue?"):
+                return
+            
+            for button in (remove_button, link_button, cancel_button):
+                button.config(state='disabled')
+            dialog.protocol("WM_DELETE_WINDOW", lambda: None)
+            link_status.config(text="Comparing and linking duplicates...")
+            
+            # Every copy is read in full before it is linked, so this runs off the Tk thread
+            events = queue.Queue()
+            file_handler = self.file_handler
+            link_mode = self.config_manager.get_duplicates_config().get("link_mode", "auto")
+            folders = selected_folders()
+            overrides = dict(review.overrides)
+            
+            def link():
+                self.file_queue.wait_idle()
+                result = file_handler.link_duplicates(duplicates, folders, link_mode,
+                                                      progress=lambda done, total: events.put((done, total)),
+                                                      keep_overrides=overrides)
+                events.put(result)
+            
+            threading.Thread(target=link, name="link-duplicates", daemon=True).start()
+            
+            def poll():
+                latest = None
+                finished = None
+                while True:
+                    try:
+                        event = events.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(event[0], bool):
+                        finished = event
+                    else:
+                        latest = event
+                if latest is not None:
+                    link_status.config(text=f"Linked or checked {latest[0]}/{latest[1]} files...")
+                if finished is None:
+                    dialog.after(100, poll)
+                    return
+                
+                success, message = finished
+                if success:
+                    messagebox.showinfo("Duplicates Linked", message)
+                    dialog.destroy()
+                else:
+                    messagebox.showerror("Error", message)
+                    link_status.config(text="")
+                    for button in (remove_button, link_button, cancel_button):
+                        button.config(state='normal')
+                    dialog.protocol("WM_DELETE_WINDOW", dialog.destroy)
+            
+            poll()
+        
+        remove_button = tk.Button(button_frame, text="Remove Duplicates", command=remove_duplicates, 
+                 bg="#ff4444", fg="white", font=("Arial", 11, "bold"))
+        remove_button.pack(side='left', padx=10)
+        link_button = tk.Button(button_frame, text="Link Duplicates", command=link_duplicates, 
+                 font=("Arial", 11))
+        link_button.pack(side='left', padx=10)
+        cancel_button = tk.Button(button_frame, text="Cancel", command=dialog.destroy, 
+                 font=("Arial", 11))
+        cancel_button.pack(side='left', padx=10)
     
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.stop_animation()
+            if self.folder_watcher is not None:
+                self.folder_watcher.stop()
+            self.prefetcher.shutdown()
+            if self.grid_view is not None:
+                self.grid_view.shutdown()
+            if self.zoom_view is not None:
+                self.zoom_view.shutdown()
+            if self.preview_cache is not None:
+                self.preview_cache.shutdown()
+            if self.file_queue.pending:
+                print(f"Finishing {self.file_queue.pending} pending file operation(s)...")
+            self.file_queue.shutdown()
+            self.report_failed_operations()
+            if self.metrics_config.get("dump_on_exit", True):
+                self.dump_metrics()
+            self.save_session()
+            if self.hash_index:
+                self.hash_index.close()
+            if self.journal:
+                self.journal.close()
+    
+    def report_failed_operations(self):
+        """Print failures that finished after the window closed"""
+        while True:
+            try:
+                file_path, action, success, message = self.file_queue.results.get_nowait()
+            except queue.Empty:
+                break
+            if not success:
+                print(message)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""
+Latency histograms for the hot paths: decoding, display and file operations.
+
+Each stage records into a histogram with fixed, logarithmically spaced
+buckets, so recording is a bisect and a counter increment and percentiles
+cost the same however many samples there are. Reported percentiles are the
+upper bound of the bucket they fall in, at most about 9% high.
+
+Recording is off unless enabled. While it is off, `metrics.time()` hands
+back one shared no-op context manager, so an instrumented call site costs
+a method call and an attribute check.
+"""
+
+import bisect
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+# Bucket upper bounds in milliseconds: eight per doubling from 10 µs to about 100 s
+BUCKET_BOUNDS_MS = [0.01 * 2 ** (i / 8) for i in range(8 * 24)]
+
+PERCENTILES = (50, 95, 99)
+
+_DISABLED = contextlib.nullcontext()
+
+
+class LatencyHistogram:
+    def __init__(self):
+        # One extra bucket for samples beyond the last bound
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, milliseconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, milliseconds)] += 1
+        self.count += 1
+        self.total_ms += milliseconds
+        if milliseconds > self.max_ms:
+            self.max_ms = milliseconds
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0.0
+        wanted = percent / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                if index >= len(BUCKET_BOUNDS_MS):
+                    return self.max_ms
+                # The bucket's upper bound, but never more than the slowest sample
+                return min(BUCKET_BOUNDS_MS[index], self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        summary = {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+        for percent in PERCENTILES:
+            summary[f"p{percent}_ms"] = round(self.percentile(percent), 3)
+        return summary
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class LatencyMetrics:
+    """Named histograms, safe to record into from any thread"""
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.time()
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def time(self, name):
+        """Context manager recording the time spent in its block under name"""
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self, name)
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(seconds * 1000)
+
+    def summaries(self):
+        """Stage name -> count, mean, max and percentiles in milliseconds, sorted by name"""
+        with self._lock:
+            return {name: self._histograms[name].summary() for name in sorted(self._histograms)}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started = time.time()
+
+    def dump(self, path):
+        """Write summaries and non-empty buckets as JSON; returns False if nothing was recorded"""
+        with self._lock:
+            histograms = {}
+            for name in sorted(self._histograms):
+                histogram = self._histograms[name]
+                entry = histogram.summary()
+                bounds = BUCKET_BOUNDS_MS + [None]
+                entry["buckets"] = [[round(bounds[index], 4) if bounds[index] is not None else None, count]
+                                    for index, count in enumerate(histogram.counts) if count]
+                histograms[name] = entry
+        if not histograms:
+            return False
+
+        path = Path(path)
+        report = {"started": self.started, "ended": time.time(), "histograms": histograms}
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return True
+
+
+# Shared by every module; the GUI turns it on from config or the overlay toggle
+metrics = LatencyMetrics()
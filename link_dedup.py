@@ -0,0 +1,140 @@
+"""
+Reclaim the space of duplicate files without removing any of them.
+
+Each redundant copy is replaced by a reflink clone of the copy being kept
+(copy-on-write extents shared through the FICLONE ioctl, on btrfs, XFS and
+other filesystems that support it) or by a hardlink to it. Clones stay
+separate files, so editing one later leaves the others alone; hardlinks
+share one inode. Copies are compared byte for byte first, and the link is
+made under a temporary name and renamed over the copy, so a failure at any
+point leaves the original in place.
+"""
+
+import errno
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# "auto" clones where the filesystem can and hardlinks elsewhere
+LINK_MODES = ("auto", "reflink", "hardlink")
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+
+COMPARE_BLOCK = 1024 * 1024
+
+# Errors meaning the filesystem can't clone, rather than that something went wrong
+CLONE_UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTSUP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+
+class LinkResult:
+    def __init__(self):
+        # (target, source, "reflink" or "hardlink")
+        self.linked = []
+        # (target, reason) for copies left alone on purpose
+        self.skipped = []
+        self.errors = []
+        # Upper bound: clones of files that already shared extents free less
+        self.bytes_reclaimed = 0
+
+
+def same_content(first, second):
+    """Byte-for-byte comparison, stopping at the first difference"""
+    with open(first, "rb") as a, open(second, "rb") as b:
+        while True:
+            block = a.read(COMPARE_BLOCK)
+            if block != b.read(COMPARE_BLOCK):
+                return False
+            if not block:
+                return True
+
+
+def reflink(source, destination):
+    """Create destination as a copy-on-write clone of source; OSError if the filesystem can't"""
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux")
+    import fcntl
+
+    with open(source, "rb") as src, open(destination, "xb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def replace_with_link(source, target, mode="auto"):
+    """Replace target with a clone of, or hardlink to, source; returns the method used"""
+    target = Path(target)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.dedup")
+    method = None
+    try:
+        if mode in ("auto", "reflink"):
+            try:
+                reflink(source, temporary)
+                # The clone takes over the copy's permissions and times
+                shutil.copystat(target, temporary)
+                method = "reflink"
+            except OSError as e:
+                _remove_quietly(temporary)
+                if mode == "reflink" or e.errno not in CLONE_UNSUPPORTED:
+                    raise
+        if method is None:
+            os.link(source, temporary)
+            method = "hardlink"
+        os.replace(temporary, target)
+    except BaseException:
+        _remove_quietly(temporary)
+        raise
+    return method
+
+
+def link_groups(groups, mode="auto", workers=4, progress=None):
+    """Replace the copies in (source, [copies]) groups with links to their source
+
+    Copies already linked to the source, on another filesystem, or whose
+    content turns out to differ are skipped. `progress` is called with
+    (done, total) as copies finish.
+    """
+    if mode not in LINK_MODES:
+        raise ValueError(f"Unknown link mode: {mode}")
+    result = LinkResult()
+    items = [(source, target) for source, targets in groups for target in targets]
+    done = 0
+
+    def link(item):
+        source, target = item
+        try:
+            source_stat = os.stat(source)
+            target_stat = os.stat(target)
+            if (source_stat.st_dev, source_stat.st_ino) == (target_stat.st_dev, target_stat.st_ino):
+                return target, source, None, "already a hardlink of the kept copy", 0
+            if source_stat.st_dev != target_stat.st_dev:
+                return target, source, None, "on another filesystem", 0
+            if source_stat.st_size != target_stat.st_size or not same_content(source, target):
+                return target, source, None, "content differs", 0
+            method = replace_with_link(source, target, mode)
+        except Exception as e:
+            return target, source, None, e, 0
+        # Space only comes back if no other name kept the copy's data alive
+        return target, source, method, None, target_stat.st_size if target_stat.st_nlink == 1 else 0
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="link-dedup") as executor:
+        for target, source, method, problem, reclaimed in executor.map(link, items):
+            done += 1
+            if progress:
+                progress(done, len(items))
+            if method is not None:
+                result.linked.append((target, source, method))
+                result.bytes_reclaimed += reclaimed
+            elif isinstance(problem, str):
+                result.skipped.append((target, problem))
+            else:
+                result.errors.append((target, problem))
+    return result
@@ -2,7 +2,6 @@
 
 import sys
 from pathlib import Path
-from image_sorter import ImageSorter
 
 
 def main():
@@ -15,6 +14,8 @@ def main():
         folder_path = None
     
     try:
+        # Imported after the arguments are checked, so errors don't wait for Tk and PIL
+        from image_sorter import ImageSorter
         app = ImageSorter(folder_path)
         app.run()
     except KeyboardInterrupt:
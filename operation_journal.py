@@ -0,0 +1,300 @@
+"""
+Append-only journal of file operations, for crash recovery and undo.
+
+Every move or trash is logged as a "begin" record before it touches the
+disk and a "done" or "failed" record afterwards, one JSON object per line.
+Begin records are only acknowledged once they are on disk, but callers
+don't each pay for an fsync: a writer thread flushes whatever has been
+appended since its last fsync in one write, so concurrent workers share a
+sync (group commit). Completion records don't wait at all.
+
+After a crash, recover() settles operations that began but never finished
+by looking at the disk: if the destination exists and the source doesn't,
+the move happened.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from bulk_move import move_file
+
+
+# Completed moves kept when the journal is compacted
+UNDO_HISTORY = 1000
+
+# Records the journal may hold before it is compacted on open
+COMPACT_RECORDS = 100000
+
+
+class OperationJournal:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._operations = {}
+        self._next_id = 1
+        self._records = 0
+        self._state_lock = threading.Lock()
+
+        self._replay()
+        if self._records > COMPACT_RECORDS:
+            self._compact()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+        self._buffer = []
+        self._appended = 0
+        self._durable = 0
+        self._error = None
+        self._closed = False
+        self._commit = threading.Condition()
+        self._writer = threading.Thread(target=self._write_loop, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _replay(self):
+        """Rebuild operation state from the records on disk"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # A crash mid-write leaves a partial last line; cut it off so appends start clean
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._apply(record)
+            self._records += 1
+
+    def _apply(self, record):
+        op_id = record["id"]
+        if record["op"] == "begin":
+            self._operations[op_id] = {
+                "kind": record["kind"],
+                "src": record["src"],
+                "dst": record.get("dst"),
+                "state": "pending",
+            }
+            self._next_id = max(self._next_id, op_id + 1)
+        elif op_id in self._operations:
+            self._operations[op_id]["state"] = record["op"]
+
+    def _compact(self):
+        """Rewrite the journal with only the most recent completed moves"""
+        keep = [op_id for op_id, operation in self._operations.items()
+                if operation["kind"] == "move" and operation["state"] == "done"][-UNDO_HISTORY:]
+        pending = [op_id for op_id, operation in self._operations.items() if operation["state"] in ("pending", "undoing")]
+        kept = sorted(set(keep) | set(pending))
+
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        records = 0
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for op_id in kept:
+                operation = self._operations[op_id]
+                f.write(json.dumps({"op": "begin", "id": op_id, "kind": operation["kind"],
+                                    "src": operation["src"], "dst": operation["dst"]}) + "\n")
+                records += 1
+                if operation["state"] != "pending":
+                    f.write(json.dumps({"op": operation["state"], "id": op_id}) + "\n")
+                    records += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self._operations = {op_id: self._operations[op_id] for op_id in kept}
+        self._records = records
+
+    def _write_loop(self):
+        while True:
+            with self._commit:
+                self._commit.wait_for(lambda: self._buffer or self._closed)
+                if not self._buffer and self._closed:
+                    return
+                lines = self._buffer
+                self._buffer = []
+                upto = self._appended
+            try:
+                self._file.write("".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                print(f"Error writing operation journal: {e}")
+                with self._commit:
+                    self._error = e
+            with self._commit:
+                self._durable = upto
+                self._commit.notify_all()
+
+    def _log(self, records):
+        """Apply records and queue them for the writer; returns the count to wait for
+
+        Called with _state_lock held, so operations are added to _operations
+        and to the file in id order, which undoable_moves relies on.
+        """
+        for record in records:
+            self._apply(record)
+        with self._commit:
+            self._buffer.extend(json.dumps(record) + "\n" for record in records)
+            self._appended += len(records)
+            self._commit.notify_all()
+            return self._appended
+
+    def _wait_durable(self, target):
+        """Wait until the first `target` records are on disk; raises OSError if the journal can't be written"""
+        with self._commit:
+            self._commit.wait_for(lambda: self._durable >= target or self._closed)
+            if self._error is not None:
+                raise OSError(f"operation journal could not be written: {self._error}") from self._error
+
+    def _append(self, records, wait):
+        with self._state_lock:
+            target = self._log(records)
+        if wait:
+            self._wait_durable(target)
+
+    def begin_many(self, kind, pairs):
+        """Log planned operations and wait until they are on disk; returns their ids
+
+        Raises OSError if the journal can't be written, so nothing is done unlogged.
+        """
+        with self._state_lock:
+            records = [{"op": "begin", "id": self._next_id + index, "kind": kind, "time": time.time(),
+                        "src": os.path.abspath(src), "dst": os.path.abspath(dst) if dst is not None else None}
+                       for index, (src, dst) in enumerate(pairs)]
+            target = self._log(records)
+        self._wait_durable(target)
+        return [record["id"] for record in records]
+
+    def begin(self, kind, src, dst=None):
+        return self.begin_many(kind, [(src, dst)])[0]
+
+    def finish(self, op_id, error=None):
+        """Log the outcome of an operation; doesn't wait for the disk"""
+        if error is None:
+            self._append([{"op": "done", "id": op_id}], wait=False)
+        else:
+            self._append([{"op": "failed", "id": op_id, "error": str(error)}], wait=False)
+
+    def recover(self):
+        """Settle operations interrupted by a crash; returns a message per operation"""
+        messages = []
+        with self._state_lock:
+            interrupted = [(op_id, dict(operation)) for op_id, operation in self._operations.items()
+                           if operation["state"] in ("pending", "undoing")]
+
+        for op_id, operation in interrupted:
+            src_exists = os.path.exists(operation["src"])
+            dst_exists = operation["dst"] is not None and os.path.exists(operation["dst"])
+            name = Path(operation["src"]).name
+
+            if operation["kind"] == "trash":
+                if src_exists:
+                    self.finish(op_id, "interrupted before the file was trashed")
+                else:
+                    self.finish(op_id)
+                continue
+
+            at_destination = dst_exists and not src_exists
+            if operation["state"] == "undoing":
+                if src_exists and not dst_exists:
+                    self._append([{"op": "undone", "id": op_id}], wait=False)
+                    messages.append(f"Finished undoing the move of {name}")
+                elif at_destination:
+                    self._append([{"op": "done", "id": op_id}], wait=False)
+                continue
+
+            if at_destination:
+                self.finish(op_id)
+                messages.append(f"Recovered interrupted move: {name} -> {operation['dst']}")
+            elif src_exists and not dst_exists:
+                self.finish(op_id, "interrupted before the file was moved")
+            elif src_exists and dst_exists:
+                # A copy across devices was cut short; keep both and let the user decide
+                self.finish(op_id, "interrupted while copying")
+                messages.append(f"Interrupted move left both {operation['src']} and {operation['dst']}")
+            else:
+                self.finish(op_id, "file missing")
+                messages.append(f"Interrupted move of {name}: file is missing from both places")
+        return messages
+
+    @property
+    def next_id(self):
+        """Id the next operation will get, to mark where a session's operations start"""
+        with self._state_lock:
+            return self._next_id
+
+    def undoable_moves(self, count, root=None, since_id=None):
+        """The last `count` completed moves, most recent first, as (id, src, dst)
+
+        With `root`, only moves of files that came from under that folder
+        count; with `since_id`, only operations from that id on.
+        """
+        prefix = os.path.join(os.path.abspath(root), "") if root is not None else None
+        moves = []
+        with self._state_lock:
+            for op_id in reversed(list(self._operations)):
+                if since_id is not None and op_id < since_id:
+                    break
+                operation = self._operations[op_id]
+                if prefix is not None and not operation["src"].startswith(prefix):
+                    continue
+                if operation["kind"] == "move" and operation["state"] == "done":
+                    moves.append((op_id, Path(operation["src"]), Path(operation["dst"])))
+                    if len(moves) >= count:
+                        break
+        return moves
+
+    def undo(self, count=1, on_restored=None, root=None, since_id=None):
+        """Move the last `count` moved files back to where they came from
+
+        The original path is in the journal, so files renamed with a `_n`
+        suffix get their old name back. `root` and `since_id` limit which
+        moves count, as in undoable_moves. Returns (restored sources, errors).
+        on_restored(src, dst) is called after each file is back.
+        """
+        restored = []
+        errors = []
+        for op_id, src, dst in self.undoable_moves(count, root, since_id):
+            if src.exists():
+                errors.append((src, f"{src.name} can't be restored: a file with that name already exists"))
+                continue
+            try:
+                self._append([{"op": "undoing", "id": op_id}], wait=True)
+            except OSError as e:
+                errors.append((src, f"Error restoring {src.name}: {e}"))
+                break
+            try:
+                src.parent.mkdir(parents=True, exist_ok=True)
+                move_file(dst, src)
+            except OSError as e:
+                self._append([{"op": "done", "id": op_id}], wait=False)
+                errors.append((src, f"Error restoring {src.name}: {e}"))
+                continue
+            self._append([{"op": "undone", "id": op_id}], wait=False)
+            if on_restored is not None:
+                on_restored(src, dst)
+            restored.append(src)
+        return restored, errors
+
+    def close(self):
+        """Flush outstanding records and stop the writer"""
+        with self._commit:
+            self._closed = True
+            self._commit.notify_all()
+        self._writer.join()
+        self._file.close()
+
+
+def open_operation_journal(path):
+    """Open the journal, or return None (and keep working unjournaled) if it can't be opened"""
+    try:
+        return OperationJournal(path)
+    except (OSError, ValueError) as e:
+        print(f"Error opening operation journal {path}: {e}")
+        return None
@@ -0,0 +1,138 @@
+"""
+Perceptual hashes for finding resized, re-encoded or lightly edited copies.
+
+Images are decoded into small grayscale thumbnails and hashed in batches with
+NumPy. Candidate pairs come from a BK-tree over Hamming distance, so finding
+near-duplicates doesn't compare every pair of files.
+"""
+
+import numpy as np
+from PIL import Image
+
+
+HASH_METHODS = ("phash", "dhash")
+
+# Thumbnail sizes fed to each hash: pHash keeps the low 8x8 of a 32x32 DCT,
+# dHash compares neighbouring pixels of a 9x8 thumbnail
+THUMBNAIL_SIZES = {"phash": (32, 32), "dhash": (9, 8)}
+
+
+def _dct_matrix(n):
+    """Orthonormal DCT-II basis, so a 2-D DCT of X is D @ X @ D.T"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def load_thumbnail(file_path, size):
+    """Decode an image as a small grayscale array, using JPEG draft mode where possible"""
+    with Image.open(file_path) as image:
+        if image.format == "JPEG":
+            image.draft("L", (size[0] * 4, size[1] * 4))
+        image = image.convert("L")
+        image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+        return np.asarray(image, dtype=np.float32)
+
+
+def pack_hashes(bits):
+    """Turn an (n, 64) boolean array into n 64-bit integers"""
+    packed = np.packbits(bits.reshape(len(bits), -1), axis=1)
+    return [int.from_bytes(row.tobytes(), "big") for row in packed]
+
+
+def dhash_batch(pixels):
+    """Difference hash of an (n, 8, 9) batch: is each pixel brighter than its left neighbour"""
+    return pack_hashes(pixels[:, :, 1:] > pixels[:, :, :-1])
+
+
+def phash_batch(pixels):
+    """DCT hash of an (n, 32, 32) batch: low-frequency coefficients above their median"""
+    coefficients = _DCT_32 @ pixels @ _DCT_32.T
+    low = coefficients[:, :8, :8].reshape(len(pixels), 64)
+    # The DC term is the mean brightness, keep it out of the median
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    return pack_hashes(low > median)
+
+
+HASH_FUNCTIONS = {"phash": phash_batch, "dhash": dhash_batch}
+
+
+def hash_thumbnails(method, thumbnails):
+    """Hash a list of thumbnails from load_thumbnail in one vectorized pass"""
+    if not thumbnails:
+        return []
+    return HASH_FUNCTIONS[method](np.stack(thumbnails))
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Metric tree over Hamming distance for threshold queries"""
+
+    def __init__(self):
+        # Nodes are (hash, items, {distance: child})
+        self.root = None
+
+    def add(self, value, item):
+        if self.root is None:
+            self.root = (value, [item], {})
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, [item], {})
+                return
+            node = child
+
+    def search(self, value, threshold):
+        """Items whose hash is within threshold bits of value"""
+        results = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= threshold:
+                results.extend(node[1])
+            # Triangle inequality: only subtrees at distance +- threshold can match
+            for child_distance, child in node[2].items():
+                if distance - threshold <= child_distance <= distance + threshold:
+                    stack.append(child)
+        return results
+
+
+def group_similar(hashes, threshold):
+    """Cluster {item: hash} around the first unclaimed item, in the given order
+
+    Each group is an item plus every not yet grouped item within threshold
+    bits of it, so a group never drifts further than that from its first
+    member. Only groups with more than one item are returned.
+    """
+    tree = BKTree()
+    for item, value in hashes.items():
+        tree.add(value, item)
+
+    order = {item: position for position, item in enumerate(hashes)}
+    grouped = set()
+    groups = []
+    for item, value in hashes.items():
+        if item in grouped:
+            continue
+        matches = [match for match in tree.search(value, threshold) if match not in grouped and match != item]
+        grouped.add(item)
+        if matches:
+            matches.sort(key=order.get)
+            grouped.update(matches)
+            groups.append((value, [item] + matches))
+    return groups
@@ -0,0 +1,242 @@
+"""
+Persistent on-disk previews, so reopening a folder skips decoding originals.
+
+The layout follows the freedesktop thumbnail spec: one directory per size
+bucket holding files named by the MD5 of the source URI. Square thumbnails
+use the spec's bucket names (normal, large, ...); display previews go in a
+bucket per display box, e.g. display-1180x780, and are stored at exactly the
+size shown, so a hit is a single small decode with no resample. Unlike the
+spec, the source's size and mtime are hashed into the name as well, so an
+edited file simply misses and its old preview ages out of the LRU. Previews
+are stored as JPEG where the mode allows it, because decoding a JPEG is
+several times faster than a PNG.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from PIL import Image
+from image_decoder import decode_scaled
+from latency_metrics import metrics
+
+
+# Freedesktop bucket names for square thumbnail sizes
+THUMBNAIL_BUCKETS = {128: "normal", 256: "large", 512: "x-large", 1024: "xx-large"}
+
+PREVIEW_JPEG_QUALITY = 90
+
+# Temporary files older than this are left over from a crash and removed
+STALE_TEMP_SECONDS = 3600
+
+
+def default_cache_directory():
+    """$XDG_CACHE_HOME/imagesorter/previews, or the platform equivalent"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if not base:
+        base = Path.home() / ".cache"
+    return Path(base) / "imagesorter" / "previews"
+
+
+def bucket_for(target_size):
+    """Directory name for previews scaled to fit target_size"""
+    width, height = target_size
+    if width == height and width in THUMBNAIL_BUCKETS:
+        return THUMBNAIL_BUCKETS[width]
+    return f"display-{width}x{height}"
+
+
+class PreviewCache:
+    """Previews on disk, evicted least recently used first to stay within max_bytes"""
+
+    def __init__(self, directory=None, max_bytes=1024 * 1024 * 1024):
+        self.directory = Path(directory) if directory else default_cache_directory()
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Preview file -> size in bytes, least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-write")
+        self._warmer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview-warm")
+        self._warm_generation = 0
+        threading.Thread(target=self._load_index, name="preview-index", daemon=True).start()
+
+    def _load_index(self):
+        """Add previews from earlier sessions, oldest first, behind anything used since startup"""
+        found = []
+        now = time.time()
+        try:
+            with os.scandir(self.directory) as it:
+                buckets = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            buckets = []
+        for bucket in buckets:
+            try:
+                with os.scandir(bucket) as it:
+                    for entry in it:
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        if entry.name.startswith("."):
+                            if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                                try:
+                                    os.remove(entry.path)
+                                except OSError:
+                                    pass
+                            continue
+                        found.append((stat.st_mtime, Path(entry.path), stat.st_size))
+            except OSError:
+                continue
+
+        found.sort(reverse=True)
+        with self._lock:
+            for _, path, size in found:
+                if path in self._entries:
+                    continue
+                self._entries[path] = size
+                self._entries.move_to_end(path, last=False)
+                self.current_bytes += size
+        self._evict()
+
+    def _preview_stem(self, file_path, bucket):
+        stat = os.stat(file_path)
+        uri = Path(os.path.abspath(file_path)).as_uri()
+        digest = hashlib.md5(f"{uri}\n{stat.st_size}\n{stat.st_mtime_ns}".encode("utf-8")).hexdigest()
+        return self.directory / bucket / digest
+
+    def _find(self, stem):
+        """The existing preview file for a stem, or None"""
+        for suffix in (".jpg", ".png"):
+            path = stem.with_suffix(suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load(self, file_path, target_size):
+        """Image scaled to fit target_size, read from a preview when one exists and written otherwise"""
+        stem = self._preview_stem(file_path, bucket_for(target_size))
+
+        preview_path = self._find(stem)
+        if preview_path is not None:
+            try:
+                with metrics.time("preview.hit"), Image.open(preview_path) as image:
+                    image.load()
+                self._touch(preview_path)
+                return image
+            except OSError:
+                # Truncated or evicted by another instance; decode the original instead
+                pass
+
+        with self._lock:
+            self.misses += 1
+        image = decode_scaled(file_path, target_size)
+        self._writer.submit(self._write, stem, image)
+        return image
+
+    def _touch(self, preview_path):
+        with self._lock:
+            self.hits += 1
+            if preview_path in self._entries:
+                self._entries.move_to_end(preview_path)
+        # The mtime carries the LRU order over to the next session
+        try:
+            os.utime(preview_path)
+        except OSError:
+            pass
+
+    def _write(self, stem, preview):
+        """Write a preview atomically: a temporary file in the same directory, then os.replace"""
+        if preview.mode in ("RGB", "L"):
+            suffix, save_args = ".jpg", {"format": "JPEG", "quality": PREVIEW_JPEG_QUALITY}
+        elif preview.mode in ("CMYK", "YCbCr"):
+            preview = preview.convert("RGB")
+            suffix, save_args = ".jpg", {"format": "JPEG", "quality": PREVIEW_JPEG_QUALITY}
+        else:
+            suffix, save_args = ".png", {"format": "PNG", "compress_level": 1}
+
+        path = stem.with_suffix(suffix)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    preview.save(f, **save_args)
+                os.replace(temp_path, path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+            size = os.path.getsize(path)
+        except Exception as e:
+            print(f"Error writing preview {path}: {e}")
+            return
+
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self.current_bytes -= old
+            self._entries[path] = size
+            self.current_bytes += size
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            evicted = []
+            while self.current_bytes > self.max_bytes and self._entries:
+                path, size = self._entries.popitem(last=False)
+                self.current_bytes -= size
+                evicted.append(path)
+        for path in evicted:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+
+    def warm(self, image_files, index, target_size):
+        """Write previews for image_files from index onwards in the background
+
+        Calling warm again cancels the previous run. Files that already have a
+        preview cost one stat and are skipped.
+        """
+        with self._lock:
+            self._warm_generation += 1
+            generation = self._warm_generation
+        remaining = list(image_files[index:])
+        self._warmer.submit(self._warm, remaining, tuple(target_size), generation)
+
+    def _warm(self, image_files, target_size, generation):
+        bucket = bucket_for(target_size)
+        for file_path in image_files:
+            if generation != self._warm_generation:
+                return
+            try:
+                stem = self._preview_stem(file_path, bucket)
+                if self._find(stem) is not None:
+                    continue
+                self._write(stem, decode_scaled(file_path, target_size))
+            except Exception:
+                # Moved away, unreadable or not really an image; the viewer reports it when shown
+                continue
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def shutdown(self):
+        """Stop warming and finish previews already being written"""
+        with self._lock:
+            self._warm_generation += 1
+        self._warmer.shutdown(wait=False, cancel_futures=True)
+        self._writer.shutdown(wait=True)
@@ -0,0 +1,162 @@
+"""
+Session snapshots, so a huge folder reopens where it was left without a rescan.
+
+A snapshot holds the images still to be sorted (relative to the folder, in
+the sort order they were shown in), the position of the image on screen,
+and the mtime of every directory the list was built from. On resume the list is used as-is, starting
+at that position so the first image doesn't wait for the rest, and then
+checked in the background: only directories whose mtime changed are listed
+again, and the difference is reported as the same ("added", path) /
+("removed", path) / ("removed_tree", dir) events the folder watcher produces.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from image_scanner import iter_image_files
+
+
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(directory, folder, search_subfolders):
+    """Snapshot file for a folder; scans with and without subfolders are kept apart"""
+    key = f"{os.path.abspath(folder)}\n{bool(search_subfolders)}"
+    return Path(directory) / (hashlib.md5(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def save_snapshot(path, folder, image_files, position, directories, order="path"):
+    """Write a snapshot atomically; directories are stat'ed now, after all moves have landed"""
+    prefix = os.path.join(str(folder), "")
+    files = []
+    known = {""}
+    for directory in directories:
+        relative = os.path.relpath(directory, folder)
+        known.add("" if relative == "." else relative)
+    for file_path in image_files:
+        name = str(file_path)
+        if not name.startswith(prefix):
+            continue
+        relative = name[len(prefix):]
+        files.append(relative)
+        # Directories created during the session hold listed images but were never scanned
+        known.add(os.path.dirname(relative))
+
+    fingerprints = {}
+    for relative in known:
+        try:
+            fingerprints[relative] = os.stat(os.path.join(folder, relative)).st_mtime_ns
+        except OSError:
+            continue
+
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "folder": os.path.abspath(folder),
+        "position": max(0, min(position, len(files) - 1)),
+        "order": order,
+        "directories": fingerprints,
+        "files": files,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+def load_snapshot(path, folder):
+    """The snapshot for folder, or None if there is none or it can't be used"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("folder") != os.path.abspath(folder):
+        return None
+    return snapshot
+
+
+def remove_snapshot(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def snapshot_files(snapshot, folder, start=0, end=None):
+    """A slice of the snapshot's images as paths under folder, in the snapshot's order"""
+    prefix = os.path.join(str(folder), "")
+    return [Path(prefix + relative) for relative in snapshot["files"][start:end]]
+
+
+def iter_snapshot_changes(snapshot, folder, extensions, recursive, cancel_event=None, directories=None):
+    """Yield changes since the snapshot was taken, re-listing only directories whose mtime moved
+
+    Every directory still present, plus any new ones found, is appended to
+    `directories` when a list is given.
+    """
+    folder = Path(folder)
+    changed = []
+    for relative, mtime_ns in snapshot["directories"].items():
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        directory = folder / relative if relative else folder
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            if relative:
+                yield ("removed_tree", directory)
+            continue
+        if directories is not None:
+            directories.append(directory)
+        if stat.st_mtime_ns != mtime_ns:
+            changed.append(relative)
+    if not changed:
+        return
+
+    # Listed images of just the changed directories, from one pass over the list
+    listed = {relative: set() for relative in changed}
+    for relative in snapshot["files"]:
+        names = listed.get(os.path.dirname(relative))
+        if names is not None:
+            names.add(os.path.basename(relative))
+
+    known = set(snapshot["directories"])
+    for relative in changed:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        directory = folder / relative if relative else folder
+        images = set()
+        subdirectories = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.name)
+                        elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                            images.add(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+        for name in sorted(images - listed[relative]):
+            yield ("added", directory / name)
+        for name in sorted(listed[relative] - images):
+            yield ("removed", directory / name)
+
+        if recursive:
+            for name in sorted(subdirectories):
+                if os.path.join(relative, name) in known:
+                    continue
+                for file_path in iter_image_files(directory / name, extensions, True, cancel_event, directories):
+                    yield ("added", file_path)
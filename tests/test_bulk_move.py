@@ -0,0 +1,103 @@
+import errno
+import os
+import random
+
+import pytest
+
+import bulk_move
+from bulk_move import move_file
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def test_move_file_moves(tmp_path):
+    source = write(tmp_path / "a" / "image.jpg", "image")
+    destination = tmp_path / "b.jpg"
+    move_file(source, destination)
+    assert not source.exists()
+    assert destination.read_text() == "image"
+
+
+def test_move_file_never_replaces_an_existing_file(tmp_path):
+    source = write(tmp_path / "a.jpg", "new")
+    destination = write(tmp_path / "b.jpg", "existing")
+    with pytest.raises(FileExistsError):
+        move_file(source, destination)
+    assert source.read_text() == "new"
+    assert destination.read_text() == "existing"
+
+
+@pytest.mark.parametrize("error", [errno.EPERM, errno.EXDEV])
+def test_move_file_without_hardlinks(tmp_path, monkeypatch, error):
+    def no_link(*args, **kwargs):
+        raise OSError(error, os.strerror(error))
+
+    monkeypatch.setattr(bulk_move.os, "link", no_link)
+    source = write(tmp_path / "a.jpg", "new")
+    taken = write(tmp_path / "taken.jpg", "existing")
+    with pytest.raises(FileExistsError):
+        move_file(source, taken)
+    assert taken.read_text() == "existing"
+
+    move_file(source, tmp_path / "free.jpg")
+    assert not source.exists()
+    assert (tmp_path / "free.jpg").read_text() == "new"
+
+
+def test_allocator_never_hands_out_a_taken_name(tmp_path):
+    folder = tmp_path / "dest"
+    existing = {"IMG_0001.jpg", "IMG_0001_1.jpg", "IMG_0001_3.jpg", "photo.png", "photo_2.png"}
+    for name in existing:
+        write(folder / name, "existing")
+
+    names = bulk_move._NameAllocator()
+    requested = ["IMG_0001.jpg"] * 200 + ["photo.png"] * 20 + ["IMG_0001_1.jpg"] * 5 + ["new.jpg"] * 3
+    random.Random(0).shuffle(requested)
+    allocated = [names.allocate(folder, name) for name in requested]
+
+    allocated_names = [path.name for path in allocated]
+    assert len(set(allocated_names)) == len(allocated_names)
+    assert not existing & set(allocated_names)
+    assert all(path.parent == folder for path in allocated)
+    for name, path in zip(requested, allocated):
+        assert os.path.splitext(path.name)[1] == os.path.splitext(name)[1]
+
+
+def test_plan_moves_to_unique_free_names(tmp_path):
+    root = tmp_path / "root"
+    write(root / "IMG_0001.jpg", "already in root")
+    for index in range(30):
+        write(root / f"d{index % 3}" / f"sub{index}" / "IMG_0001.jpg", f"copy {index}")
+        write(root / f"d{index % 3}" / "IMG_0001.jpg", f"top copy {index % 3}")
+    write(root / "d0" / "notes.txt", "not an image")
+
+    plan = bulk_move.plan_bulk_move(root, {".jpg"}, lambda directory: root)
+    destinations = [destination for _, destination in plan.moves]
+    assert len(set(destinations)) == len(destinations)
+    assert root / "IMG_0001.jpg" not in destinations
+    assert root / "d0" in plan.partial_directories
+
+    contents = sorted(source.read_text() for source, _ in plan.moves)
+    result = bulk_move.execute_plan(plan, workers=4)
+    assert not result.errors
+    assert sorted(destination.read_text() for destination in destinations) == contents
+    assert (root / "IMG_0001.jpg").read_text() == "already in root"
+    assert (root / "d0" / "notes.txt").exists()
+    assert not (root / "d1").exists()
+
+
+def test_plan_fails_moves_whose_name_was_taken_since(tmp_path):
+    root = tmp_path / "root"
+    write(root / "sub" / "a.jpg", "planned")
+    plan = bulk_move.plan_bulk_move(root, {".jpg"}, lambda directory: root)
+    write(root / "a.jpg", "arrived later")
+
+    result = bulk_move.execute_plan(plan)
+    assert [source for source, _ in result.errors] == [root / "sub" / "a.jpg"]
+    assert isinstance(result.errors[0][1], FileExistsError)
+    assert (root / "a.jpg").read_text() == "arrived later"
+    assert (root / "sub" / "a.jpg").read_text() == "planned"
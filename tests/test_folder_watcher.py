@@ -0,0 +1,47 @@
+import queue
+import sys
+import time
+
+import pytest
+
+from bulk_move import move_file
+from folder_watcher import FolderWatcher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+
+
+def events_until(watcher, wanted, timeout=5.0):
+    """Events from the watcher until `wanted` has been seen, or the timeout"""
+    seen = []
+    deadline = time.monotonic() + timeout
+    while wanted not in seen and time.monotonic() < deadline:
+        try:
+            seen.append(watcher.events.get(timeout=0.1))
+        except queue.Empty:
+            continue
+    return seen
+
+
+@pytest.fixture
+def watched(tmp_path):
+    (tmp_path / "sub").mkdir()
+    watcher = FolderWatcher(tmp_path, {".jpg"}, recursive=False)
+    watcher.start()
+    # Let the watch be set up before anything changes
+    time.sleep(0.3)
+    yield tmp_path, watcher
+    watcher.stop()
+
+
+def test_written_file_is_added(watched):
+    root, watcher = watched
+    (root / "b.jpg").write_bytes(b"image")
+    assert ("added", root / "b.jpg") in events_until(watcher, ("added", root / "b.jpg"))
+
+
+def test_file_moved_in_with_move_file_is_added(watched):
+    root, watcher = watched
+    source = root / "sub" / "a.jpg"
+    source.write_bytes(b"image")
+    move_file(source, root / "a.jpg")
+    assert ("added", root / "a.jpg") in events_until(watcher, ("added", root / "a.jpg"))
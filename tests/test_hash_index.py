@@ -0,0 +1,55 @@
+import os
+import sqlite3
+
+from file_handler import PARTIAL_HASH_BLOCK, FileHandler
+from hash_index import HashIndex
+
+
+SIZE = PARTIAL_HASH_BLOCK * 4
+
+
+def write(path, head, body=b"\0"):
+    path.write_bytes(head + body * (SIZE - len(head)))
+
+
+def scan(folder, index):
+    handler = FileHandler(folder, hash_index=index)
+    duplicates, _ = handler.find_duplicate_images(workers=2)
+    return duplicates, handler.scan_stats
+
+
+def test_new_file_is_compared_with_indexed_head_and_tail(tmp_path):
+    folder = tmp_path / "photos"
+    folder.mkdir()
+    index = HashIndex(tmp_path / "hashes.db")
+    write(folder / "a.jpg", b"a")
+    write(folder / "a copy.jpg", b"a")
+    duplicates, _ = scan(folder, index)
+    assert [sorted(files) for files in duplicates.values()] == [[folder / "a copy.jpg", folder / "a.jpg"]]
+
+    # Same size as the indexed pair, different head: only its head and tail are read
+    write(folder / "b.jpg", b"b")
+    duplicates, stats = scan(folder, index)
+    assert (stats["from_index"], stats["partial_hashed"], stats["full_hashed"]) == (2, 1, 0)
+    assert len(duplicates) == 1
+
+    # A third copy matches the indexed head/tail hash, so it is hashed in full
+    write(folder / "a again.jpg", b"a")
+    duplicates, stats = scan(folder, index)
+    assert (stats["partial_hashed"], stats["full_hashed"]) == (2, 1)
+    assert [len(files) for files in duplicates.values()] == [3]
+    index.close()
+
+
+def test_index_without_partial_column_is_upgraded(tmp_path):
+    db_path = tmp_path / "hashes.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,"
+                 " inode INTEGER NOT NULL, algorithm TEXT NOT NULL, hash TEXT NOT NULL)")
+    conn.execute("INSERT INTO files VALUES (?, 1, 2, 3, 'blake2b', 'abc')", (os.path.join(str(tmp_path), "a.jpg"),))
+    conn.commit()
+    conn.close()
+
+    index = HashIndex(db_path)
+    assert index.load_folder(tmp_path) == {os.path.join(str(tmp_path), "a.jpg"): (1, 2, 3, "blake2b", "abc", None)}
+    index.close()
@@ -0,0 +1,19 @@
+from PIL import Image
+
+from image_cache import ImageVariants
+from image_decoder import decode_scaled
+
+
+def test_shrinking_uses_the_decoded_image_and_growing_reads_the_file(tmp_path):
+    path = tmp_path / "a.jpg"
+    Image.new("RGB", (2000, 1000), "red").save(path)
+    variants = ImageVariants()
+    variants.put(path, (800, 800), decode_scaled(path, (800, 800)))
+
+    path.unlink()
+    assert variants.render(path, (400, 400), (1920, 1080)).size == (400, 200)
+    assert variants.source is None
+
+    Image.new("RGB", (2000, 1000), "red").save(path)
+    assert variants.render(path, (1200, 1200), (1920, 1080)).size == (1200, 600)
+    assert variants.source.size == (1920, 960)
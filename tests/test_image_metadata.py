@@ -0,0 +1,93 @@
+import bisect
+import random
+from pathlib import Path
+
+import pytest
+
+from image_metadata import SORT_ORDERS, ImageMetadata, bisect_left_key, natural_key, sort_key
+
+FOLDER = Path("/photos")
+
+
+def test_natural_key_orders_numbers_by_value():
+    names = ["IMG_10.jpg", "img_2.jpg", "IMG_1.jpg", "a/IMG_3.jpg", "IMG_2b.jpg", "10.jpg", "9.jpg"]
+    assert sorted(names, key=natural_key) == ["9.jpg", "10.jpg", "a/IMG_3.jpg", "IMG_1.jpg",
+                                              "img_2.jpg", "IMG_2b.jpg", "IMG_10.jpg"]
+
+
+def synthetic_files(count, seed):
+    """Paths and metadata with plenty of ties, missing dates and missing cameras"""
+    rng = random.Random(seed)
+    metadata = {}
+    for index in range(count):
+        folder = rng.choice(["", "a", "b/c"])
+        path = FOLDER / folder / f"IMG_{rng.randint(1, count)}_{index}.jpg"
+        width = rng.choice([640, 800, 4000])
+        metadata[path] = ImageMetadata(
+            size=rng.choice([1000, 2000, 3000]),
+            mtime_ns=rng.randint(1, 10) * 10 ** 18,
+            width=width,
+            height=rng.choice([480, 600, 3000]),
+            format="JPEG",
+            orientation=1,
+            captured=rng.choice([None, "2024:01:01 10:00:00", "2024:01:01 10:00:00.5", "2023:06:01 08:00:00"]),
+            camera=rng.choice([None, "Canon EOS R5", "canon eos r5", "NIKON D850"]),
+        )
+    return list(metadata), metadata
+
+
+def never_read(file_path):
+    raise AssertionError(f"{file_path} should have come from the metadata dict")
+
+
+@pytest.mark.parametrize("order", SORT_ORDERS)
+def test_keyed_insert_and_remove_match_sorted(order):
+    paths, metadata = synthetic_files(400, seed=len(order))
+    key = sort_key(order, FOLDER, metadata, read=never_read)
+    rng = random.Random(1)
+    rng.shuffle(paths)
+
+    items = []
+    for path in paths:
+        if key is None:
+            index = bisect.bisect_left(items, path)
+        else:
+            index = bisect_left_key(items, key(path), key)
+        items.insert(index, path)
+    assert items == sorted(paths, key=key)
+
+    rng.shuffle(paths)
+    for path in paths:
+        index = bisect.bisect_left(items, path) if key is None else bisect_left_key(items, key(path), key)
+        assert items[index] == path
+        del items[index]
+        assert items == sorted(items, key=key)
+    assert not items
+
+
+def test_missing_metadata_is_read_once():
+    paths, metadata = synthetic_files(20, seed=0)
+    reads = []
+
+    def read(file_path):
+        reads.append(file_path)
+        return metadata[file_path]
+
+    cache = {}
+    key = sort_key("capture_time", FOLDER, cache, read=read)
+    sorted(paths, key=key)
+    sorted(paths, key=key)
+    assert sorted(reads) == sorted(paths)
+
+
+@pytest.mark.parametrize("order", [order for order in SORT_ORDERS if order != "path"])
+def test_names_with_equal_natural_keys_do_not_tie(order):
+    paths = [FOLDER / "IMG_01.jpg", FOLDER / "IMG_1.jpg"]
+    same = ImageMetadata(1000, 10 ** 18, 640, 480, "JPEG", 1, None, None)
+    key = sort_key(order, FOLDER, {path: same for path in paths}, read=never_read)
+    assert natural_key(paths[0].name) == natural_key(paths[1].name)
+    assert key(paths[0]) != key(paths[1])
+
+    items = sorted(paths, key=key)
+    for path in paths:
+        assert items[bisect_left_key(items, key(path), key)] == path
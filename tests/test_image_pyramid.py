@@ -0,0 +1,82 @@
+import random
+
+import pytest
+from PIL import Image, ImageChops, ImageStat
+
+import image_pyramid
+from image_pyramid import ImagePyramid, TILE_SIZE, _RegionUnsupported
+
+# Not a multiple of the tile size or of any level's factor, so edge tiles are partial
+SIZE = (700, 530)
+
+FORMATS = {
+    "bmp": {},
+    "tiff": {"compression": None},
+    "ppm": {},
+    "png": {},
+    "jpg": {"quality": 95},
+}
+
+
+def make_image(path, options):
+    noise = random.Random(0).randbytes(SIZE[0] * SIZE[1] * 3)
+    image = Image.frombytes("RGB", SIZE, noise)
+    # A gradient under the noise, so a tile taken from the wrong place can't match by chance
+    gradient = Image.linear_gradient("L").resize(SIZE).convert("RGB")
+    Image.blend(image, gradient, 0.7).save(path, **options)
+
+
+def tiles(pyramid):
+    for level in range(pyramid.min_level, pyramid.max_level + 1):
+        columns, rows = pyramid.tile_grid(level)
+        for column in range(columns):
+            for row in range(rows):
+                yield level, column, row
+
+
+def expected_tile(full, pyramid, level, column, row):
+    reduced = full.reduce(2 ** level) if level else full
+    width, height = pyramid.level_size(level)
+    return reduced.crop((column * TILE_SIZE, row * TILE_SIZE,
+                         min(width, (column + 1) * TILE_SIZE), min(height, (row + 1) * TILE_SIZE)))
+
+
+def assert_tiles_match(pyramid, path, tolerance=0):
+    with Image.open(path) as full:
+        full.load()
+        for level, column, row in tiles(pyramid):
+            tile = pyramid.tile(level, column, row)
+            expected = expected_tile(full, pyramid, level, column, row)
+            assert tile.size == expected.size, (level, column, row)
+            difference = ImageChops.difference(tile, expected)
+            assert max(ImageStat.Stat(difference).mean) <= tolerance, (level, column, row)
+
+
+@pytest.fixture(autouse=True)
+def small_bands(monkeypatch):
+    # Several bands per tile, so band seams are covered too
+    monkeypatch.setattr(image_pyramid, "BAND_PIXELS", 256 * 40)
+
+
+@pytest.mark.parametrize("extension", FORMATS)
+def test_tiles_match_full_decode(tmp_path, extension):
+    path = tmp_path / f"image.{extension}"
+    make_image(path, FORMATS[extension])
+    pyramid = ImagePyramid(path)
+    assert pyramid.min_level == 0
+    assert pyramid.row_addressable == (extension in ("bmp", "tiff", "ppm"))
+    # JPEG levels come from DCT scaling, which filters the noise differently from reduce()
+    assert_tiles_match(pyramid, path, tolerance=8 if extension == "jpg" else 0)
+
+
+def test_region_decoding_falls_back_to_whole_levels(tmp_path, monkeypatch):
+    path = tmp_path / "image.bmp"
+    make_image(path, {})
+    pyramid = ImagePyramid(path)
+
+    def unsupported(*args):
+        raise _RegionUnsupported()
+
+    monkeypatch.setattr(pyramid, "_read_rows", unsupported)
+    assert_tiles_match(pyramid, path)
+    assert not pyramid.row_addressable
@@ -0,0 +1,152 @@
+import json
+import threading
+
+import pytest
+
+from operation_journal import OperationJournal
+
+
+def write_records(path, records, partial_line=""):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write(partial_line)
+
+
+def begin(op_id, kind, src, dst=None):
+    return {"op": "begin", "id": op_id, "kind": kind, "time": 0,
+            "src": str(src), "dst": str(dst) if dst is not None else None}
+
+
+def recovered_state(journal_path, op_id):
+    """State of an operation as a fresh open of the journal sees it"""
+    journal = OperationJournal(journal_path)
+    try:
+        return journal._operations[op_id]["state"]
+    finally:
+        journal.close()
+
+
+def place(path, present):
+    if present:
+        path.write_text("image")
+
+
+# (state in the journal, source exists, destination exists) -> (state after recovery, reports it)
+MOVE_CASES = [
+    ("pending", False, True, "done", True),
+    ("pending", True, False, "failed", False),
+    ("pending", True, True, "failed", True),
+    ("pending", False, False, "failed", True),
+    ("undoing", True, False, "undone", True),
+    ("undoing", False, True, "done", False),
+]
+
+
+@pytest.mark.parametrize("state, src_exists, dst_exists, expected, reported", MOVE_CASES)
+def test_recover_interrupted_move(tmp_path, state, src_exists, dst_exists, expected, reported):
+    src = tmp_path / "a.jpg"
+    dst = tmp_path / "Keep" / "a.jpg"
+    dst.parent.mkdir()
+    place(src, src_exists)
+    place(dst, dst_exists)
+    records = [begin(1, "move", src, dst)]
+    if state == "undoing":
+        records += [{"op": "done", "id": 1}, {"op": "undoing", "id": 1}]
+    journal_path = tmp_path / "operations.journal"
+    write_records(journal_path, records)
+
+    journal = OperationJournal(journal_path)
+    messages = journal.recover()
+    journal.close()
+    assert bool(messages) == reported
+    assert recovered_state(journal_path, 1) == expected
+    # Recovery only settles the journal; files stay where they were found
+    assert src.exists() == src_exists
+    assert dst.exists() == dst_exists
+
+
+@pytest.mark.parametrize("src_exists, expected", [(True, "failed"), (False, "done")])
+def test_recover_interrupted_trash(tmp_path, src_exists, expected):
+    src = tmp_path / "a.jpg"
+    place(src, src_exists)
+    journal_path = tmp_path / "operations.journal"
+    write_records(journal_path, [begin(1, "trash", src)])
+
+    journal = OperationJournal(journal_path)
+    assert journal.recover() == []
+    journal.close()
+    assert recovered_state(journal_path, 1) == expected
+
+
+def test_partial_last_record_is_dropped(tmp_path):
+    src = tmp_path / "a.jpg"
+    dst = tmp_path / "b.jpg"
+    place(dst, True)
+    journal_path = tmp_path / "operations.journal"
+    write_records(journal_path, [begin(1, "move", src, dst), {"op": "done", "id": 1}],
+                  partial_line='{"op": "begin", "id": 2, "ki')
+
+    journal = OperationJournal(journal_path)
+    assert list(journal._operations) == [1]
+    assert journal.next_id == 2
+    journal.close()
+    assert journal_path.read_text().endswith('"id": 1}\n')
+
+
+def test_undo_after_recovery_restores_the_original_name(tmp_path):
+    src = tmp_path / "a.jpg"
+    dst = tmp_path / "Keep" / "a_1.jpg"
+    dst.parent.mkdir()
+    place(dst, True)
+    journal_path = tmp_path / "operations.journal"
+    write_records(journal_path, [begin(1, "move", src, dst)])
+
+    journal = OperationJournal(journal_path)
+    journal.recover()
+    restored, errors = journal.undo(1, root=tmp_path)
+    journal.close()
+    assert (restored, errors) == ([src], [])
+    assert src.exists() and not dst.exists()
+    assert recovered_state(journal_path, 1) == "undone"
+
+
+def test_concurrent_moves_are_undone_most_recent_first(tmp_path):
+    journal = OperationJournal(tmp_path / "operations.journal")
+
+    def log_moves(worker):
+        for index in range(50):
+            op_id = journal.begin("move", tmp_path / f"{worker}_{index}.jpg", tmp_path / "Keep" / f"{worker}_{index}.jpg")
+            journal.finish(op_id)
+
+    threads = [threading.Thread(target=log_moves, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [op_id for op_id, _, _ in journal.undoable_moves(400, root=tmp_path, since_id=1)]
+    journal.close()
+    assert ids == list(range(400, 0, -1))
+
+
+class UnwritableFile:
+    def write(self, data):
+        raise OSError(28, "No space left on device")
+
+    def flush(self):
+        pass
+
+    def fileno(self):
+        raise AssertionError("not reached")
+
+    def close(self):
+        pass
+
+
+def test_write_error_is_raised_from_begin(tmp_path):
+    journal = OperationJournal(tmp_path / "operations.journal")
+    journal._file = UnwritableFile()
+    with pytest.raises(OSError, match="No space left"):
+        journal.begin("move", tmp_path / "a.jpg", tmp_path / "Keep" / "a.jpg")
+    journal.close()
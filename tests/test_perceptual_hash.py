@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from perceptual_hash import BKTree, group_similar, hamming
+
+
+def clustered_hashes(count, seed):
+    """64-bit hashes in clusters of near neighbours, with some exact repeats"""
+    rng = random.Random(seed)
+    centres = [rng.getrandbits(64) for _ in range(count // 10)]
+    hashes = {}
+    for item in range(count):
+        value = rng.choice(centres)
+        for _ in range(rng.randint(0, 12)):
+            value ^= 1 << rng.randrange(64)
+        hashes[f"image_{item}.jpg"] = value
+    return hashes
+
+
+@pytest.mark.parametrize("threshold", [0, 1, 4, 10, 20])
+def test_bk_tree_search_matches_brute_force(threshold):
+    hashes = clustered_hashes(500, seed=threshold)
+    tree = BKTree()
+    for item, value in hashes.items():
+        tree.add(value, item)
+
+    queries = list(hashes.values())[:100] + [random.Random(threshold).getrandbits(64) for _ in range(20)]
+    for query in queries:
+        expected = {item for item, value in hashes.items() if hamming(query, value) <= threshold}
+        found = tree.search(query, threshold)
+        assert len(found) == len(set(found))
+        assert set(found) == expected
+
+
+def test_empty_tree_finds_nothing():
+    assert BKTree().search(0, 64) == []
+
+
+@pytest.mark.parametrize("threshold", [0, 3, 8])
+def test_group_similar_matches_brute_force(threshold):
+    hashes = clustered_hashes(300, seed=threshold)
+
+    # The same greedy clustering, comparing every pair
+    grouped = set()
+    expected = []
+    for item, value in hashes.items():
+        if item in grouped:
+            continue
+        grouped.add(item)
+        matches = [other for other, other_value in hashes.items()
+                   if other not in grouped and hamming(value, other_value) <= threshold]
+        if matches:
+            grouped.update(matches)
+            expected.append((value, [item] + matches))
+
+    assert group_similar(hashes, threshold) == expected
+    for value, items in expected:
+        assert all(hamming(value, hashes[item]) <= threshold for item in items)
@@ -0,0 +1,264 @@
+"""
+Deep zoom: inspect the current image up to 1:1 without decoding all of it.
+
+The window shows one pyramid level at a time, as canvas items for the tiles
+that intersect the view plus a one-tile margin. Tiles are decoded on a
+thread pool and placed as they arrive; requests for tiles that have left
+the view are cancelled before they start. Panning moves the existing items
+with one canvas call and only asks for the tiles that came into view.
+"""
+
+import queue
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageTk
+from image_pyramid import TILE_SIZE, ImagePyramid, ZoomUnavailable
+
+
+ZOOM_POLL_MS = 30
+PAN_STEP = 200
+
+# Tiles kept on the canvas beyond the visible ones, so small pans show no gaps
+TILE_MARGIN = 1
+
+
+class ZoomView:
+    """Toplevel window with a tiled, zoomable view of one image"""
+
+    def __init__(self, sorter, file_path, workers=2, cache_mb=256):
+        self.sorter = sorter
+        self.file_path = file_path
+        self.pyramid = ImagePyramid(file_path, cache_mb * 1024 * 1024)
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zoom-tile")
+        self._pending = {}
+        self._loaded = queue.Queue()
+        # (level, column, row) -> (canvas item, PhotoImage) for tiles on the canvas
+        self.items = {}
+        self.level = None
+        # Canvas position of the level image's top-left corner
+        self.origin = (0, 0)
+        self._drag = None
+        self._render_job = None
+        self.message = ""
+        self.closed = False
+
+        self.window = tk.Toplevel(sorter.root)
+        self.window.title(f"Zoom - {file_path.name}")
+        self.window.geometry("1200x800")
+        self.window.configure(bg="black")
+
+        self.status_label = tk.Label(self.window, text="", fg="yellow", bg="black", font=("Arial", 10))
+        self.status_label.pack(side='bottom', fill='x', pady=4)
+        self.canvas = tk.Canvas(self.window, bg="black", highlightthickness=0)
+        self.canvas.pack(fill='both', expand=True)
+
+        self.bind_keys()
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.window.focus_set()
+        self.window.after(ZOOM_POLL_MS, self.poll)
+
+    def bind_keys(self):
+        self.window.bind('<Escape>', lambda e: self.close())
+        self.window.bind('<z>', lambda e: self.close())
+        self.window.bind('<plus>', lambda e: self.zoom_by(-1))
+        self.window.bind('<equal>', lambda e: self.zoom_by(-1))
+        self.window.bind('<minus>', lambda e: self.zoom_by(1))
+        self.window.bind('<Key-1>', lambda e: self.zoom_to(0))
+        self.window.bind('<Key-0>', lambda e: self.zoom_to(self.fit_level()))
+        self.window.bind('<Left>', lambda e: self.pan(PAN_STEP, 0))
+        self.window.bind('<Right>', lambda e: self.pan(-PAN_STEP, 0))
+        self.window.bind('<Up>', lambda e: self.pan(0, PAN_STEP))
+        self.window.bind('<Down>', lambda e: self.pan(0, -PAN_STEP))
+
+        self.canvas.bind('<Configure>', self.on_configure)
+        self.canvas.bind('<ButtonPress-1>', self.on_press)
+        self.canvas.bind('<B1-Motion>', self.on_drag)
+        self.canvas.bind('<Double-Button-1>', lambda e: self.zoom_by(-1, (e.x, e.y)))
+        self.canvas.bind('<MouseWheel>', lambda e: self.zoom_by(-1 if e.delta > 0 else 1, (e.x, e.y)))
+        self.canvas.bind('<Button-4>', lambda e: self.zoom_by(-1, (e.x, e.y)))
+        self.canvas.bind('<Button-5>', lambda e: self.zoom_by(1, (e.x, e.y)))
+
+    def view_size(self):
+        return max(1, self.canvas.winfo_width()), max(1, self.canvas.winfo_height())
+
+    def fit_level(self):
+        """The most detailed level that fits in the window, as load_current_image would show it"""
+        width, height = self.view_size()
+        for level in range(self.pyramid.max_level + 1):
+            level_width, level_height = self.pyramid.level_size(level)
+            if level_width <= width and level_height <= height:
+                return level
+        return self.pyramid.max_level
+
+    def on_configure(self, _event):
+        if self.level is None:
+            self.zoom_to(self.fit_level())
+        else:
+            self.move_to(self.origin)
+            self.schedule_render()
+
+    def zoom_by(self, steps, anchor=None):
+        if self.level is not None:
+            self.zoom_to(self.level + steps, anchor)
+
+    def zoom_to(self, level, anchor=None):
+        """Switch levels, keeping the image point under anchor (default: the view centre) in place"""
+        width, height = self.view_size()
+        minimum = self.pyramid.min_level if self.pyramid.min_level is not None else self.pyramid.max_level
+        if level < minimum:
+            self.message = self.pyramid.unavailable_message()
+        level = max(minimum, min(self.pyramid.max_level, level))
+
+        if self.level is None:
+            level_width, level_height = self.pyramid.level_size(level)
+            self.origin = ((width - level_width) / 2, (height - level_height) / 2)
+        elif level != self.level:
+            anchor_x, anchor_y = anchor if anchor is not None else (width / 2, height / 2)
+            scale = 2 ** (self.level - level)
+            self.origin = (anchor_x - (anchor_x - self.origin[0]) * scale,
+                           anchor_y - (anchor_y - self.origin[1]) * scale)
+        else:
+            self.update_status()
+            return
+
+        self.level = level
+        self.clear_tiles()
+        self.origin = self.clamped(self.origin)
+        self.render()
+
+    def clamped(self, origin):
+        """Keep the image on screen: centred along an axis where it's smaller than the view"""
+        width, height = self.view_size()
+        level_width, level_height = self.pyramid.level_size(self.level)
+        x, y = origin
+        x = (width - level_width) / 2 if level_width <= width else min(0, max(width - level_width, x))
+        y = (height - level_height) / 2 if level_height <= height else min(0, max(height - level_height, y))
+        return x, y
+
+    def move_to(self, origin):
+        """Move the level image to origin, shifting the tiles already placed with one canvas call"""
+        origin = self.clamped(origin)
+        dx = round(origin[0]) - round(self.origin[0])
+        dy = round(origin[1]) - round(self.origin[1])
+        self.origin = origin
+        if dx or dy:
+            self.canvas.move("tile", dx, dy)
+            self.schedule_render()
+
+    def on_press(self, event):
+        self._drag = (event.x, event.y)
+
+    def on_drag(self, event):
+        if self._drag is None:
+            return
+        self.pan(event.x - self._drag[0], event.y - self._drag[1])
+        self._drag = (event.x, event.y)
+
+    def pan(self, dx, dy):
+        if self.level is not None:
+            self.move_to((self.origin[0] + dx, self.origin[1] + dy))
+
+    def schedule_render(self):
+        # Motion events come faster than tiles can be placed; render once per idle period
+        if self._render_job is None:
+            self._render_job = self.window.after_idle(self.render)
+
+    def visible_tiles(self):
+        width, height = self.view_size()
+        columns, rows = self.pyramid.tile_grid(self.level)
+        x, y = self.origin
+        first_column = max(0, int(-x // TILE_SIZE) - TILE_MARGIN)
+        last_column = min(columns - 1, int((width - x) // TILE_SIZE) + TILE_MARGIN)
+        first_row = max(0, int(-y // TILE_SIZE) - TILE_MARGIN)
+        last_row = min(rows - 1, int((height - y) // TILE_SIZE) + TILE_MARGIN)
+        return {(self.level, column, row)
+                for row in range(first_row, last_row + 1)
+                for column in range(first_column, last_column + 1)}
+
+    def render(self):
+        """Drop tiles that left the view and request the ones that came into it"""
+        self._render_job = None
+        if self.closed or self.level is None:
+            return
+        wanted = self.visible_tiles()
+
+        for key in [key for key in self.items if key not in wanted]:
+            self.canvas.delete(self.items.pop(key)[0])
+        for key in [key for key in self._pending if key not in wanted]:
+            self._pending.pop(key).cancel()
+
+        for key in sorted(wanted - self.items.keys() - self._pending.keys(), key=self.distance_to_centre):
+            self._pending[key] = self._executor.submit(self.load_tile, key)
+        self.update_status()
+
+    def distance_to_centre(self, key):
+        """Tiles nearest the middle of the view are requested first"""
+        width, height = self.view_size()
+        _, column, row = key
+        centre_x = self.origin[0] + (column + 0.5) * TILE_SIZE
+        centre_y = self.origin[1] + (row + 0.5) * TILE_SIZE
+        return (centre_x - width / 2) ** 2 + (centre_y - height / 2) ** 2
+
+    def load_tile(self, key):
+        try:
+            tile = self.pyramid.tile(*key)
+            self._loaded.put((key, tile, None))
+        except ZoomUnavailable as e:
+            self._loaded.put((key, None, str(e)))
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            self._loaded.put((key, None, f"Error decoding {self.file_path.name}: {e}"))
+
+    def poll(self):
+        if self.closed:
+            return
+        placed = False
+        while True:
+            try:
+                key, tile, error = self._loaded.get_nowait()
+            except queue.Empty:
+                break
+            self._pending.pop(key, None)
+            if error is not None:
+                self.message = error
+                continue
+            if key[0] != self.level or key in self.items or key not in self.visible_tiles():
+                continue
+            photo = ImageTk.PhotoImage(tile)
+            x = round(self.origin[0]) + key[1] * TILE_SIZE
+            y = round(self.origin[1]) + key[2] * TILE_SIZE
+            item = self.canvas.create_image(x, y, image=photo, anchor='nw', tags=("tile",))
+            self.items[key] = (item, photo)
+            placed = True
+        if placed:
+            self.update_status()
+        self.window.after(ZOOM_POLL_MS, self.poll)
+
+    def clear_tiles(self):
+        self.canvas.delete("tile")
+        self.items.clear()
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+
+    def update_status(self):
+        if self.level is None:
+            return
+        width, height = self.pyramid.size
+        stats = self.pyramid.cache_stats()
+        text = (f"1:{2 ** self.level} | {width} × {height} | {stats['tiles']} tiles cached, "
+                f"{stats['bytes'] / (1024 * 1024):.0f} MB | Wheel or +/- to zoom, drag or arrows to pan, "
+                f"1 for 1:1, 0 to fit, Escape to close")
+        if self.message:
+            text = f"{self.message} | {text}"
+            self.message = ""
+        self.status_label.config(text=text)
+
+    def shutdown(self):
+        self.closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        self.shutdown()
+        self.window.destroy()
+        self.sorter.zoom_view = None